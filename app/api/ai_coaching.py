@@ -1,8 +1,11 @@
 """
 AI-powered learning and coaching endpoints for TURN Platform.
 """
+import json
+from contextlib import aclosing
 from fastapi import APIRouter, Depends, HTTPException, status, Request
-from typing import List, Dict, Any, Optional
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, List, Dict, Any, Optional
 from pydantic import BaseModel
 
 from app.services.ai_service import ai_service, AICoachingType, LearningLevel
@@ -44,6 +47,44 @@ class CareerGuidanceRequest(BaseModel):
     career_goals: Dict[str, Any]
 
 
+class CoverLetterRequest(BaseModel):
+    job_data: Dict[str, Any]
+    user_profile: Optional[Dict[str, Any]] = None
+    cv_data: Optional[Dict[str, Any]] = None
+    template: Optional[str] = None
+
+
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _sse_response(http_request: Request, chunks: AsyncIterator[str]) -> StreamingResponse:
+    """
+    Stream text chunks to the client as Server-Sent Events.
+
+    Chunks are pulled from the provider only as fast as the client reads
+    them, and the provider stream is closed as soon as the client goes away
+    so abandoned requests stop consuming quota.
+    """
+    async def event_stream():
+        async with aclosing(chunks):
+            try:
+                async for chunk in chunks:
+                    if await http_request.is_disconnected():
+                        return
+                    yield _sse_event("token", {"text": chunk})
+                yield _sse_event("done", {})
+            except Exception as e:
+                yield _sse_event("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.post("/learning-path")
 @limiter.limit(RateLimitTiers.AI_COACHING)
 async def generate_learning_path(
@@ -116,6 +157,60 @@ async def ai_coaching_session(
         )
 
 
+@router.post("/coaching-session/stream")
+@limiter.limit(RateLimitTiers.AI_COACHING)
+async def stream_ai_coaching_session(
+    http_request: Request,
+    request: CoachingSessionRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Stream an AI coaching response as Server-Sent Events.
+
+    Emits `token` events with text as it is generated, then `done`.
+    """
+    context = request.context or {
+        "user_id": current_user.id,
+        "email": current_user.email,
+        "experience_level": getattr(current_user, 'experience_level', 'Not specified'),
+        "current_role": getattr(current_user, 'current_role', 'Not specified')
+    }
+    
+    return _sse_response(
+        http_request,
+        ai_service.stream_ai_coaching_session(
+            coaching_type=request.coaching_type,
+            user_question=request.question,
+            user_context=context
+        )
+    )
+
+
+@router.post("/cover-letter/stream")
+@limiter.limit(RateLimitTiers.AI_COACHING)
+async def stream_cover_letter(
+    http_request: Request,
+    request: CoverLetterRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Stream a customized cover letter as Server-Sent Events.
+
+    Emits `token` events with text as it is generated, then `done`.
+    """
+    user_profile = request.user_profile or {"name": current_user.username}
+    
+    return _sse_response(
+        http_request,
+        ai_service.stream_custom_cover_letter(
+            user_profile=user_profile,
+            cv_data=request.cv_data or {},
+            job_data=request.job_data,
+            template=request.template
+        )
+    )
+
+
 @router.post("/analyze-scenario")
 async def analyze_project_scenario(
     request: ScenarioAnalysisRequest,
@@ -13,13 +13,14 @@ from app.database.user_models import User
 from app.database.project_models import ProjectSimulation
 from app.database.cv_models import CV
 from app.database.job_models import JobApplication
-from app.database.portfolio_models import Portfolio
 from app.database.platform_models import (
-    UserModuleProgress, UserAchievement, UserPoints, SimulationStatus
+    UserModuleProgress, SimulationStatus
 )
 from app.schemas.platform_schemas import (
     DashboardStatsResponse, UserActivityResponse
 )
+from app.services.dashboard_service import dashboard_service
+from app.services.points_ledger import points_ledger
 
 
 router = APIRouter(prefix="/api/v1/dashboard", tags=["Dashboard"])
@@ -32,68 +33,11 @@ async def get_dashboard_overview(
 ):
     """Get comprehensive dashboard overview for the user."""
     
-    # Learning Progress
-    learning_progress_result = await db.execute(
-        select(UserModuleProgress)
-        .where(UserModuleProgress.user_id == current_user.id)
-    )
-    learning_progress = learning_progress_result.scalars().all()
-    
-    completed_modules = len([p for p in learning_progress if p.is_completed])
-    total_learning_time = sum(p.time_spent_minutes for p in learning_progress)
-    
-    # Simulation Stats
-    simulations_result = await db.execute(
-        select(ProjectSimulation)
-        .where(ProjectSimulation.user_id == current_user.id)
-    )
-    simulations = simulations_result.scalars().all()
-    
-    completed_simulations = len([s for s in simulations if s.status == SimulationStatus.COMPLETED])
-    avg_simulation_score = None
-    if completed_simulations > 0:
-        scores = [s.final_score for s in simulations if s.final_score is not None]
-        if scores:
-            avg_simulation_score = sum(scores) / len(scores)
-    
-    # CV Builder Stats
-    cvs_result = await db.execute(
-        select(CV)
-        .where(CV.user_id == current_user.id)
-    )
-    cvs = cvs_result.scalars().all()
-    
-    total_cv_views = sum(cv.view_count for cv in cvs)
-    total_cv_downloads = sum(cv.download_count for cv in cvs)
+    # Apply buffered point awards first so the summary includes them
+    await points_ledger.flush(db, [current_user.id])
     
-    # Job Search Stats
-    applications_result = await db.execute(
-        select(JobApplication)
-        .where(JobApplication.user_id == current_user.id)
-    )
-    applications = applications_result.scalars().all()
-    
-    # Portfolio Stats
-    portfolios_result = await db.execute(
-        select(Portfolio)
-        .where(Portfolio.user_id == current_user.id)
-    )
-    portfolios = portfolios_result.scalars().all()
-    
-    total_portfolio_views = sum(p.view_count for p in portfolios)
-    
-    # Gamification Stats
-    achievements_result = await db.execute(
-        select(UserAchievement)
-        .where(UserAchievement.user_id == current_user.id)
-    )
-    achievements = achievements_result.scalars().all()
-    
-    points_result = await db.execute(
-        select(UserPoints)
-        .where(UserPoints.user_id == current_user.id)
-    )
-    user_points = points_result.scalar_one_or_none()
+    # Counts and sums are aggregated in SQL (and cached per user)
+    stats = await dashboard_service.get_overview_stats(db, current_user.id)
     
     # Recent Activity (mock data for now)
     recent_activity = [
@@ -128,41 +72,19 @@ async def get_dashboard_overview(
     
     dashboard_stats = {
         "learning_progress": {
-            "modules_started": len(learning_progress),
-            "modules_completed": completed_modules,
-            "completion_rate": (completed_modules / len(learning_progress) * 100) if learning_progress else 0,
-            "total_learning_hours": round(total_learning_time / 60, 1),
+            **stats["learning_progress"],
             "current_streak": 5,  # Mock data
             "next_milestone": "Complete 10 modules"
         },
-        "simulation_stats": {
-            "total_simulations": len(simulations),
-            "completed_simulations": completed_simulations,
-            "average_score": round(avg_simulation_score, 1) if avg_simulation_score else None,
-            "industries_experienced": len(set(s.industry for s in simulations)),
-            "current_simulation": simulations[0].title if simulations and simulations[0].status != SimulationStatus.COMPLETED else None
-        },
+        "simulation_stats": stats["simulation_stats"],
         "job_search_stats": {
-            "total_applications": len(applications),
-            "active_applications": len([a for a in applications if a.status in ["applied", "interviewing"]]),
+            **stats["job_search_stats"],
             "response_rate": 65.0,  # Mock data
-            "interview_rate": 25.0,  # Mock data
-            "saved_jobs": len([a for a in applications if a.status == "saved"])
-        },
-        "portfolio_stats": {
-            "total_portfolios": len(portfolios),
-            "total_views": total_portfolio_views,
-            "public_portfolios": len([p for p in portfolios if p.visibility == "public"]),
-            "cv_count": len(cvs),
-            "cv_views": total_cv_views,
-            "cv_downloads": total_cv_downloads
+            "interview_rate": 25.0  # Mock data
         },
+        "portfolio_stats": stats["portfolio_stats"],
         "gamification_stats": {
-            "total_points": user_points.total_points if user_points else 0,
-            "current_level": user_points.current_level if user_points else 1,
-            "points_to_next_level": user_points.points_to_next_level if user_points else 100,
-            "achievements_earned": len(achievements),
-            "current_streak": user_points.current_streak if user_points else 0,
+            **stats["gamification_stats"],
             "rank_percentile": 75  # Mock data
         },
         "recent_activity": recent_activity
@@ -314,14 +236,19 @@ async def get_quick_stats(
     )
     apps_this_month = job_apps.scalar() or 0
     
+    # Points and level from the cached dashboard summary
+    await points_ledger.flush(db, [current_user.id])
+    summary = await dashboard_service.get_overview_stats(db, current_user.id)
+    gamification_stats = summary["gamification_stats"]
+    
     return {
         "modules_completed_this_week": modules_this_week,
         "active_simulations": active_simulations,
         "cv_views_this_month": total_cv_views,
         "job_applications_this_month": apps_this_month,
-        "total_points": 1250,  # Mock data - would come from UserPoints table
-        "current_level": 5,    # Mock data
-        "next_level_progress": 75  # Mock data - percentage to next level
+        "total_points": gamification_stats["total_points"],
+        "current_level": gamification_stats["current_level"],
+        "next_level_progress": gamification_stats["next_level_progress"]
     }
 
 
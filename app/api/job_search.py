@@ -35,10 +35,7 @@ async def get_external_job_listings(
     """Get real job listings from external job boards."""
     try:
         # Fetch real job data from multiple sources
-        raw_jobs = await job_search_service.fetch_all_pm_jobs()
-        
-        # Normalize the data
-        normalized_jobs = job_search_service.normalize_job_data(raw_jobs)
+        normalized_jobs = await job_search_service.get_normalized_jobs()
         
         # Apply filters
         filtered_jobs = []
@@ -143,8 +140,7 @@ async def get_trending_jobs():
     """Get trending job market data and insights."""
     try:
         # Fetch recent job data
-        raw_jobs = await job_search_service.fetch_all_pm_jobs()
-        normalized_jobs = job_search_service.normalize_job_data(raw_jobs)
+        normalized_jobs = await job_search_service.get_normalized_jobs()
         
         # Analyze trends
         companies = {}
@@ -222,8 +218,7 @@ async def get_job_recommendations(
         # In production, this would analyze user's skills, experience, etc.
         
         # Fetch all available jobs
-        raw_jobs = await job_search_service.fetch_all_pm_jobs()
-        normalized_jobs = job_search_service.normalize_job_data(raw_jobs)
+        normalized_jobs = await job_search_service.get_normalized_jobs()
         
         # Simple scoring algorithm (in production, this would be more sophisticated)
         scored_jobs = []
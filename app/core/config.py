@@ -44,6 +44,21 @@ class Settings(BaseSettings):
     groq_api_key: Optional[str] = Field(default=None, alias="GROQ_API_KEY")
     openai_api_key: Optional[str] = Field(default=None, alias="OPENAI_API_KEY")
 
+    # AI response cache: "memory" keeps entries per process, "redis" shares them via REDIS_URL
+    ai_response_cache_enabled: bool = Field(default=True, alias="AI_RESPONSE_CACHE_ENABLED")
+    ai_response_cache_backend: str = Field(default="memory", alias="AI_RESPONSE_CACHE_BACKEND")
+    ai_response_cache_ttl_seconds: int = Field(default=86400, alias="AI_RESPONSE_CACHE_TTL_SECONDS")
+    ai_response_cache_max_entries: int = Field(default=2000, alias="AI_RESPONSE_CACHE_MAX_ENTRIES")
+    # Opt-in reuse of responses to near-identical prompts (needs sentence-transformers)
+    ai_response_cache_semantic_enabled: bool = Field(default=False, alias="AI_RESPONSE_CACHE_SEMANTIC_ENABLED")
+    ai_response_cache_semantic_threshold: float = Field(default=0.97, alias="AI_RESPONSE_CACHE_SEMANTIC_THRESHOLD")
+    # Processes sharing the AI providers' free-tier quotas (each gets an equal share)
+    ai_provider_quota_workers: int = Field(default=1, alias="AI_PROVIDER_QUOTA_WORKERS")
+
+    # Load local ML models (sentence transformer, Hugging Face pipeline) at startup
+    # in the background instead of on first use
+    ml_models_warm_up: bool = Field(default=False, alias="ML_MODELS_WARM_UP")
+
     # ======================================================
     # EMAIL — MAILERSEND ONLY
     # ======================================================
@@ -64,6 +79,38 @@ class Settings(BaseSettings):
     # ======================================================
     redis_url: str = Field(alias="REDIS_URL")
 
+    # OTP storage: "memory" (single worker) or "redis" (shared across workers)
+    otp_store_backend: str = Field(default="memory", alias="OTP_STORE_BACKEND")
+    otp_memory_max_entries: int = Field(default=10000, alias="OTP_MEMORY_MAX_ENTRIES")
+
+    # Rate limit counters: "redis" (shared across workers, falling back to
+    # per-worker memory while Redis is down) or "memory" (per worker).
+    # Under moving-window, Redis hits are leased to workers in small batches.
+    rate_limit_storage: str = Field(default="redis", alias="RATE_LIMIT_STORAGE")
+    rate_limit_strategy: str = Field(default="moving-window", alias="RATE_LIMIT_STRATEGY")
+
+    # Authenticated-user cache per worker (0 disables it)
+    auth_user_cache_ttl_seconds: int = Field(default=30, alias="AUTH_USER_CACHE_TTL_SECONDS")
+    auth_user_cache_max_entries: int = Field(default=10000, alias="AUTH_USER_CACHE_MAX_ENTRIES")
+
+    # Password hashing: bcrypt cost (existing hashes are upgraded on login) and pool size
+    password_hash_rounds: int = Field(default=12, alias="PASSWORD_HASH_ROUNDS")
+    password_hash_workers: int = Field(default=4, alias="PASSWORD_HASH_WORKERS")
+
+    # Per-user dashboard summary cache (0 disables it)
+    dashboard_summary_cache_ttl_seconds: int = Field(default=60, alias="DASHBOARD_SUMMARY_CACHE_TTL_SECONDS")
+    dashboard_summary_cache_max_entries: int = Field(default=10000, alias="DASHBOARD_SUMMARY_CACHE_MAX_ENTRIES")
+
+    # Live leaderboards: "memory" (single worker) or "redis" (shared ZSETs via REDIS_URL)
+    leaderboard_backend: str = Field(default="memory", alias="LEADERBOARD_BACKEND")
+    leaderboard_snapshot_interval_seconds: int = Field(default=300, alias="LEADERBOARD_SNAPSHOT_INTERVAL_SECONDS")
+    points_ledger_backend: str = Field(default="memory", alias="POINTS_LEDGER_BACKEND")
+    points_ledger_flush_interval_seconds: int = Field(default=5, alias="POINTS_LEDGER_FLUSH_INTERVAL_SECONDS")
+    points_ledger_batch_size: int = Field(default=500, alias="POINTS_LEDGER_BATCH_SIZE")
+    badge_rules_refresh_seconds: int = Field(default=300, alias="BADGE_RULES_REFRESH_SECONDS")
+    gamification_summary_cache_ttl_seconds: int = Field(default=60, alias="GAMIFICATION_SUMMARY_CACHE_TTL_SECONDS")
+    gamification_summary_cache_max_entries: int = Field(default=10000, alias="GAMIFICATION_SUMMARY_CACHE_MAX_ENTRIES")
+
     # ======================================================
     # PAYMENTS — PAYSTACK
     # ======================================================
@@ -116,6 +163,29 @@ class Settings(BaseSettings):
     indeed_rapidapi_key: Optional[str] = Field(default=None, alias="INDEED_RAPIDAPI_KEY")
     crunchbase_api_key: Optional[str] = Field(default=None, alias="CRUNCHBASE_API_KEY")
 
+    # Job feed cache: jobs are served fresh for the TTL, then served stale
+    # for up to the stale window while a single background refresh runs.
+    job_feed_cache_ttl_seconds: int = Field(default=900, alias="JOB_FEED_CACHE_TTL_SECONDS")
+    job_feed_stale_ttl_seconds: int = Field(default=3600, alias="JOB_FEED_STALE_TTL_SECONDS")
+
+    # Catalog jobs missing from the feeds for this long are deactivated
+    job_catalog_unseen_days: int = Field(default=14, alias="JOB_CATALOG_UNSEEN_DAYS")
+
+    # Job embedding store (memory-mapped, shared by workers on the same host)
+    job_embedding_store_dir: str = Field(default="data/embeddings", alias="JOB_EMBEDDING_STORE_DIR")
+    job_embedding_store_capacity: int = Field(default=50000, alias="JOB_EMBEDDING_STORE_CAPACITY")
+
+    # Approximate nearest-neighbour prefilter for large job catalogs
+    job_ann_enabled: bool = Field(default=True, alias="JOB_ANN_ENABLED")
+    job_ann_min_jobs: int = Field(default=20000, alias="JOB_ANN_MIN_JOBS")
+    job_ann_n_probe: int = Field(default=8, alias="JOB_ANN_N_PROBE")
+
+    # Auto-application scheduler: users processed concurrently, each in its own session
+    auto_apply_scheduler_concurrency: int = Field(default=10, alias="AUTO_APPLY_SCHEDULER_CONCURRENCY")
+    # Multi-worker deployments: shard users across workers via Postgres advisory locks
+    auto_apply_scheduler_distributed: bool = Field(default=False, alias="AUTO_APPLY_SCHEDULER_DISTRIBUTED")
+    auto_apply_scheduler_shards: int = Field(default=16, alias="AUTO_APPLY_SCHEDULER_SHARDS")
+
     # ======================================================
     # SIMULATION / CASE STUDY SOURCES
     # ======================================================
@@ -0,0 +1,102 @@
+"""
+Process-wide registry of lazily loaded local ML models.
+Models are built in a background thread on first use (or at the warm-up hook in
+the application lifespan), so importing services never pays for loading them
+and each worker process holds exactly one instance per model.
+"""
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ModelRegistry:
+    """
+    Named model loaders with shared, load-once instances.
+
+    ``get`` never blocks: it returns the model when it is ready and otherwise
+    starts loading it in the background and returns None, so callers can fall
+    back to a cheaper path meanwhile. ``load`` awaits the model.
+    """
+
+    def __init__(self):
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._models: Dict[str, Any] = {}
+        self._errors: Dict[str, str] = {}
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        # One loader thread: models are loaded one at a time to cap peak memory
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-loader")
+
+    def register(self, name: str, loader: Callable[[], Any]) -> None:
+        """Register a loader; the first registration of a name wins."""
+        with self._lock:
+            self._loaders.setdefault(name, loader)
+
+    def get(self, name: str) -> Optional[Any]:
+        """The loaded model, or None while it is loading, failed or unregistered."""
+        model = self._models.get(name)
+        if model is None and name in self._loaders and name not in self._errors:
+            self._start_loading(name)
+        return model
+
+    async def load(self, name: str) -> Optional[Any]:
+        """Wait for a model to finish loading; None if it failed or is unregistered."""
+        if name in self._models:
+            return self._models[name]
+        if name not in self._loaders or name in self._errors:
+            return None
+        try:
+            return await asyncio.wrap_future(self._start_loading(name))
+        except Exception:
+            return None
+
+    async def warm_up(self, names: Optional[List[str]] = None) -> Dict[str, str]:
+        """Load the given (default: all registered) models and report their status."""
+        names = names if names is not None else list(self._loaders)
+        await asyncio.gather(*[self.load(name) for name in names])
+        return self.status()
+
+    def is_ready(self, name: str) -> bool:
+        return name in self._models
+
+    def status(self) -> Dict[str, str]:
+        """Readiness per registered model: ready, loading, failed or not_loaded."""
+        status = {}
+        for name in self._loaders:
+            if name in self._models:
+                status[name] = "ready"
+            elif name in self._errors:
+                status[name] = "failed"
+            elif name in self._futures:
+                status[name] = "loading"
+            else:
+                status[name] = "not_loaded"
+        return status
+
+    def _start_loading(self, name: str) -> Future:
+        with self._lock:
+            future = self._futures.get(name)
+            if future is None:
+                future = self._executor.submit(self._load, name)
+                self._futures[name] = future
+            return future
+
+    def _load(self, name: str) -> Any:
+        logger.info(f"Loading model {name}")
+        try:
+            model = self._loaders[name]()
+        except Exception as e:
+            self._errors[name] = str(e)
+            logger.warning(f"Failed to load model {name}: {e}")
+            raise
+        self._models[name] = model
+        logger.info(f"Model {name} loaded")
+        return model
+
+
+# Global registry shared by every service in the process
+model_registry = ModelRegistry()
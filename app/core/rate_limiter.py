@@ -1,19 +1,174 @@
 """
 Rate Limiting Middleware for TURN Backend API
 Implements tiered rate limiting to protect resources and external API quotas.
-Uses slowapi (compatible with FastAPI) for in-memory rate limiting.
+Uses slowapi (compatible with FastAPI); counters live in memory per worker or,
+with RATE_LIMIT_STORAGE=redis, in Redis so limits hold across all workers.
 """
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
+from limits.storage import RedisStorage
 from fastapi import Request, HTTPException, status
-from typing import Callable
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
 import logging
+import threading
+import time
+
+from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+LOCAL_FIRST_SCHEME_PREFIX = "localfirst+"
+# Keep a Redis outage from stalling requests: fail fast and use local limits
+RATE_LIMIT_REDIS_TIMEOUT_SECONDS = 0.2
+MAX_LOCAL_KEYS = 10000
+# A lease is spent within this many seconds or dropped
+LEASE_SECONDS = 1.0
+# At most limit // LEASE_DIVISOR hits are leased at once; smaller limits are
+# checked against Redis on every hit
+LEASE_DIVISOR = 10
+
+
+@dataclass
+class HitLease:
+    """Hits a worker took from a key's moving window and has not spent yet."""
+    size: int
+    remaining: int
+    granted_at: float
+
+
+class LocalFirstRedisStorage(RedisStorage):
+    """
+    Redis moving-window storage that serves most checks from worker memory.
+
+    Allowed traffic: when a key is hit faster than one request per
+    ``LEASE_SECONDS``, the worker takes a batch of hits from the key's window
+    in one Redis call and spends them locally. Batches are sized from the
+    key's recent rate in this worker, so occasional requests still go to Redis
+    one at a time and a client that slows down leaves at most one batch unused.
+    A batch is capped at ``limit // LEASE_DIVISOR`` and expires after
+    ``LEASE_SECONDS``. Hits left in a batch still count against the limit
+    until they leave the window. Because a batch is timestamped when it is
+    taken, hits spent from it can age out of the window up to
+    ``LEASE_SECONDS`` early.
+
+    Rejected traffic: once Redis rejects a key, the worker keeps rejecting it
+    without a round trip until the oldest entry in the window expires.
+
+    Fixed-window limits pass straight through to Redis, one INCR per check,
+    as the storage is not told their limit.
+    """
+
+    STORAGE_SCHEME = [
+        LOCAL_FIRST_SCHEME_PREFIX + "redis",
+        LOCAL_FIRST_SCHEME_PREFIX + "rediss",
+    ]
+
+    def __init__(self, uri: str, **options):
+        super().__init__(uri[len(LOCAL_FIRST_SCHEME_PREFIX):], **options)
+        # key -> (blocked until, limit) for keys known to be exhausted
+        self._blocked: Dict[str, Tuple[float, int]] = {}
+        self._leases: Dict[str, HitLease] = {}
+        self._lock = threading.Lock()
+
+    def acquire_entry(self, key: str, limit: int, expiry: int, amount: int = 1) -> bool:
+        now = time.time()
+        with self._lock:
+            blocked = self._blocked.get(key)
+            if blocked is not None:
+                if blocked[0] > now:
+                    return False
+                del self._blocked[key]
+
+            lease = self._leases.get(key)
+            if lease is not None and now - lease.granted_at < LEASE_SECONDS and lease.remaining >= amount:
+                lease.remaining -= amount
+                return True
+            size = self._lease_size(lease, now, limit, amount)
+
+        acquired = super().acquire_entry(key, limit, expiry, size)
+        if not acquired and size > amount:
+            # Not enough room for a batch; try for this hit alone
+            size = amount
+            acquired = super().acquire_entry(key, limit, expiry, size)
+
+        if acquired:
+            with self._lock:
+                self._prune(now)
+                self._leases[key] = HitLease(size, size - amount, now)
+            return True
+
+        window_start, _ = super().get_moving_window(key, limit, expiry)
+        with self._lock:
+            self._leases.pop(key, None)
+            self._prune(now)
+            self._blocked[key] = (window_start + expiry, limit)
+        return False
+
+    def get_moving_window(self, key: str, limit: int, expiry: int) -> Tuple[float, int]:
+        blocked = self._blocked.get(key)
+        if blocked is not None and blocked[0] > time.time():
+            return blocked[0] - expiry, blocked[1]
+        return super().get_moving_window(key, limit, expiry)
+
+    def clear(self, key: str) -> None:
+        with self._lock:
+            self._blocked.pop(key, None)
+            self._leases.pop(key, None)
+        super().clear(key)
+
+    def reset(self):
+        with self._lock:
+            self._blocked.clear()
+            self._leases.clear()
+        return super().reset()
+
+    def _lease_size(self, lease: Optional[HitLease], now: float, limit: int, amount: int) -> int:
+        """Hits to take for the next lease: what the last one's rate would use in LEASE_SECONDS."""
+        if lease is None:
+            return amount
+        used = lease.size - lease.remaining
+        rate = used / max(now - lease.granted_at, 1e-3)
+        return max(amount, min(int(rate * LEASE_SECONDS), limit // LEASE_DIVISOR))
+
+    def _prune(self, now: float) -> None:
+        """Drop expired local entries once either map is full; if all are live, drop all."""
+        if len(self._blocked) < MAX_LOCAL_KEYS and len(self._leases) < MAX_LOCAL_KEYS:
+            return
+        self._blocked = {k: v for k, v in self._blocked.items() if v[0] > now}
+        self._leases = {k: v for k, v in self._leases.items() if now - v.granted_at < LEASE_SECONDS}
+        if len(self._blocked) >= MAX_LOCAL_KEYS:
+            self._blocked = {}
+        if len(self._leases) >= MAX_LOCAL_KEYS:
+            self._leases = {}
+
+
+def create_limiter(key_func: Callable[[Request], str]) -> Limiter:
+    """
+    Build a limiter on the configured storage.
+
+    With Redis, a failing backend switches the limiter to per-worker
+    in-memory counters until Redis answers a health check again.
+    """
+    if settings.rate_limit_storage != "redis":
+        return Limiter(key_func=key_func, strategy=settings.rate_limit_strategy)
+
+    return Limiter(
+        key_func=key_func,
+        strategy=settings.rate_limit_strategy,
+        storage_uri=LOCAL_FIRST_SCHEME_PREFIX + settings.redis_url,
+        storage_options={
+            "socket_timeout": RATE_LIMIT_REDIS_TIMEOUT_SECONDS,
+            "socket_connect_timeout": RATE_LIMIT_REDIS_TIMEOUT_SECONDS,
+        },
+        in_memory_fallback_enabled=True,
+        key_prefix="rate_limit",
+    )
+
+
 # Initialize limiter with remote address as identifier
-limiter = Limiter(key_func=get_remote_address)
+limiter = create_limiter(get_remote_address)
 
 
 # Rate limit tiers for different endpoint types
@@ -154,7 +309,7 @@ def get_user_identifier(request: Request) -> str:
 
 
 # User-based limiter for authenticated endpoints
-user_limiter = Limiter(key_func=get_user_identifier)
+user_limiter = create_limiter(get_user_identifier)
 
 
 def user_rate_limit(limit: str):
@@ -177,5 +332,6 @@ __all__ = [
     'general_rate_limit',
     'public_rate_limit',
     'user_rate_limit',
-    'get_user_identifier'
+    'get_user_identifier',
+    'create_limiter'
 ]
@@ -1,6 +1,8 @@
 """
 Security utilities for authentication and authorization.
 """
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Union, Any
 from jose import JWTError, jwt
@@ -12,6 +14,13 @@ from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# bcrypt releases the GIL, so a small thread pool runs hashes in parallel off
+# the event loop; its size caps the CPU a login storm can take from a worker.
+_password_executor = ThreadPoolExecutor(
+    max_workers=settings.password_hash_workers,
+    thread_name_prefix="password-hash"
+)
+
 
 class TokenData(BaseModel):
     """Token payload data."""
@@ -140,7 +149,7 @@ def get_password_hash(password: str) -> str:
             logger.warning(f"Password truncated to {len(password_bytes)} bytes for bcrypt")
         
         # Generate salt and hash the password
-        salt = bcrypt.gensalt()
+        salt = bcrypt.gensalt(rounds=settings.password_hash_rounds)
         hashed = bcrypt.hashpw(password_bytes, salt)
         
         # Return as string (decode from bytes)
@@ -151,6 +160,37 @@ def get_password_hash(password: str) -> str:
         raise ValueError(f"Failed to hash password: {str(e)}")
 
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """
+    Check whether a hash was made with a different bcrypt cost than configured.
+    
+    Args:
+        hashed_password: Hashed password from database
+        
+    Returns:
+        bool: True if the password should be re-hashed on next login
+    """
+    try:
+        # Format: $2b$<cost>$<salt+hash>
+        return int(hashed_password.split("$")[2]) != settings.password_hash_rounds
+    except (AttributeError, IndexError, ValueError):
+        return True
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the password-hashing pool instead of the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _password_executor, verify_password, plain_password, hashed_password
+    )
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the password-hashing pool instead of the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, get_password_hash, password)
+
+
 def create_refresh_token(subject: Union[str, Any]) -> str:
     """
     Create a refresh token with longer expiration.
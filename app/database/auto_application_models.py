@@ -290,4 +290,14 @@ class JobApplicationTemplate(Base):
         Index('idx_template_user_active', 'user_id', 'is_active'),
         Index('idx_template_success_rate', 'success_rate', 'usage_count'),
         Index('idx_template_last_used', 'last_used_at', 'user_id'),
-    )
\ No newline at end of file
+    )
+
+
+class SchedulerShardRun(Base):
+    """Last completed run of a distributed auto-application scheduler shard."""
+    
+    __tablename__ = "scheduler_shard_runs"
+    
+    shard_index: Mapped[int] = mapped_column(Integer, primary_key=True)
+    shard_count: Mapped[int] = mapped_column(Integer, primary_key=True)
+    processed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
\ No newline at end of file
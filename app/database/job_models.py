@@ -76,6 +76,7 @@ class JobListing(Base):
     source_platform: Mapped[str] = mapped_column(String(50), nullable=False)  # linkedin, indeed, glassdoor, company_website
     source_url: Mapped[str] = mapped_column(String(1000), nullable=False)
     external_job_id: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+    content_fingerprint: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)  # sha256 of source, external id, title, company and description
     
     # Job matching and ranking
     match_score: Mapped[Optional[float]] = mapped_column(Float, nullable=True)  # AI-computed match score
@@ -95,11 +96,21 @@ class JobListing(Base):
     scraped_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utc_now, nullable=False)
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utc_now, onupdate=utc_now, nullable=False)
     expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    last_seen_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utc_now, nullable=False)  # Last ingestion that returned this job
     
     # Relationships
     applications: Mapped[List["JobApplication"]] = relationship("JobApplication", back_populates="job_listing")
     matches: Mapped[List["JobMatch"]] = relationship("JobMatch", back_populates="job_listing")
     skill_requirements: Mapped[List["JobSkillRequirement"]] = relationship("JobSkillRequirement", back_populates="job_listing")
+    
+    # Indexes for the external job catalog
+    __table_args__ = (
+        # Upsert target for ingested external jobs
+        Index('uq_job_listings_source_external_id', 'source_platform', 'external_job_id', unique=True),
+        Index('idx_job_listings_content_fingerprint', 'content_fingerprint'),
+        Index('idx_job_listings_active_posted', 'is_active', 'posted_at'),
+        Index('idx_job_listings_active_last_seen', 'is_active', 'last_seen_at'),
+    )
 
 
 class JobApplication(Base):
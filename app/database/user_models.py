@@ -2,12 +2,13 @@
 """
 User-related database models using SQLAlchemy 2.0+.
 """
-from datetime import datetime
+from datetime import datetime, time
 from typing import List, Optional, TYPE_CHECKING
 from sqlalchemy import (
     String,
     Boolean,
     DateTime,
+    Time,
     Text,
     Integer,
     ForeignKey,
@@ -62,6 +63,8 @@ class User(Base):
     is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False, index=True)
     is_verified: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False, index=True)
     role: Mapped[UserRole] = mapped_column(SQLEnum(UserRole), default=UserRole.USER, nullable=False, index=True)
+    # Bumped to revoke every token issued before (e.g. on password change)
+    token_version: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
 
     # Timestamps
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utc_now, nullable=False, index=True)
@@ -147,6 +150,9 @@ class Profile(Base):
     excluded_companies: Mapped[Optional[str]] = mapped_column(Text, nullable=True)  # JSON array of company names to avoid
     auto_apply_only_remote: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False, index=True)
     require_manual_approval: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False, index=True)
+    auto_apply_window_start: Mapped[Optional[time]] = mapped_column(Time, nullable=True)  # UTC; null means any time
+    auto_apply_window_end: Mapped[Optional[time]] = mapped_column(Time, nullable=True)  # UTC; may wrap past midnight
+    last_job_scan_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
 
     # Contact information
     phone_number: Mapped[Optional[str]] = mapped_column(String(20), nullable=True)
@@ -184,6 +190,7 @@ class Profile(Base):
         Index("idx_profile_salary_auto", "salary_expectations_min", "auto_apply_enabled"),
         Index("idx_profile_remote_auto", "auto_apply_only_remote", "auto_apply_enabled"),
         Index("idx_profile_approval_auto", "require_manual_approval", "auto_apply_enabled"),
+        Index("idx_profile_auto_apply_scan", "auto_apply_enabled", "last_job_scan_at"),
     )
 
 
@@ -2,6 +2,7 @@
 TURN - Project Manager Career Platform
 FastAPI main application with PostgreSQL backend.
 """
+import asyncio
 from pathlib import Path
 
 from fastapi import FastAPI, HTTPException
@@ -13,6 +14,9 @@ from contextlib import asynccontextmanager
 from fastapi.staticfiles import StaticFiles
 
 from app.core.config import settings
+from app.core.model_registry import model_registry
+from app.services.leaderboard_engine import leaderboard_engine
+from app.services.points_ledger import points_ledger
 from app.routes import routers
 from app.core.logging_middleware import RequestLoggingMiddleware, DatabaseQueryLoggingMiddleware
 
@@ -32,12 +36,40 @@ async def lifespan(app: FastAPI):
     print(f" Debug mode: {settings.debug}")
     print("=" * 80)
     
+    # Load local ML models in the background so startup never waits on them
+    if settings.ml_models_warm_up:
+        app.state.model_warm_up = asyncio.create_task(model_registry.warm_up())
+    
+    # Periodically persist live leaderboard ranks to leaderboard_entries;
+    # only shared (Redis) boards agree across workers
+    if settings.leaderboard_snapshot_interval_seconds > 0:
+        if leaderboard_engine.shared:
+            app.state.leaderboard_snapshots = asyncio.create_task(
+                leaderboard_engine.run_snapshot_loop(settings.leaderboard_snapshot_interval_seconds)
+            )
+        else:
+            print(" Leaderboard snapshots disabled: they require LEADERBOARD_BACKEND=redis")
+    
+    # Apply buffered point awards in batches
+    if not points_ledger.write_through:
+        app.state.points_ledger_flush = asyncio.create_task(
+            points_ledger.run_flush_loop(settings.points_ledger_flush_interval_seconds)
+        )
+    
     yield
     
     # Shutdown
     print("=" * 80)
     print(f" Shutting down {settings.app_name}")
     print("=" * 80)
+    
+    # Don't lose awards still buffered in this process
+    if not points_ledger.write_through:
+        app.state.points_ledger_flush.cancel()
+        try:
+            await points_ledger.flush_all()
+        except Exception as e:
+            print(f" Failed to flush points ledger: {e}")
 
 
 def custom_openapi():
@@ -186,7 +218,8 @@ async def health_check():
         "status": "healthy",
         "app": settings.app_name,
         "environment": settings.environment,
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "models": model_registry.status()
     }
 
 
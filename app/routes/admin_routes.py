@@ -14,6 +14,7 @@ from app.core.dependencies import (
     UserRole
 )
 from app.database.user_models import User
+from app.services.user_cache import user_cache
 from app.schemas.user_schemas import UserResponse, UserListResponse
 from app.core.rbac import rbac_service, Permission
 
@@ -228,6 +229,8 @@ async def bulk_update_roles(
     
     result = await db.execute(stmt)
     await db.commit()
+    for user_id in bulk_data.user_ids:
+        user_cache.invalidate(user_id)
     
     return {
         "message": f"Updated roles for {result.rowcount} users",
@@ -551,14 +551,19 @@ async def get_activity_feed(
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=200),
     activity_type: Optional[str] = None,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get user's gamification activity feed."""
+    """Get user's gamification activity feed; page with the returned ``next_cursor``."""
     gamification_service = get_gamification_service()
-    activity_feed = await gamification_service.get_activity_feed(
-        db, user_id=current_user.id, skip=skip, limit=limit, activity_type=activity_type
-    )
+    try:
+        activity_feed = await gamification_service.get_activity_feed(
+            db, user_id=current_user.id, skip=skip, limit=limit,
+            activity_type=activity_type, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return activity_feed
 
 
@@ -233,7 +233,8 @@ class LeaderboardEntryResponse(BaseModel):
     """Leaderboard entry response."""
     model_config = ConfigDict(from_attributes=True)
     
-    id: int
+    # Live entries have no stored row until the next snapshot flush
+    id: Optional[int] = None
     leaderboard_id: int
     user_id: int
     rank: int
@@ -241,8 +242,8 @@ class LeaderboardEntryResponse(BaseModel):
     previous_rank: Optional[int] = None
     rank_change: int
     additional_metrics: Optional[Dict[str, Any]] = None
-    created_at: datetime
-    updated_at: datetime
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
     
     # User info (would be populated by join)
     user_name: Optional[str] = None
@@ -356,6 +357,7 @@ class ActivityFeedResponse(BaseModel):
     page: int
     per_page: int
     has_more: bool
+    next_cursor: Optional[str] = None  # pass back as ``cursor`` for the next page
 
 
 # Challenge Join/Leave
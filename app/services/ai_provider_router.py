@@ -0,0 +1,247 @@
+"""
+Adaptive routing across AI providers.
+Tracks rolling latency and error rate per provider, trips a circuit breaker on
+repeated failures and enforces free-tier quotas with token buckets, so each
+request goes to the provider with the best expected latency.
+"""
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Hashable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Outcomes kept per provider for the rolling error rate
+HEALTH_WINDOW = 20
+# Weight of the newest sample in the latency moving average
+LATENCY_SMOOTHING = 0.3
+# Consecutive failures that open the circuit
+FAILURE_THRESHOLD = 3
+CIRCUIT_COOLDOWN_SECONDS = 30.0
+MAX_CIRCUIT_COOLDOWN_SECONDS = 300.0
+
+
+class TokenBucket:
+    """Continuously refilled token bucket."""
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = capacity
+        self._updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated_at) * self.refill_per_second)
+        self._updated_at = now
+
+    def available(self, amount: float) -> bool:
+        self._refill()
+        return self.tokens >= min(amount, self.capacity)
+
+    def consume(self, amount: float) -> bool:
+        """Take tokens if there are enough; requests larger than the bucket need a full bucket."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens < amount:
+            return False
+        self.tokens -= amount
+        return True
+
+    def drain(self) -> None:
+        """Empty the bucket, e.g. after the provider reported throttling."""
+        self._refill()
+        self.tokens = 0
+
+    def adjust(self, amount: float) -> None:
+        """Take (or, if negative, give back) tokens after the fact; overuse leaves the bucket in debt."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+
+@dataclass
+class ProviderLimits:
+    """Static routing configuration for one provider."""
+    timeout_seconds: float
+    # Latency assumed before the provider has been observed
+    expected_latency_seconds: float
+    requests_per_minute: Optional[int] = None
+    tokens_per_day: Optional[int] = None
+
+
+@dataclass
+class ProviderHealth:
+    """Rolling health and circuit state of one provider."""
+    limits: ProviderLimits
+    latency: Optional[float] = None
+    outcomes: Deque[bool] = field(default_factory=lambda: deque(maxlen=HEALTH_WINDOW))
+    consecutive_failures: int = 0
+    open_until: float = 0.0
+    cooldown: float = CIRCUIT_COOLDOWN_SECONDS
+    probe_in_flight: bool = False
+    request_bucket: Optional[TokenBucket] = None
+    token_bucket: Optional[TokenBucket] = None
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return 1.0 - sum(self.outcomes) / len(self.outcomes)
+
+    @property
+    def expected_latency(self) -> float:
+        """Latency of a successful call plus the timeout cost weighted by failure odds."""
+        latency = self.latency if self.latency is not None else self.limits.expected_latency_seconds
+        return latency + self.error_rate * self.limits.timeout_seconds
+
+    @property
+    def circuit_open(self) -> bool:
+        return self.consecutive_failures >= FAILURE_THRESHOLD
+
+
+class ProviderRouter:
+    """
+    Orders providers per request by expected latency, skipping open circuits
+    and exhausted quotas.
+
+    An open circuit lets a single probe request through once its cooldown has
+    passed; a successful probe closes it, a failed one reopens it with a
+    doubled cooldown.
+
+    Quotas are per account while routers are per process, so each router
+    holds a ``1 / workers`` share of every quota.
+    """
+
+    def __init__(self, limits: Dict[Hashable, ProviderLimits], workers: int = 1):
+        self._health: Dict[Hashable, ProviderHealth] = {}
+        share = 1.0 / max(workers, 1)
+        for provider, provider_limits in limits.items():
+            health = ProviderHealth(limits=provider_limits)
+            if provider_limits.requests_per_minute:
+                requests = provider_limits.requests_per_minute * share
+                health.request_bucket = TokenBucket(requests, requests / 60.0)
+            if provider_limits.tokens_per_day:
+                tokens = provider_limits.tokens_per_day * share
+                health.token_bucket = TokenBucket(tokens, tokens / 86400.0)
+            self._health[provider] = health
+
+    def attempt_order(self, providers: List[Hashable], estimated_tokens: int) -> List[Hashable]:
+        """
+        Providers worth trying for a request, best expected latency first.
+
+        Ties keep the order given, so the caller's preference breaks them.
+        """
+        now = time.monotonic()
+        candidates = []
+        for position, provider in enumerate(providers):
+            health = self._health.get(provider)
+            if health is None:
+                candidates.append((0.0, position, provider))
+                continue
+            if health.circuit_open and (now < health.open_until or health.probe_in_flight):
+                continue
+            if health.request_bucket and not health.request_bucket.available(1):
+                continue
+            if health.token_bucket and not health.token_bucket.available(estimated_tokens):
+                continue
+            candidates.append((health.expected_latency, position, provider))
+
+        candidates.sort(key=lambda candidate: (candidate[0], candidate[1]))
+        return [provider for _, _, provider in candidates]
+
+    def acquire(self, provider: Hashable, estimated_tokens: int) -> bool:
+        """Reserve quota (and a half-open probe slot) right before calling a provider."""
+        health = self._health.get(provider)
+        if health is None:
+            return True
+        if health.circuit_open:
+            if time.monotonic() < health.open_until or health.probe_in_flight:
+                return False
+        if health.request_bucket and not health.request_bucket.available(1):
+            return False
+        if health.token_bucket and not health.token_bucket.available(estimated_tokens):
+            return False
+
+        if health.request_bucket:
+            health.request_bucket.consume(1)
+        if health.token_bucket:
+            health.token_bucket.consume(estimated_tokens)
+        if health.circuit_open:
+            health.probe_in_flight = True
+        return True
+
+    def settle(self, provider: Hashable, estimated_tokens: int, used_tokens: int) -> None:
+        """Refund or charge the difference between the estimate taken by acquire() and real usage."""
+        health = self._health.get(provider)
+        if health is None or health.token_bucket is None:
+            return
+        charged = min(estimated_tokens, health.token_bucket.capacity)
+        health.token_bucket.adjust(used_tokens - charged)
+
+    def record_success(self, provider: Hashable, latency: float) -> None:
+        health = self._health.get(provider)
+        if health is None:
+            return
+        health.outcomes.append(True)
+        health.latency = latency if health.latency is None else (
+            LATENCY_SMOOTHING * latency + (1 - LATENCY_SMOOTHING) * health.latency
+        )
+        if health.circuit_open:
+            logger.info(f"AI provider {provider} recovered; closing circuit")
+        health.consecutive_failures = 0
+        health.cooldown = CIRCUIT_COOLDOWN_SECONDS
+        health.probe_in_flight = False
+
+    def record_failure(self, provider: Hashable, latency: float, throttled: bool = False) -> None:
+        health = self._health.get(provider)
+        if health is None:
+            return
+        health.outcomes.append(False)
+        health.latency = latency if health.latency is None else (
+            LATENCY_SMOOTHING * latency + (1 - LATENCY_SMOOTHING) * health.latency
+        )
+
+        if throttled and health.request_bucket:
+            # The provider's own limiter disagrees with ours; wait for a refill
+            health.request_bucket.drain()
+
+        was_probe = health.probe_in_flight
+        health.probe_in_flight = False
+        health.consecutive_failures += 1
+        if health.circuit_open:
+            if was_probe:
+                health.cooldown = min(health.cooldown * 2, MAX_CIRCUIT_COOLDOWN_SECONDS)
+            health.open_until = time.monotonic() + health.cooldown
+            logger.warning(f"AI provider {provider} circuit open for {health.cooldown:.0f}s")
+
+    def release(self, provider: Hashable) -> None:
+        """Give back a probe slot when a call ended without an outcome (e.g. cancelled)."""
+        health = self._health.get(provider)
+        if health is not None:
+            health.probe_in_flight = False
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Current health per provider, for status endpoints and logs."""
+        now = time.monotonic()
+        return {
+            str(getattr(provider, "value", provider)): {
+                "expected_latency": round(health.expected_latency, 3),
+                "error_rate": round(health.error_rate, 3),
+                "circuit_open": health.circuit_open and now < health.open_until,
+                "requests_available": (
+                    int(health.request_bucket.tokens) if health.request_bucket else None
+                ),
+                "tokens_available": (
+                    int(health.token_bucket.tokens) if health.token_bucket else None
+                ),
+            }
+            for provider, health in self._health.items()
+        }
+
+
+def is_throttling_error(error: Exception) -> bool:
+    """Whether a provider exception signals rate limiting or quota exhaustion."""
+    if getattr(error, "status_code", None) == 429 or getattr(error, "code", None) == 429:
+        return True
+    return type(error).__name__ in ("RateLimitError", "ResourceExhausted", "TooManyRequests")
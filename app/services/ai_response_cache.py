@@ -0,0 +1,228 @@
+"""
+Content-addressed cache for AI provider responses.
+Keys hash the normalized system prompt, prompt, provider and generation
+parameters, so repeated coaching, interview and learning-path requests are
+answered without another LLM call.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    import numpy as np  # type: ignore
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+try:
+    import redis.asyncio as aioredis  # type: ignore
+except ImportError:
+    aioredis = None
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY_PREFIX = "ai_response:"
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_prompt(text: Optional[str]) -> str:
+    """Collapse whitespace so indentation-only differences share a cache entry."""
+    return _WHITESPACE.sub(" ", text or "").strip()
+
+
+class AIResponseCache:
+    """
+    TTL and size-bounded response cache with an optional Redis backend.
+
+    The in-process LRU is always consulted first; with the Redis backend it
+    acts as a near cache in front of the shared store. An opt-in semantic
+    lookup returns the response of a previously seen prompt whose embedding
+    is near-identical, within the same system prompt, provider and params.
+    Semantic matches can return another caller's response, so only requests
+    given a namespace take part; prompts carrying personal data must not.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: int,
+        redis_url: Optional[str] = None,
+        semantic_threshold: Optional[float] = None
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.semantic_threshold = semantic_threshold
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        # namespace -> key -> (expires at, prompt embedding), for near-duplicate lookups
+        self._vectors: Dict[str, "OrderedDict[str, Tuple[float, Any]]"] = {}
+        self._redis = None
+        if redis_url and aioredis is not None:
+            self._redis = aioredis.from_url(redis_url, decode_responses=True)
+        elif redis_url:
+            logger.warning("redis package not installed; AI response cache is in-process only")
+
+    def make_key(
+        self,
+        prompt: str,
+        system_prompt: Optional[str],
+        provider: Optional[str],
+        params: Dict[str, Any],
+        semantic: bool = False
+    ) -> Tuple[str, Optional[str]]:
+        """
+        Cache key for a request, plus the namespace it belongs to.
+
+        The namespace covers everything except the prompt and scopes the
+        semantic lookup; it is None unless ``semantic`` is set, which callers
+        only do for prompts with no user-specific content.
+        """
+        namespace_data = json.dumps({
+            "system": normalize_prompt(system_prompt),
+            "provider": provider,
+            "params": params
+        }, sort_keys=True)
+        namespace = hashlib.sha256(namespace_data.encode("utf-8")).hexdigest()
+        key = hashlib.sha256(
+            f"{namespace}\n{normalize_prompt(prompt)}".encode("utf-8")
+        ).hexdigest()
+        return key, namespace if semantic else None
+
+    async def get(self, key: str, namespace: Optional[str], prompt: str) -> Optional[str]:
+        """Return a cached response for the key, or for a near-identical prompt."""
+        response = self._get_local(key)
+        if response is not None:
+            return response
+
+        response = await self._get_redis(key)
+        if response is not None:
+            self._set_local(key, response)
+            return response
+
+        if self.semantic_threshold is None or namespace is None:
+            return None
+
+        similar_key = await self._find_similar(namespace, prompt)
+        if similar_key is None:
+            return None
+        return self._get_local(similar_key) or await self._get_redis(similar_key)
+
+    async def set(self, key: str, namespace: Optional[str], prompt: str, response: str) -> None:
+        """Store a response for the key."""
+        self._set_local(key, response)
+
+        if self._redis is not None:
+            try:
+                await self._redis.set(REDIS_KEY_PREFIX + key, response, ex=self.ttl_seconds)
+            except Exception as e:
+                logger.warning(f"Error writing AI response cache to Redis: {e}")
+
+        if self.semantic_threshold is not None and namespace is not None:
+            vector = await self._embed(prompt)
+            if vector is not None:
+                self._prune_vectors(namespace)
+                vectors = self._vectors.setdefault(namespace, OrderedDict())
+                vectors[key] = (time.monotonic() + self.ttl_seconds, vector)
+                vectors.move_to_end(key)
+                while len(vectors) > self.max_entries:
+                    vectors.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all in-process entries."""
+        self._entries.clear()
+        self._vectors.clear()
+
+    def _get_local(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, response = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return response
+
+    def _set_local(self, key: str, response: str) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _get_redis(self, key: str) -> Optional[str]:
+        if self._redis is None:
+            return None
+        try:
+            return await self._redis.get(REDIS_KEY_PREFIX + key)
+        except Exception as e:
+            logger.warning(f"Error reading AI response cache from Redis: {e}")
+            return None
+
+    async def _find_similar(self, namespace: str, prompt: str) -> Optional[str]:
+        """Key of the most similar cached prompt above the threshold, if any."""
+        self._prune_vectors(namespace)
+        vectors = self._vectors.get(namespace)
+        if not vectors:
+            return None
+        query = await self._embed(prompt)
+        if query is None:
+            return None
+
+        keys = list(vectors.keys())
+        scores = np.stack([vectors[key][1] for key in keys]) @ query
+        best = int(np.argmax(scores))
+        if scores[best] < self.semantic_threshold:
+            return None
+        return keys[best]
+
+    def _prune_vectors(self, namespace: str) -> None:
+        """Drop expired embeddings; entries are kept in insertion (and so expiry) order."""
+        vectors = self._vectors.get(namespace)
+        if vectors is None:
+            return
+        now = time.monotonic()
+        while vectors and next(iter(vectors.values()))[0] <= now:
+            vectors.popitem(last=False)
+        if not vectors:
+            del self._vectors[namespace]
+
+    async def _embed(self, prompt: str) -> Optional["np.ndarray"]:
+        """Normalized prompt embedding from the shared sentence transformer, if loaded."""
+        if not NUMPY_AVAILABLE:
+            return None
+        # Imported lazily: the matching service owns the embedding model
+        from app.services.job_matching_service import job_matching_service
+        if job_matching_service.embedding_model is None:
+            return None
+
+        loop = asyncio.get_running_loop()
+        try:
+            vectors = await loop.run_in_executor(
+                None, job_matching_service._encode_texts, [normalize_prompt(prompt)]
+            )
+        except Exception as e:
+            logger.warning(f"Error embedding prompt for AI response cache: {e}")
+            return None
+        return vectors[0]
+
+
+def create_ai_response_cache() -> Optional[AIResponseCache]:
+    """Build the response cache from settings, or None when caching is disabled."""
+    if not settings.ai_response_cache_enabled:
+        return None
+    return AIResponseCache(
+        max_entries=settings.ai_response_cache_max_entries,
+        ttl_seconds=settings.ai_response_cache_ttl_seconds,
+        redis_url=settings.redis_url if settings.ai_response_cache_backend == "redis" else None,
+        semantic_threshold=(
+            settings.ai_response_cache_semantic_threshold
+            if settings.ai_response_cache_semantic_enabled else None
+        )
+    )
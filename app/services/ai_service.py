@@ -3,9 +3,13 @@ AI Service for TURN Platform - AI PM Teacher and Coaching Features
 Provides intelligent project management coaching using FREE AI services.
 """
 import asyncio
+import importlib.util
 import json
 import os
-from typing import Dict, List, Optional, Any, Union
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import AsyncIterator, Dict, List, Optional, Any, Tuple, Union
 from enum import Enum
 from datetime import datetime
 import logging
@@ -21,14 +25,15 @@ try:
 except ImportError:
     Groq = None
 
-# Lazy imports for heavy ML libraries - only import when actually needed
-# This prevents slow startup times
-pipeline = None
-torch = None
-AutoTokenizer = None
-AutoModelForCausalLM = None
+try:
+    from groq import AsyncGroq
+except ImportError:
+    AsyncGroq = None
 
 from app.core.config import settings
+from app.core.model_registry import model_registry
+from app.services.ai_provider_router import ProviderLimits, ProviderRouter, is_throttling_error
+from app.services.ai_response_cache import create_ai_response_cache
 
 
 class AICoachingType(Enum):
@@ -57,6 +62,47 @@ class AIProvider(Enum):
     HUGGINGFACE = "huggingface"
     
 
+# Concurrent requests allowed per provider: the hosted free tiers are rate
+# limited and the local Hugging Face pipeline is bound by one CPU/GPU
+PROVIDER_CONCURRENCY = {
+    AIProvider.GEMINI: 4,
+    AIProvider.GROQ: 4,
+    AIProvider.HUGGINGFACE: 1,
+}
+
+# Per-request timeouts; a timed out provider falls through to the next one
+PROVIDER_TIMEOUT_SECONDS = {
+    AIProvider.GEMINI: 45,
+    AIProvider.GROQ: 30,
+    AIProvider.HUGGINGFACE: 120,
+}
+
+# Routing priors and free-tier quotas (Gemini: 15 requests/minute,
+# Groq: 14,400 tokens/day)
+PROVIDER_LIMITS = {
+    AIProvider.GEMINI: ProviderLimits(
+        timeout_seconds=PROVIDER_TIMEOUT_SECONDS[AIProvider.GEMINI],
+        expected_latency_seconds=4.0,
+        requests_per_minute=15
+    ),
+    AIProvider.GROQ: ProviderLimits(
+        timeout_seconds=PROVIDER_TIMEOUT_SECONDS[AIProvider.GROQ],
+        expected_latency_seconds=4.0,
+        tokens_per_day=14400
+    ),
+    AIProvider.HUGGINGFACE: ProviderLimits(
+        timeout_seconds=PROVIDER_TIMEOUT_SECONDS[AIProvider.HUGGINGFACE],
+        expected_latency_seconds=15.0
+    ),
+}
+
+
+HUGGINGFACE_MODEL_NAME = "microsoft/DialoGPT-medium"
+
+COVER_LETTER_GREETINGS = ('dear', 'hello', 'greetings')
+COVER_LETTER_CLOSINGS = ('sincerely', 'best regards', 'thank you')
+
+
 class AIService:
     """
     AI-powered coaching and learning service using FREE AI providers.
@@ -70,6 +116,18 @@ class AIService:
         
         # Initialize providers
         self._init_providers()
+        self._provider_slots = {
+            provider: asyncio.Semaphore(limit)
+            for provider, limit in PROVIDER_CONCURRENCY.items()
+        }
+        self.response_cache = create_ai_response_cache()
+        self.router = ProviderRouter(PROVIDER_LIMITS, workers=settings.ai_provider_quota_workers)
+        # Blocking provider calls (local pipeline, sync-only clients) run here,
+        # never on the event loop
+        self._blocking_executor = ThreadPoolExecutor(
+            max_workers=sum(PROVIDER_CONCURRENCY.values()),
+            thread_name_prefix="ai-provider"
+        )
         
     def _init_providers(self):
         """Initialize available AI providers."""
@@ -87,31 +145,57 @@ class AIService:
         # Groq (Free tier: 14,400 tokens/day)
         if Groq and hasattr(settings, 'groq_api_key') and settings.groq_api_key:
             try:
-                self.providers[AIProvider.GROQ] = Groq(api_key=settings.groq_api_key)
+                client_class = AsyncGroq or Groq
+                self.providers[AIProvider.GROQ] = client_class(api_key=settings.groq_api_key)
                 self.logger.info("Groq initialized successfully")
             except Exception as e:
                 self.logger.warning(f"Failed to initialize Groq: {e}")
                 
-        # Hugging Face (Free with rate limits) - Lazy import to avoid slow startup
-        try:
-            from transformers import pipeline as hf_pipeline
-            import torch
-            # Use smaller model for free hosting
-            self.providers[AIProvider.HUGGINGFACE] = hf_pipeline(
-                "text-generation",
-                model="microsoft/DialoGPT-medium",
-                tokenizer="microsoft/DialoGPT-medium",
-                device=0 if torch.cuda.is_available() else -1
-            )
-            self.logger.info("Hugging Face model initialized successfully")
-        except ImportError:
+        # Hugging Face (Free with rate limits) - the pipeline is built on first
+        # use (or at warm-up) by the model registry, never at import time
+        self.huggingface_available = (
+            importlib.util.find_spec("transformers") is not None
+            and importlib.util.find_spec("torch") is not None
+        )
+        if self.huggingface_available:
+            model_registry.register(HUGGINGFACE_MODEL_NAME, self._load_huggingface_pipeline)
+        else:
             self.logger.debug("Transformers/torch not installed - Hugging Face provider unavailable")
-        except Exception as e:
-            self.logger.warning(f"Failed to initialize Hugging Face: {e}")
         
-        if not self.providers:
+        if not self.providers and not self.huggingface_available:
             self.logger.warning("No AI providers available. Check API keys and dependencies.")
-            
+    
+    def _load_huggingface_pipeline(self):
+        """Build the local text-generation pipeline (blocking; runs in the registry thread)."""
+        from transformers import pipeline as hf_pipeline
+        import torch
+        # Use smaller model for free hosting
+        model = hf_pipeline(
+            "text-generation",
+            model=HUGGINGFACE_MODEL_NAME,
+            tokenizer=HUGGINGFACE_MODEL_NAME,
+            device=0 if torch.cuda.is_available() else -1
+        )
+        self.logger.info("Hugging Face model initialized successfully")
+        return model
+    
+    def _sync_local_providers(self):
+        """
+        Expose the Hugging Face pipeline once it is loaded.
+
+        It is only a last resort, so a request starts loading it only when no
+        hosted provider is configured or it is the preferred provider;
+        otherwise it joins once warm-up has loaded it.
+        """
+        if not self.huggingface_available or AIProvider.HUGGINGFACE in self.providers:
+            return
+        if self.providers and self.provider != AIProvider.HUGGINGFACE:
+            if not model_registry.is_ready(HUGGINGFACE_MODEL_NAME):
+                return
+        model = model_registry.get(HUGGINGFACE_MODEL_NAME)
+        if model is not None:
+            self.providers[AIProvider.HUGGINGFACE] = model
+    
     def get_available_provider(self) -> Optional[AIProvider]:
         """Get the preferred available provider."""
         if self.provider in self.providers:
@@ -124,6 +208,7 @@ class AIService:
 
     def _provider_attempt_order(self) -> List[AIProvider]:
         """Return providers to try in priority order."""
+        self._sync_local_providers()
         order: List[AIProvider] = []
         primary = self.get_available_provider()
         if primary:
@@ -155,47 +240,301 @@ class AIService:
     Always provide structured, actionable responses with clear next steps.
     """
     
-    async def _generate_response(self, prompt: str, system_prompt: str = None) -> str:
-        """Generate AI response using available provider."""
-        attempt_order = self._provider_attempt_order()
+    async def _generate_response(
+        self,
+        prompt: str,
+        system_prompt: str = None,
+        max_tokens: Optional[int] = None,
+        use_cache: bool = True,
+        semantic_cache: bool = False
+    ) -> str:
+        """
+        Generate AI response using available provider.
+
+        ``semantic_cache`` lets near-identical prompts share a cached answer;
+        only pass it for prompts without user-specific content.
+        """
+        preference = self._provider_attempt_order()
+        if not preference:
+            return "AI service temporarily unavailable. Please try again later."
+        
+        cache_entry = (
+            self._cache_entry(preference, prompt, system_prompt, max_tokens, semantic_cache)
+            if use_cache else None
+        )
+        if cache_entry:
+            cached = await self.response_cache.get(*cache_entry, prompt)
+            if cached is not None:
+                return cached
+        
+        estimated_tokens = self._estimate_tokens(prompt, system_prompt, max_tokens)
+        attempt_order = self.router.attempt_order(preference, estimated_tokens)
         if not attempt_order:
             return "AI service temporarily unavailable. Please try again later."
-            
-        full_prompt = f"{system_prompt or self.pm_teacher_system_prompt}\n\nUser: {prompt}\n\nAI:"
         
         for provider in attempt_order:
+            if not self.router.acquire(provider, estimated_tokens):
+                continue
+            started_at = time.monotonic()
             try:
-                if provider == AIProvider.GEMINI:
-                    model = self.providers[AIProvider.GEMINI]
-                    response = model.generate_content(full_prompt)
-                    return response.text
-
-                if provider == AIProvider.GROQ:
-                    client = self.providers[AIProvider.GROQ]
-                    chat_completion = client.chat.completions.create(
-                        messages=[
-                            {"role": "system", "content": system_prompt or self.pm_teacher_system_prompt},
-                            {"role": "user", "content": prompt}
-                        ],
-                        model="llama-3.1-8b-instant",
-                        max_tokens=1000,
-                        temperature=0.7
+                async with self._provider_slots[provider]:
+                    started_at = time.monotonic()
+                    response = await asyncio.wait_for(
+                        self._call_provider(provider, prompt, system_prompt, max_tokens),
+                        timeout=PROVIDER_TIMEOUT_SECONDS[provider]
                     )
-                    return chat_completion.choices[0].message.content
-
-                if provider == AIProvider.HUGGINGFACE:
-                    model = self.providers[AIProvider.HUGGINGFACE]
-                    response = model(full_prompt, max_length=500, num_return_sequences=1)
-                    return response[0]['generated_text'][len(full_prompt):].strip()
+            except asyncio.TimeoutError:
+                self.router.record_failure(provider, PROVIDER_TIMEOUT_SECONDS[provider])
+                self.logger.error(f"AI response from {provider} timed out")
+                continue
+            except asyncio.CancelledError:
+                self.router.release(provider)
+                raise
             except Exception as e:
+                self.router.record_failure(
+                    provider, time.monotonic() - started_at, throttled=is_throttling_error(e)
+                )
                 self.logger.error(f"Error generating AI response with {provider}: {e}")
                 continue
+            
+            self.router.record_success(provider, time.monotonic() - started_at)
+            if cache_entry and response:
+                await self.response_cache.set(*cache_entry, prompt, response)
+            return response
 
         return "I'm having trouble processing your request right now. Please try again later."
 
-    async def generate_response(self, prompt: str, system_prompt: str | None = None) -> str:
+    async def stream_response(
+        self,
+        prompt: str,
+        system_prompt: str | None = None,
+        max_tokens: Optional[int] = None,
+        use_cache: bool = True
+    ) -> AsyncIterator[str]:
+        """
+        Stream an AI response as text chunks.
+
+        Providers are tried in routing order until one produces its first
+        chunk; after that the stream is committed to that provider. Each chunk
+        must arrive within the provider timeout.
+        """
+        preference = self._provider_attempt_order()
+        if not preference:
+            yield "AI service temporarily unavailable. Please try again later."
+            return
+        
+        cache_entry = self._cache_entry(preference, prompt, system_prompt, max_tokens) if use_cache else None
+        if cache_entry:
+            cached = await self.response_cache.get(*cache_entry, prompt)
+            if cached is not None:
+                yield cached
+                return
+        
+        estimated_tokens = self._estimate_tokens(prompt, system_prompt, max_tokens)
+        attempt_order = self.router.attempt_order(preference, estimated_tokens)
+        if not attempt_order:
+            yield "AI service temporarily unavailable. Please try again later."
+            return
+        
+        for provider in attempt_order:
+            if not self.router.acquire(provider, estimated_tokens):
+                continue
+            timeout = PROVIDER_TIMEOUT_SECONDS[provider]
+            started_at = time.monotonic()
+            first_chunk_latency: Optional[float] = None
+            outcome_recorded = False
+            received: List[str] = []
+            try:
+                async with self._provider_slots[provider]:
+                    started_at = time.monotonic()
+                    chunks = self._stream_provider(provider, prompt, system_prompt, max_tokens).__aiter__()
+                    while True:
+                        try:
+                            chunk = await asyncio.wait_for(chunks.__anext__(), timeout=timeout)
+                        except StopAsyncIteration:
+                            break
+                        if chunk:
+                            if first_chunk_latency is None:
+                                first_chunk_latency = time.monotonic() - started_at
+                            received.append(chunk)
+                            yield chunk
+                if first_chunk_latency is not None:
+                    self.router.record_success(provider, first_chunk_latency)
+                    outcome_recorded = True
+                    if cache_entry:
+                        await self.response_cache.set(*cache_entry, prompt, "".join(received))
+                    return
+            except asyncio.TimeoutError:
+                self.router.record_failure(provider, timeout)
+                outcome_recorded = True
+                self.logger.error(f"AI stream from {provider} timed out")
+            except Exception as e:
+                self.router.record_failure(
+                    provider, time.monotonic() - started_at, throttled=is_throttling_error(e)
+                )
+                outcome_recorded = True
+                self.logger.error(f"Error streaming AI response with {provider}: {e}")
+            finally:
+                if not outcome_recorded:
+                    # Cancelled or closed by the consumer mid-stream
+                    self.router.release(provider)
+            if first_chunk_latency is not None:
+                # Part of the answer has been sent; don't splice in another provider
+                return
+
+        yield "I'm having trouble processing your request right now. Please try again later."
+
+    def get_provider_health(self) -> Dict[str, Dict[str, Any]]:
+        """Routing health per provider (latency, error rate, circuit, quota)."""
+        return self.router.snapshot()
+
+    def _estimate_tokens(self, prompt: str, system_prompt: Optional[str], max_tokens: Optional[int]) -> int:
+        """Rough token cost of a request (about four characters per token) for quota buckets."""
+        prompt_chars = len(prompt) + len(system_prompt or self.pm_teacher_system_prompt)
+        return prompt_chars // 4 + (max_tokens or 1000)
+
+    async def _call_provider(
+        self,
+        provider: AIProvider,
+        prompt: str,
+        system_prompt: Optional[str],
+        max_tokens: Optional[int]
+    ) -> str:
+        """Make one non-streaming request to a provider without blocking the loop."""
+        full_prompt = f"{system_prompt or self.pm_teacher_system_prompt}\n\nUser: {prompt}\n\nAI:"
+        
+        if provider == AIProvider.GEMINI:
+            model = self.providers[AIProvider.GEMINI]
+            response = await model.generate_content_async(full_prompt)
+            return response.text
+
+        if provider == AIProvider.GROQ:
+            request = self._groq_request(prompt, system_prompt, max_tokens)
+            chat_completion = await self._call_groq(request)
+            self._settle_usage(provider, prompt, system_prompt, max_tokens, getattr(chat_completion, "usage", None))
+            return chat_completion.choices[0].message.content
+
+        if provider == AIProvider.HUGGINGFACE:
+            model = self.providers[AIProvider.HUGGINGFACE]
+            response = await self._run_blocking(
+                partial(model, full_prompt, max_length=500, num_return_sequences=1)
+            )
+            return response[0]['generated_text'][len(full_prompt):].strip()
+
+        raise ValueError(f"Unsupported AI provider: {provider}")
+
+    async def _stream_provider(
+        self,
+        provider: AIProvider,
+        prompt: str,
+        system_prompt: Optional[str],
+        max_tokens: Optional[int]
+    ) -> AsyncIterator[str]:
+        """Yield response chunks from a provider, natively streamed where supported."""
+        if provider == AIProvider.GEMINI:
+            full_prompt = f"{system_prompt or self.pm_teacher_system_prompt}\n\nUser: {prompt}\n\nAI:"
+            model = self.providers[AIProvider.GEMINI]
+            response = await model.generate_content_async(full_prompt, stream=True)
+            async for chunk in response:
+                yield chunk.text
+            return
+
+        if provider == AIProvider.GROQ and self._groq_is_async():
+            request = self._groq_request(prompt, system_prompt, max_tokens)
+            stream = await self.providers[AIProvider.GROQ].chat.completions.create(**request, stream=True)
+            usage = None
+            async for chunk in stream:
+                # Groq reports usage on the final chunk
+                usage = getattr(getattr(chunk, "x_groq", None), "usage", None) or usage
+                if chunk.choices:
+                    yield chunk.choices[0].delta.content or ""
+            self._settle_usage(provider, prompt, system_prompt, max_tokens, usage)
+            return
+
+        # No native streaming: deliver the whole response as one chunk
+        yield await self._call_provider(provider, prompt, system_prompt, max_tokens)
+
+    def _settle_usage(
+        self,
+        provider: AIProvider,
+        prompt: str,
+        system_prompt: Optional[str],
+        max_tokens: Optional[int],
+        usage: Any
+    ) -> None:
+        """Correct the provider's token quota with the usage it reported for a request."""
+        used_tokens = getattr(usage, "total_tokens", None)
+        if used_tokens is not None:
+            self.router.settle(
+                provider, self._estimate_tokens(prompt, system_prompt, max_tokens), used_tokens
+            )
+
+    def _groq_request(
+        self,
+        prompt: str,
+        system_prompt: Optional[str],
+        max_tokens: Optional[int]
+    ) -> Dict[str, Any]:
+        """Chat completion arguments for Groq."""
+        return {
+            "messages": [
+                {"role": "system", "content": system_prompt or self.pm_teacher_system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            "model": "llama-3.1-8b-instant",
+            "max_tokens": max_tokens or 1000,
+            "temperature": 0.7
+        }
+
+    def _cache_entry(
+        self,
+        attempt_order: List[AIProvider],
+        prompt: str,
+        system_prompt: Optional[str],
+        max_tokens: Optional[int],
+        semantic: bool = False
+    ) -> Optional[Tuple[str, Optional[str]]]:
+        """Response cache key and namespace for a request, keyed on the preferred provider."""
+        if self.response_cache is None:
+            return None
+        return self.response_cache.make_key(
+            prompt,
+            system_prompt or self.pm_teacher_system_prompt,
+            attempt_order[0].value,
+            {"max_tokens": max_tokens},
+            semantic=semantic
+        )
+
+    def _groq_is_async(self) -> bool:
+        return AsyncGroq is not None and isinstance(self.providers.get(AIProvider.GROQ), AsyncGroq)
+
+    async def _call_groq(self, request: Dict[str, Any]):
+        """Groq chat completion via the async client, or the sync one off-loop."""
+        client = self.providers[AIProvider.GROQ]
+        if self._groq_is_async():
+            return await client.chat.completions.create(**request)
+        return await self._run_blocking(partial(client.chat.completions.create, **request))
+
+    async def _run_blocking(self, func):
+        """
+        Run a blocking provider call in the bounded provider thread pool.
+
+        A timeout or cancellation stops the caller waiting; the thread itself
+        finishes its call in the background.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._blocking_executor, func)
+
+    async def generate_response(
+        self,
+        prompt: str,
+        system_prompt: str | None = None,
+        max_tokens: Optional[int] = None,
+        use_cache: bool = True,
+        semantic_cache: bool = False
+    ) -> str:
         """Public wrapper for backward compatibility with existing callers."""
-        return await self._generate_response(prompt, system_prompt)
+        return await self._generate_response(prompt, system_prompt, max_tokens, use_cache, semantic_cache)
 
     async def generate_project_coaching_response(
         self,
@@ -287,27 +626,61 @@ class AIService:
         Conduct an AI coaching session based on user's question and context.
         """
         try:
-            context_info = ""
-            if user_context:
-                context_info = f"""
-                User Context:
-                - Experience Level: {user_context.get('experience_level', 'Not specified')}
-                - Current Role: {user_context.get('current_role', 'Not specified')}
-                - Industry: {user_context.get('industry', 'Not specified')}
-                - Company Size: {user_context.get('company_size', 'Not specified')}
-                """
-            
-            coaching_focus = {
-                AICoachingType.PM_FUNDAMENTALS: "product management fundamentals, frameworks, and core concepts",
-                AICoachingType.PRODUCT_STRATEGY: "product strategy, roadmapping, and vision setting",
-                AICoachingType.STAKEHOLDER_MANAGEMENT: "stakeholder communication, alignment, and influence",
-                AICoachingType.AGILE_SCRUM: "agile methodologies, scrum practices, and sprint planning",
-                AICoachingType.DATA_ANALYSIS: "data-driven decision making, metrics, and analytics",
-                AICoachingType.LEADERSHIP: "team leadership, cross-functional collaboration, and people management",
-                AICoachingType.CAREER_GUIDANCE: "career development, skill building, and advancement strategies"
+            prompt = self._build_coaching_prompt(coaching_type, user_question, user_context)
+            response = await self._generate_response(prompt)
+            
+            return {
+                "coaching_type": coaching_type.value,
+                "response": response,
+                "timestamp": datetime.now().isoformat(),
+                "follow_up_available": True
             }
             
-            prompt = f"""
+        except Exception as e:
+            return {
+                "error": f"Coaching session failed: {str(e)}",
+                "fallback_response": self._get_fallback_coaching_response(coaching_type)
+            }
+
+    async def stream_ai_coaching_session(
+        self,
+        coaching_type: AICoachingType,
+        user_question: str,
+        user_context: Dict[str, Any] = None
+    ) -> AsyncIterator[str]:
+        """Streaming variant of get_ai_coaching_session: yields response text as it is generated."""
+        prompt = self._build_coaching_prompt(coaching_type, user_question, user_context)
+        async for chunk in self.stream_response(prompt):
+            yield chunk
+
+    def _build_coaching_prompt(
+        self,
+        coaching_type: AICoachingType,
+        user_question: str,
+        user_context: Optional[Dict[str, Any]]
+    ) -> str:
+        """Prompt for a coaching session."""
+        context_info = ""
+        if user_context:
+            context_info = f"""
+            User Context:
+            - Experience Level: {user_context.get('experience_level', 'Not specified')}
+            - Current Role: {user_context.get('current_role', 'Not specified')}
+            - Industry: {user_context.get('industry', 'Not specified')}
+            - Company Size: {user_context.get('company_size', 'Not specified')}
+            """
+        
+        coaching_focus = {
+            AICoachingType.PM_FUNDAMENTALS: "product management fundamentals, frameworks, and core concepts",
+            AICoachingType.PRODUCT_STRATEGY: "product strategy, roadmapping, and vision setting",
+            AICoachingType.STAKEHOLDER_MANAGEMENT: "stakeholder communication, alignment, and influence",
+            AICoachingType.AGILE_SCRUM: "agile methodologies, scrum practices, and sprint planning",
+            AICoachingType.DATA_ANALYSIS: "data-driven decision making, metrics, and analytics",
+            AICoachingType.LEADERSHIP: "team leadership, cross-functional collaboration, and people management",
+            AICoachingType.CAREER_GUIDANCE: "career development, skill building, and advancement strategies"
+        }
+        
+        return f"""
             {self.pm_teacher_system_prompt}
             
             Coaching Focus: {coaching_focus[coaching_type]}
@@ -325,21 +698,6 @@ class AIService:
             
             Keep the tone encouraging, practical, and mentor-like.
             """
-            
-            response = await self._generate_response(prompt)
-            
-            return {
-                "coaching_type": coaching_type.value,
-                "response": response,
-                "timestamp": datetime.now().isoformat(),
-                "follow_up_available": True
-            }
-            
-        except Exception as e:
-            return {
-                "error": f"Coaching session failed: {str(e)}",
-                "fallback_response": self._get_fallback_coaching_response(coaching_type)
-            }
 
     async def analyze_project_scenario(
         self,
@@ -423,7 +781,8 @@ class AIService:
             Format as structured JSON.
             """
             
-            response = await self._generate_response(prompt)
+            # Built from job level, company type and focus areas only
+            response = await self._generate_response(prompt, semantic_cache=True)
             
             try:
                 questions_data = json.loads(response)
@@ -553,66 +912,19 @@ class AIService:
             Generated cover letter
         """
         try:
-            # Extract key information
-            user_name = user_profile.get('name', 'Candidate')
-            current_role = user_profile.get('current_job_title', 'Professional')
-            experience_years = user_profile.get('years_of_experience', 0)
-            skills = user_profile.get('skills', [])
-            career_goals = user_profile.get('career_goals', '')
-            
-            job_title = job_data.get('title', 'Position')
-            company = job_data.get('company', 'Company')
-            job_description = job_data.get('description', '')[:1000]  # Limit for context
-            
-            # Get recent experience
-            recent_experience = ""
-            if cv_data.get('experiences'):
-                latest_exp = cv_data['experiences'][0]
-                recent_experience = f"{latest_exp.get('job_title', '')} at {latest_exp.get('company_name', '')} - {latest_exp.get('description', '')[:200]}"
-            
-            prompt = f"""
-            Write a compelling, personalized cover letter for this job application:
-            
-            Candidate Information:
-            - Name: {user_name}
-            - Current Role: {current_role}
-            - Experience: {experience_years} years
-            - Key Skills: {', '.join(skills[:6])}
-            - Career Goals: {career_goals}
-            - Recent Experience: {recent_experience}
-            
-            Job Information:
-            - Position: {job_title}
-            - Company: {company}
-            - Job Description: {job_description}
-            
-            Requirements:
-            1. Professional but personable tone
-            2. Show enthusiasm for the specific role and company
-            3. Highlight 2-3 most relevant experiences/skills
-            4. Demonstrate understanding of company/industry
-            5. Include a compelling value proposition
-            6. 3-4 paragraphs maximum
-            7. Avoid generic phrases
-            8. Include specific examples where possible
-            
-            Template guidance: {template if template else 'Use standard professional format'}
-            
-            Return only the cover letter content, no additional formatting or explanations.
-            """
-            
+            prompt = self._build_cover_letter_prompt(user_profile, cv_data, job_data, template)
             response = await self._generate_response(prompt)
             
             # Clean up the response
             cover_letter = response.strip()
             
             # Ensure it starts with proper greeting if missing
-            if not cover_letter.lower().startswith(('dear', 'hello', 'greetings')):
+            if not cover_letter.lower().startswith(COVER_LETTER_GREETINGS):
                 cover_letter = f"Dear Hiring Manager,\n\n{cover_letter}"
             
             # Ensure it ends with proper closing if missing
-            if not any(closing in cover_letter.lower() for closing in ['sincerely', 'best regards', 'thank you']):
-                cover_letter += f"\n\nBest regards,\n{user_name}"
+            if not any(closing in cover_letter.lower() for closing in COVER_LETTER_CLOSINGS):
+                cover_letter += f"\n\nBest regards,\n{user_profile.get('name', 'Candidate')}"
             
             return cover_letter
             
@@ -620,6 +932,98 @@ class AIService:
             self.logger.error(f"Error generating custom cover letter: {str(e)}")
             return self._get_fallback_cover_letter(user_profile, job_data)
     
+    async def stream_custom_cover_letter(
+        self,
+        user_profile: Dict[str, Any],
+        cv_data: Dict[str, Any],
+        job_data: Dict[str, Any],
+        template: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Streaming variant of generate_custom_cover_letter.
+        
+        The greeting and closing fix-ups are applied on the fly: the opening
+        is held back only until it can be checked for a greeting.
+        """
+        prompt = self._build_cover_letter_prompt(user_profile, cv_data, job_data, template)
+        longest_greeting = max(len(greeting) for greeting in COVER_LETTER_GREETINGS)
+        pending = ""
+        emitted = ""
+        
+        async for chunk in self.stream_response(prompt):
+            if not emitted:
+                pending = (pending + chunk).lstrip()
+                if len(pending) < longest_greeting:
+                    continue
+                chunk = pending
+                if not pending.lower().startswith(COVER_LETTER_GREETINGS):
+                    chunk = f"Dear Hiring Manager,\n\n{pending}"
+            emitted += chunk
+            yield chunk
+        
+        if not emitted and pending:
+            emitted = pending if pending.lower().startswith(COVER_LETTER_GREETINGS) else f"Dear Hiring Manager,\n\n{pending}"
+            yield emitted
+        
+        if not any(closing in emitted.lower() for closing in COVER_LETTER_CLOSINGS):
+            yield f"\n\nBest regards,\n{user_profile.get('name', 'Candidate')}"
+    
+    def _build_cover_letter_prompt(
+        self,
+        user_profile: Dict[str, Any],
+        cv_data: Dict[str, Any],
+        job_data: Dict[str, Any],
+        template: Optional[str]
+    ) -> str:
+        """Prompt for a customized cover letter."""
+        # Extract key information
+        user_name = user_profile.get('name', 'Candidate')
+        current_role = user_profile.get('current_job_title', 'Professional')
+        experience_years = user_profile.get('years_of_experience', 0)
+        skills = user_profile.get('skills', [])
+        career_goals = user_profile.get('career_goals', '')
+        
+        job_title = job_data.get('title', 'Position')
+        company = job_data.get('company', 'Company')
+        job_description = job_data.get('description', '')[:1000]  # Limit for context
+        
+        # Get recent experience
+        recent_experience = ""
+        if cv_data.get('experiences'):
+            latest_exp = cv_data['experiences'][0]
+            recent_experience = f"{latest_exp.get('job_title', '')} at {latest_exp.get('company_name', '')} - {latest_exp.get('description', '')[:200]}"
+        
+        return f"""
+        Write a compelling, personalized cover letter for this job application:
+        
+        Candidate Information:
+        - Name: {user_name}
+        - Current Role: {current_role}
+        - Experience: {experience_years} years
+        - Key Skills: {', '.join(skills[:6])}
+        - Career Goals: {career_goals}
+        - Recent Experience: {recent_experience}
+        
+        Job Information:
+        - Position: {job_title}
+        - Company: {company}
+        - Job Description: {job_description}
+        
+        Requirements:
+        1. Professional but personable tone
+        2. Show enthusiasm for the specific role and company
+        3. Highlight 2-3 most relevant experiences/skills
+        4. Demonstrate understanding of company/industry
+        5. Include a compelling value proposition
+        6. 3-4 paragraphs maximum
+        7. Avoid generic phrases
+        8. Include specific examples where possible
+        
+        Template guidance: {template if template else 'Use standard professional format'}
+        
+        Return only the cover letter content, no additional formatting or explanations.
+        """
+    
     async def generate_cv_optimization_suggestions(
         self,
         cv_data: Dict[str, Any],
@@ -10,10 +10,11 @@ from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 
 from app.core.config import settings
-from app.core.security import verify_password, get_password_hash
+from app.core.security import verify_password_async, get_password_hash_async, password_needs_rehash
 from app.database.user_models import User, Profile
 from app.services.email_service import email_service
 from app.services.otp_service import otp_service
+from app.services.user_cache import user_cache
 from app.schemas.user_schemas import (
     UserCreate, LoginRequest, UserResponse, TokenResponse,
     RefreshTokenRequest, PasswordResetRequest, ChangePasswordRequest
@@ -55,7 +56,7 @@ class AuthenticationService:
             raise ValueError("Username already taken")
         
         # Create new user (basic auth info only)
-        hashed_password = get_password_hash(user_data.password)
+        hashed_password = await get_password_hash_async(user_data.password)
         
         db_user = User(
             email=user_data.email,
@@ -119,12 +120,16 @@ class AuthenticationService:
         if not user:
             return None
         
-        if not verify_password(login_data.password, user.hashed_password):
+        if not await verify_password_async(login_data.password, user.hashed_password):
             return None
         
         if not user.is_active:
             raise ValueError("User account is deactivated")
         
+        # Upgrade hashes made with an outdated bcrypt cost while we have the password
+        if password_needs_rehash(user.hashed_password):
+            user.hashed_password = await get_password_hash_async(login_data.password)
+        
         # Update last login
         user.last_login_at = datetime.utcnow()
         await db.commit()
@@ -155,10 +160,10 @@ class AuthenticationService:
         
         # Generate tokens
         access_token = self._create_access_token(
-            data={"sub": str(user.id), "email": user.email, "role": user.role}
+            data={"sub": str(user.id), "email": user.email, "role": user.role, "ver": user.token_version}
         )
         refresh_token = self._create_refresh_token(
-            data={"sub": str(user.id)}
+            data={"sub": str(user.id), "ver": user.token_version}
         )
         
         return TokenResponse(
@@ -202,13 +207,15 @@ class AuthenticationService:
         user = await self._get_user_by_id(db, int(user_id))
         if not user or not user.is_active:
             raise ValueError("User not found or inactive")
+        if payload.get("ver", 0) != user.token_version:
+            raise ValueError("Invalid refresh token")
         
         # Generate new tokens
         access_token = self._create_access_token(
-            data={"sub": str(user.id), "email": user.email, "role": user.role}
+            data={"sub": str(user.id), "email": user.email, "role": user.role, "ver": user.token_version}
         )
         new_refresh_token = self._create_refresh_token(
-            data={"sub": str(user.id)}
+            data={"sub": str(user.id), "ver": user.token_version}
         )
         
         return TokenResponse(
@@ -260,8 +267,20 @@ class AuthenticationService:
         user_id = payload.get("sub")
         if not user_id:
             return None
+        user_id = int(user_id)
+        # Tokens issued before versioning carry no version claim
+        token_version = payload.get("ver", 0)
+        
+        user = await user_cache.get(db, user_id, token_version)
+        if user is not None:
+            return user
+        
+        user = await self._get_user_by_id(db, user_id)
+        if not user or user.token_version != token_version:
+            return None
         
-        return await self._get_user_by_id(db, int(user_id))
+        user_cache.put(user)
+        return user
     
     async def change_password(
         self, 
@@ -288,11 +307,12 @@ class AuthenticationService:
             raise ValueError("User not found")
         
         # Verify current password
-        if not verify_password(password_data.current_password, user.hashed_password):
+        if not await verify_password_async(password_data.current_password, user.hashed_password):
             raise ValueError("Current password is incorrect")
         
         # Update password
-        user.hashed_password = get_password_hash(password_data.new_password)
+        user.hashed_password = await get_password_hash_async(password_data.new_password)
+        user.token_version += 1
         user.updated_at = datetime.utcnow()
         
         await db.commit()
@@ -423,7 +443,7 @@ class AuthenticationService:
             return False
         
         # Verify OTP
-        if not otp_service.verify_otp(email, otp, "verification"):
+        if not await otp_service.verify_otp(email, otp, "verification"):
             return False
         
         # Mark email as verified
@@ -552,15 +572,15 @@ class AuthenticationService:
         if not user:
             return None
         
-        if not otp_service.verify_otp(email, otp, "login"):
+        if not await otp_service.verify_otp(email, otp, "login"):
             return None
         
         # Create tokens
         access_token = self._create_access_token(
-            data={"sub": str(user.id), "email": user.email}
+            data={"sub": str(user.id), "email": user.email, "ver": user.token_version}
         )
         refresh_token = self._create_refresh_token(
-            data={"sub": str(user.id)}
+            data={"sub": str(user.id), "ver": user.token_version}
         )
         
         return TokenResponse(
@@ -626,11 +646,12 @@ class AuthenticationService:
         if not user:
             return False
         
-        if not otp_service.verify_otp(email, otp, "reset"):
+        if not await otp_service.verify_otp(email, otp, "reset"):
             return False
         
         # Update password
-        user.hashed_password = get_password_hash(new_password)
+        user.hashed_password = await get_password_hash_async(new_password)
+        user.token_version += 1
         user.updated_at = datetime.utcnow()
         
         await db.commit()
@@ -4,22 +4,103 @@ Periodically scans for new jobs and matches them with user profiles.
 """
 import asyncio
 import json
+import os
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
-from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Dict, Any, AsyncIterator, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession, AsyncConnection
 from sqlalchemy import select, and_, or_, func, update
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import selectinload, contains_eager
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import get_db, AsyncSessionLocal, async_engine
 from app.core.logger import logger
+from app.core.utils import utc_now
 from app.database.user_models import User, Profile
 from app.database.auto_application_models import (
     PendingAutoApplication, AutoApplicationLog, JobMatchNotification,
-    AutoApplicationStatus, JobMatchNotificationType
+    AutoApplicationStatus, JobMatchNotificationType, SchedulerShardRun
 )
 from app.services.auto_application_service import auto_application_service, AutoApplicationCriteria
+from app.services.job_catalog_service import job_catalog_service
+from app.services.job_matching_service import job_matching_service
 from app.services.email_service import email_service
 
+# Eligible users loaded per keyset page
+ELIGIBLE_USERS_CHUNK_SIZE = 500
+
+# Advisory lock keys: (namespace, -1) elects the leader, (namespace, shard) leases a shard
+SCHEDULER_LOCK_NAMESPACE = 0x4A4F4253  # "JOBS"
+LEADER_LOCK_KEY = -1
+
+
+class AdvisoryLockLease:
+    """
+    Postgres session-level advisory lock held on a dedicated connection.
+
+    The lock lives as long as the connection, so a crashed or killed worker
+    drops its leases automatically and another worker can take them over.
+    """
+
+    def __init__(self, key: int, namespace: int = SCHEDULER_LOCK_NAMESPACE):
+        self.namespace = namespace
+        self.key = key
+        self._connection: Optional[AsyncConnection] = None
+
+    @property
+    def held(self) -> bool:
+        return self._connection is not None
+
+    async def try_acquire(self) -> bool:
+        """Take the lock without waiting; returns whether this worker holds it."""
+        if self._connection is not None:
+            return await self._verify()
+
+        connection = await async_engine.connect()
+        try:
+            acquired = await connection.scalar(
+                select(func.pg_try_advisory_lock(self.namespace, self.key))
+            )
+            # Session-level locks outlive the transaction; don't sit idle in one
+            await connection.commit()
+        except Exception:
+            await connection.close()
+            raise
+
+        if not acquired:
+            await connection.close()
+            return False
+
+        self._connection = connection
+        return True
+
+    async def release(self) -> None:
+        """Unlock and return the connection to the pool."""
+        connection, self._connection = self._connection, None
+        if connection is None:
+            return
+        try:
+            await connection.scalar(select(func.pg_advisory_unlock(self.namespace, self.key)))
+            await connection.commit()
+        except Exception as e:
+            logger.warning(f"Error releasing advisory lock {self.namespace}/{self.key}: {str(e)}")
+        finally:
+            await connection.close()
+
+    async def _verify(self) -> bool:
+        """Check the held connection is still alive (and so still holds the lock)."""
+        try:
+            await self._connection.scalar(select(1))
+            await self._connection.commit()
+            return True
+        except Exception:
+            connection, self._connection = self._connection, None
+            try:
+                await connection.invalidate()
+            except Exception:
+                pass
+            return False
+
 
 class AutoApplicationScheduler:
     """
@@ -30,7 +111,17 @@ class AutoApplicationScheduler:
         self.logger = logger
         self.is_running = False
         self.scan_interval_minutes = 60  # Scan every hour
-        self.max_concurrent_users = 10   # Process max 10 users concurrently
+        self.max_concurrent_users = max(1, settings.auto_apply_scheduler_concurrency)
+        # Shared by the cycle workers and manual triggers so the total number
+        # of users being processed (and sessions held) stays bounded
+        self._user_slots = asyncio.BoundedSemaphore(self.max_concurrent_users)
+        
+        # Distributed mode: every worker runs the loop, users are split into
+        # shards leased through advisory locks and one elected leader runs the
+        # global tasks (catalog ingestion, expiry cleanup)
+        self.distributed = settings.auto_apply_scheduler_distributed
+        self.shard_count = max(1, settings.auto_apply_scheduler_shards) if self.distributed else 1
+        self._leader_lease = AdvisoryLockLease(LEADER_LOCK_KEY)
         
     async def start_scheduler(self):
         """Start the background job matching scheduler."""
@@ -44,6 +135,8 @@ class AutoApplicationScheduler:
             except Exception as e:
                 self.logger.error(f"Error in job matching cycle: {str(e)}")
                 await asyncio.sleep(300)  # Wait 5 minutes on error
+        
+        await self._leader_lease.release()
     
     def stop_scheduler(self):
         """Stop the background scheduler."""
@@ -54,110 +147,251 @@ class AutoApplicationScheduler:
         """Run a complete job matching cycle for all eligible users."""
         self.logger.info("Starting job matching cycle")
         
+        if await self._is_leader():
+            await self._run_global_tasks()
+        
+        if not self.distributed:
+            await self._process_eligible_users()
+            self.logger.info("Job matching cycle completed")
+            return
+        
+        # Start at a per-process offset so workers spread over the shards,
+        # then sweep the rest in case their holders are gone
+        offset = os.getpid() % self.shard_count
+        for step in range(self.shard_count):
+            shard_index = (offset + step) % self.shard_count
+            lease = AdvisoryLockLease(shard_index)
+            try:
+                if not await lease.try_acquire():
+                    continue
+                # Another worker may have finished this shard just before we
+                # took the lease; it records completion before releasing it
+                if await self._shard_processed_this_cycle(shard_index):
+                    continue
+                if await self._process_eligible_users(shard=(shard_index, self.shard_count)):
+                    await self._mark_shard_processed(shard_index)
+            except Exception as e:
+                self.logger.error(f"Error processing shard {shard_index}: {str(e)}")
+            finally:
+                await lease.release()
+        
+        self.logger.info("Job matching cycle completed")
+    
+    async def _shard_processed_this_cycle(self, shard_index: int) -> bool:
+        """Whether any worker completed the shard within the last scan interval."""
+        cycle_start = utc_now() - timedelta(minutes=self.scan_interval_minutes)
+        async with AsyncSessionLocal() as session:
+            processed_at = await session.scalar(
+                select(SchedulerShardRun.processed_at).where(
+                    and_(
+                        SchedulerShardRun.shard_index == shard_index,
+                        SchedulerShardRun.shard_count == self.shard_count
+                    )
+                )
+            )
+        return processed_at is not None and processed_at > cycle_start
+    
+    async def _mark_shard_processed(self, shard_index: int) -> None:
+        """Record the shard's completion; must commit before its lease is released."""
+        processed_at = utc_now()
+        stmt = pg_insert(SchedulerShardRun).values(
+            shard_index=shard_index,
+            shard_count=self.shard_count,
+            processed_at=processed_at
+        )
+        async with AsyncSessionLocal() as session:
+            await session.execute(stmt.on_conflict_do_update(
+                index_elements=[SchedulerShardRun.shard_index, SchedulerShardRun.shard_count],
+                set_={"processed_at": processed_at}
+            ))
+            await session.commit()
+    
+    async def _is_leader(self) -> bool:
+        """Whether this worker should run the global tasks this cycle."""
+        if not self.distributed:
+            return True
+        try:
+            return await self._leader_lease.try_acquire()
+        except Exception as e:
+            self.logger.error(f"Error during scheduler leader election: {str(e)}")
+            return False
+    
+    async def _run_global_tasks(self):
+        """Tasks that must run once per cycle across all workers."""
         async for db in get_db():
             try:
-                # Get users with auto-apply enabled
-                eligible_users = await self._get_eligible_users(db)
-                self.logger.info(f"Found {len(eligible_users)} eligible users for job matching")
-                
-                if not eligible_users:
-                    return
+                # Refresh the job catalog once per cycle so every user matches
+                # against the same locally indexed jobs
+                ingestion = await job_catalog_service.ingest_external_jobs(db)
+                self.logger.info(f"Job catalog refreshed: {ingestion}")
+            except Exception as e:
+                await db.rollback()
+                self.logger.error(f"Error refreshing job catalog: {str(e)}")
+            finally:
+                await db.close()
+        
+        await self.cleanup_expired_applications()
+    
+    async def _process_eligible_users(self, shard: Optional[Tuple[int, int]] = None) -> bool:
+        """Match jobs for every eligible user, optionally only those in one shard; False on error."""
+        completed = False
+        async for db in get_db():
+            try:
+                # Feed eligible users into a bounded queue drained by a pool of
+                # workers, so a slow user only ever holds up its own worker
+                queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_concurrent_users * 2)
+                workers = [
+                    asyncio.create_task(self._user_worker(queue))
+                    for _ in range(self.max_concurrent_users)
+                ]
                 
-                # Process users in batches
-                for i in range(0, len(eligible_users), self.max_concurrent_users):
-                    batch = eligible_users[i:i + self.max_concurrent_users]
-                    await self._process_user_batch(db, batch)
+                eligible_count = 0
+                try:
+                    async for eligible_users in self._iter_eligible_users(db, shard=shard):
+                        eligible_count += len(eligible_users)
+                        # Warm the profile text cache for the whole chunk in a few
+                        # queries instead of several round trips per user
+                        await job_matching_service.get_user_profile_texts(
+                            db, [user_data["user"].id for user_data in eligible_users]
+                        )
+                        # End the read transaction so the connection is not held
+                        # idle while the workers drain the chunk
+                        await db.commit()
+                        
+                        for user_data in eligible_users:
+                            await queue.put(user_data)
+                    
+                    for _ in workers:
+                        await queue.put(None)
+                    await asyncio.gather(*workers)
+                finally:
+                    for worker in workers:
+                        worker.cancel()
                 
-                self.logger.info("Job matching cycle completed")
+                shard_label = f" in shard {shard[0]}/{shard[1]}" if shard else ""
+                self.logger.info(f"Processed {eligible_count} eligible users{shard_label} for job matching")
+                completed = True
                 
             except Exception as e:
                 self.logger.error(f"Error in job matching cycle: {str(e)}")
             finally:
                 await db.close()
+        return completed
     
-    async def _get_eligible_users(self, db: AsyncSession) -> List[Dict[str, Any]]:
-        """Get users eligible for auto job matching."""
-        # Get users with auto-apply enabled and complete profiles
-        result = await db.execute(
-            select(User)
-            .options(selectinload(User.profile).selectinload(Profile.skills))
-            .join(Profile)
+    async def _iter_eligible_users(
+        self,
+        db: AsyncSession,
+        chunk_size: int = ELIGIBLE_USERS_CHUNK_SIZE,
+        shard: Optional[Tuple[int, int]] = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Stream users eligible for auto job matching in keyset-paginated chunks.
+
+        Daily quota, scan recency and the application window are all evaluated
+        in one query per chunk, so only eligible users are ever loaded. A
+        ``(index, count)`` shard restricts the scan to ``user_id % count == index``.
+        """
+        current_time = utc_now()
+        today_start = current_time.replace(hour=0, minute=0, second=0, microsecond=0)
+
+        # Today's counted applications per user, aggregated once per chunk query
+        today_counts = (
+            select(
+                PendingAutoApplication.user_id,
+                func.count(PendingAutoApplication.id).label("application_count")
+            )
+            .where(
+                and_(
+                    PendingAutoApplication.created_at >= today_start,
+                    PendingAutoApplication.status.in_([
+                        AutoApplicationStatus.PENDING_APPROVAL,
+                        AutoApplicationStatus.APPROVED,
+                        AutoApplicationStatus.SUBMITTED
+                    ])
+                )
+            )
+            .group_by(PendingAutoApplication.user_id)
+            .subquery()
+        )
+        today_applications = func.coalesce(today_counts.c.application_count, 0)
+
+        query = (
+            select(User, today_applications.label("today_applications"))
+            .join(Profile, Profile.user_id == User.id)
+            .outerjoin(today_counts, today_counts.c.user_id == User.id)
+            .options(contains_eager(User.profile))
             .where(
                 and_(
                     User.is_active == True,
                     User.is_verified == True,
                     Profile.auto_apply_enabled == True,
                     Profile.is_complete == True,
-                    Profile.completion_percentage >= 70  # At least 70% complete
+                    Profile.completion_percentage >= 70,  # At least 70% complete
+                    # Don't scan more than twice per day
+                    or_(
+                        Profile.last_job_scan_at.is_(None),
+                        Profile.last_job_scan_at < current_time - timedelta(hours=12)
+                    ),
+                    today_applications < Profile.max_daily_auto_applications,
+                    self._application_window_clause(current_time)
                 )
             )
+            .order_by(User.id)
+            .limit(chunk_size)
         )
-        users = result.scalars().all()
-        
-        eligible_users = []
-        current_time = datetime.utcnow()
-        
-        for user in users:
-            profile = user.profile
-            
-            # Check if user hasn't been processed recently
-            last_scan_time = getattr(profile, 'last_job_scan_at', None)
-            if last_scan_time:
-                time_since_last_scan = current_time - last_scan_time
-                if time_since_last_scan < timedelta(hours=12):  # Don't scan more than twice per day
-                    continue
-            
-            # Check daily application limit
-            today_start = current_time.replace(hour=0, minute=0, second=0, microsecond=0)
-            today_applications = await db.scalar(
-                select(func.count(PendingAutoApplication.id))
-                .where(
-                    and_(
-                        PendingAutoApplication.user_id == user.id,
-                        PendingAutoApplication.created_at >= today_start,
-                        PendingAutoApplication.status.in_([
-                            AutoApplicationStatus.PENDING_APPROVAL,
-                            AutoApplicationStatus.APPROVED,
-                            AutoApplicationStatus.SUBMITTED
-                        ])
-                    )
-                )
-            )
-            
-            if today_applications >= profile.max_daily_auto_applications:
-                continue
-            
-            # Check if within user's preferred time window
-            if not self._is_within_application_window(profile, current_time):
-                continue
-            
-            eligible_users.append({
-                "user": user,
-                "profile": profile,
-                "today_applications": today_applications,
-                "remaining_quota": profile.max_daily_auto_applications - today_applications
-            })
-        
-        return eligible_users
+        if shard is not None:
+            shard_index, shard_count = shard
+            query = query.where(User.id % shard_count == shard_index)
+
+        last_user_id = 0
+        while True:
+            result = await db.execute(query.where(User.id > last_user_id))
+            rows = result.all()
+            if not rows:
+                return
+
+            # Read the cursor before yielding: processing commits and may expire rows
+            last_user_id = rows[-1][0].id
+
+            yield [
+                {
+                    "user": user,
+                    "profile": user.profile,
+                    "today_applications": count,
+                    "remaining_quota": user.profile.max_daily_auto_applications - count
+                }
+                for user, count in rows
+            ]
+
+            if len(rows) < chunk_size:
+                return
+
+    async def _user_worker(self, queue: asyncio.Queue):
+        """Process queued users until a ``None`` sentinel arrives."""
+        while True:
+            user_data = await queue.get()
+            try:
+                if user_data is None:
+                    return
+                await self._process_user(user_data)
+            finally:
+                queue.task_done()
     
-    async def _process_user_batch(self, db: AsyncSession, user_batch: List[Dict[str, Any]]):
-        """Process a batch of users concurrently."""
-        tasks = [
-            self._process_single_user(db, user_data)
-            for user_data in user_batch
-        ]
+    async def _process_user(self, user_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Process one user in a dedicated session once a processing slot is free."""
+        user_id = user_data["user"].id
         
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        async with self._user_slots:
+            async with AsyncSessionLocal() as session:
+                try:
+                    result = await self._process_single_user(session, user_data)
+                except Exception as e:
+                    await session.rollback()
+                    self.logger.error(f"Error processing user {user_id}: {str(e)}")
+                    return {"user_id": user_id, "error": str(e)}
         
-        # Log results
-        for i, result in enumerate(results):
-            user_data = user_batch[i]
-            user_id = user_data["user"].id
-            
-            if isinstance(result, Exception):
-                self.logger.error(f"Error processing user {user_id}: {str(result)}")
-            else:
-                self.logger.info(f"Processed user {user_id}: {result}")
+        self.logger.info(f"Processed user {user_id}: {result}")
+        return result
     
     async def _process_single_user(self, db: AsyncSession, user_data: Dict[str, Any]) -> Dict[str, Any]:
         """Process job matching for a single user."""
@@ -195,14 +429,19 @@ class AutoApplicationScheduler:
             applications_created = 0
             notifications_sent = 0
             
-            for match in matches[:remaining_quota]:
+            # Generate application materials for all matches together: the
+            # profile and CV are loaded once and cover letters share prompts
+            selected_matches = matches[:remaining_quota]
+            generated_materials = await auto_application_service.generate_ai_applications(
+                db=db,
+                user_id=user.id,
+                jobs=[match["job"] for match in selected_matches]
+            )
+            
+            for match, application_materials in zip(selected_matches, generated_materials):
                 try:
-                    # Generate application materials
-                    application_materials = await auto_application_service.generate_ai_application(
-                        db=db,
-                        user_id=user.id,
-                        job_data=match["job"]
-                    )
+                    if isinstance(application_materials, Exception):
+                        raise application_materials
                     
                     # Create pending application
                     pending_app = await self._create_pending_application(
@@ -273,6 +512,10 @@ class AutoApplicationScheduler:
         """Create a pending auto-application record."""
         job = match["job"]
         
+        # Applications are recorded against the job's catalog row
+        if not job.get("catalog_id"):
+            return None
+        
         # Check if similar application already exists
         existing = await db.execute(
             select(PendingAutoApplication)
@@ -291,6 +534,7 @@ class AutoApplicationScheduler:
         
         pending_app = PendingAutoApplication(
             user_id=user_id,
+            job_listing_id=job.get("catalog_id"),
             external_job_id=job.get("id"),
             job_title=job.get("title", ""),
             company_name=job.get("company", ""),
@@ -357,6 +601,7 @@ class AutoApplicationScheduler:
             # Submit application
             job_data = {
                 "id": pending_app.external_job_id,
+                "catalog_id": pending_app.job_listing_id,
                 "title": pending_app.job_title,
                 "company": pending_app.company_name,
                 "url": pending_app.job_url,
@@ -395,7 +640,7 @@ class AutoApplicationScheduler:
         await db.execute(
             update(Profile)
             .where(Profile.user_id == user_id)
-            .values(last_job_scan_at=datetime.utcnow())
+            .values(last_job_scan_at=utc_now())
         )
         await db.commit()
     
@@ -441,12 +686,18 @@ class AutoApplicationScheduler:
         db.add(log_entry)
         await db.commit()
     
-    def _is_within_application_window(self, profile: Profile, current_time: datetime) -> bool:
-        """Check if current time is within user's preferred application window."""
-        # For now, always return True
-        # In a full implementation, you'd check auto_apply_window_start/end times
-        # and auto_apply_days from the extended settings
-        return True
+    def _application_window_clause(self, current_time: datetime):
+        """SQL condition: the current UTC time is inside the user's application window."""
+        now = current_time.time().replace(tzinfo=None)
+        start = Profile.auto_apply_window_start
+        end = Profile.auto_apply_window_end
+        return or_(
+            start.is_(None),
+            end.is_(None),
+            and_(start <= end, start <= now, now < end),
+            # Windows that wrap past midnight, e.g. 22:00-06:00
+            and_(start > end, or_(now >= start, now < end))
+        )
     
     # Manual trigger methods
     
@@ -476,7 +727,8 @@ class AutoApplicationScheduler:
                     "remaining_quota": user.profile.max_daily_auto_applications
                 }
                 
-                result = await self._process_single_user(db, user_data)
+                async with self._user_slots:
+                    result = await self._process_single_user(db, user_data)
                 return result
                 
             except Exception as e:
@@ -5,7 +5,7 @@ Automatically matches user profiles with job opportunities and applies on user's
 import asyncio
 import json
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Tuple, Union
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, or_, desc, update
 from sqlalchemy.orm import selectinload
@@ -23,9 +23,22 @@ from app.database.auto_application_models import (
 from app.services.ai_service import ai_service, AICoachingType
 from app.services.job_matching_service import job_matching_service
 from app.services.job_search_service import job_search_service
+from app.services.job_catalog_service import job_catalog_service
 from app.services.email_service import email_service
 from app.schemas.job_schemas import JobApplicationCreate
 
+# Fresh postings considered per auto-application run
+FRESH_JOB_LIMIT = 100
+# Jobs whose cover letters are requested together in one merged prompt
+COVER_LETTER_BATCH_SIZE = 3
+# Completion budget per cover letter in a merged request
+COVER_LETTER_MAX_TOKENS = 700
+
+COVER_LETTER_SYSTEM_PROMPT = """
+You are an expert career writer who drafts concise, specific cover letters for
+product and project management candidates. Follow the requested output format exactly.
+"""
+
 
 class AutoApplicationCriteria:
     """Criteria for auto-application matching."""
@@ -142,47 +155,80 @@ class AutoApplicationService:
         Returns:
             Generated application materials
         """
+        result = (await self.generate_ai_applications(db, user_id, [job_data]))[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+    
+    async def generate_ai_applications(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        jobs: List[Dict[str, Any]]
+    ) -> List[Union[Dict[str, Any], Exception]]:
+        """
+        Generate application materials for several jobs for the same user.
+        
+        The profile and CV are loaded once, cover letters are requested in
+        merged structured prompts of up to COVER_LETTER_BATCH_SIZE jobs, and the
+        prompts run concurrently (bounded per provider by the AI service).
+        
+        Args:
+            db: Database session
+            user_id: User ID
+            jobs: Job postings to generate materials for
+            
+        Returns:
+            One entry per job, in order: the generated materials or the
+            exception that prevented them
+        """
+        if not jobs:
+            return []
+        
         try:
-            # Get user's latest CV and profile
             user_profile = await self._get_comprehensive_user_profile(db, user_id)
             cv_data = await self._get_user_cv_data(db, user_id)
             
             if not cv_data:
                 raise ValueError("No CV found for user")
-            
-            # Generate customized cover letter using AI
-            cover_letter = await self._generate_ai_cover_letter(
-                user_profile=user_profile,
-                cv_data=cv_data,
-                job_data=job_data
-            )
-            
-            # Generate CV customizations
-            cv_customizations = await self._generate_cv_customizations(
-                cv_data=cv_data,
-                job_data=job_data
-            )
-            
-            # Generate application summary
-            application_summary = await self._generate_application_summary(
-                user_profile=user_profile,
-                job_data=job_data,
-                cover_letter=cover_letter
-            )
-            
-            return {
-                "cover_letter": cover_letter,
-                "cv_customizations": cv_customizations,
-                "application_summary": application_summary,
-                "generated_at": datetime.utcnow().isoformat(),
-                "confidence_score": self._calculate_application_confidence(
-                    user_profile, job_data
-                )
-            }
-            
         except Exception as e:
-            self.logger.error(f"Error generating AI application: {str(e)}")
-            raise
+            self.logger.error(f"Error generating AI applications: {str(e)}")
+            return [e for _ in jobs]
+        
+        groups = [
+            jobs[i:i + COVER_LETTER_BATCH_SIZE]
+            for i in range(0, len(jobs), COVER_LETTER_BATCH_SIZE)
+        ]
+        letter_groups = await asyncio.gather(
+            *[self._generate_ai_cover_letters(user_profile, cv_data, group) for group in groups],
+            return_exceptions=True
+        )
+        
+        results: List[Union[Dict[str, Any], Exception]] = []
+        for group, letters in zip(groups, letter_groups):
+            for position, job_data in enumerate(group):
+                if isinstance(letters, Exception):
+                    self.logger.error(f"Error generating AI application: {str(letters)}")
+                    results.append(letters)
+                    continue
+                results.append({
+                    "cover_letter": letters[position],
+                    "cv_customizations": await self._generate_cv_customizations(
+                        cv_data=cv_data,
+                        job_data=job_data
+                    ),
+                    "application_summary": await self._generate_application_summary(
+                        user_profile=user_profile,
+                        job_data=job_data,
+                        cover_letter=letters[position]
+                    ),
+                    "generated_at": datetime.utcnow().isoformat(),
+                    "confidence_score": self._calculate_application_confidence(
+                        user_profile, job_data
+                    )
+                })
+        
+        return results
     
     async def submit_auto_application(
         self,
@@ -215,7 +261,8 @@ class AutoApplicationService:
             # Create job application record
             job_application = JobApplication(
                 user_id=user_id,
-                job_listing_id=job_data.get("id"),
+                # Catalog row id, so _has_already_applied can join on it
+                job_listing_id=job_data["catalog_id"],
                 cover_letter=application_materials["cover_letter"],
                 cv_version_used="auto_generated",
                 customized_cv_content=application_materials["cv_customizations"],
@@ -375,6 +422,7 @@ class AutoApplicationService:
             # Prepare job data
             job_data = {
                 "id": pending_app.job_listing_id,
+                "catalog_id": pending_app.job_listing_id,
                 "external_id": pending_app.external_job_id,
                 "title": pending_app.job_title,
                 "company": pending_app.company_name,
@@ -603,40 +651,24 @@ class AutoApplicationService:
     ) -> List[Dict[str, Any]]:
         """Fetch fresh job postings from external sources."""
         try:
-            # Get fresh jobs from external APIs
-            fresh_jobs = await job_search_service.fetch_all_pm_jobs()
-            normalized_jobs = job_search_service.normalize_job_data(fresh_jobs)
-            
-            # Filter based on basic criteria
-            filtered_jobs = []
-            for job in normalized_jobs:
-                # Location filter
-                if criteria.preferred_locations:
-                    job_location = job.get("location", "").lower()
-                    if not any(loc.lower() in job_location for loc in criteria.preferred_locations):
-                        if not (criteria.remote_only and "remote" in job_location):
-                            continue
-                
-                # Remote filter
-                if criteria.remote_only:
-                    job_text = f"{job.get('title', '')} {job.get('description', '')} {job.get('location', '')}".lower()
-                    if "remote" not in job_text:
-                        continue
-                
-                # Salary filter
-                if criteria.salary_min and job.get("salary_min"):
-                    if job["salary_min"] < criteria.salary_min:
-                        continue
-                
-                # Excluded companies
-                if criteria.excluded_companies:
-                    company = job.get("company", "").lower()
-                    if any(exc.lower() in company for exc in criteria.excluded_companies):
-                        continue
-                
-                filtered_jobs.append(job)
+            # Filter and limit in the catalog query
+            catalog_filters = dict(
+                max_age_days=7,
+                limit=FRESH_JOB_LIMIT,
+                locations=criteria.preferred_locations,
+                remote_only=criteria.remote_only,
+                salary_min=criteria.salary_min,
+                excluded_companies=criteria.excluded_companies
+            )
+            catalog_jobs = await job_catalog_service.get_catalog_jobs(db, **catalog_filters)
+            if catalog_jobs or await job_catalog_service.get_catalog_jobs(db, max_age_days=7, limit=1):
+                return catalog_jobs
             
-            return filtered_jobs[:100]  # Limit for performance
+            # Until the first ingestion has populated the catalog, load the
+            # live feeds into it so every job has a catalog row to apply against
+            normalized_jobs = await job_search_service.get_normalized_jobs()
+            await job_catalog_service.upsert_jobs(db, normalized_jobs)
+            return await job_catalog_service.get_catalog_jobs(db, **catalog_filters)
             
         except Exception as e:
             self.logger.error(f"Error fetching fresh job postings: {str(e)}")
@@ -683,21 +715,41 @@ class AutoApplicationService:
         job_data: Dict[str, Any]
     ) -> bool:
         """Check if user has already applied to this job."""
-        # This is a simplified check - in practice, you'd need better job deduplication
+        source = job_data.get("source")
+        external_id = job_data.get("external_id")
+        
+        if source and external_id:
+            # Exact lookup through the job catalog's (source, external id) index
+            result = await db.execute(
+                select(JobApplication.id)
+                .join(JobListing)
+                .where(
+                    and_(
+                        JobApplication.user_id == user_id,
+                        JobListing.source_platform == source,
+                        JobListing.external_job_id == str(external_id)
+                    )
+                )
+                .limit(1)
+            )
+            return result.first() is not None
+        
+        # Jobs without a stable identity fall back to a fuzzy title/company match
         job_title = job_data.get("title", "")
         company = job_data.get("company", "")
         
         result = await db.execute(
-            select(JobApplication)
+            select(JobApplication.id)
             .join(JobListing)
             .where(
                 and_(
                     JobApplication.user_id == user_id,
                     JobListing.title.ilike(f"%{job_title}%"),
-                    JobListing.company.ilike(f"%{company}%"),
+                    JobListing.company_name.ilike(f"%{company}%"),
                     JobApplication.applied_at > datetime.utcnow() - timedelta(days=30)
                 )
             )
+            .limit(1)
         )
         
         return result.first() is not None
@@ -780,9 +832,9 @@ class AutoApplicationService:
         result = await db.execute(
             select(CV)
             .options(
-                selectinload(CV.experiences),
-                selectinload(CV.education),
-                selectinload(CV.skills)
+                selectinload(CV.work_experiences),
+                selectinload(CV.educations),
+                selectinload(CV.cv_skills)
             )
             .where(and_(CV.user_id == user_id, CV.is_default == True))
         )
@@ -794,7 +846,7 @@ class AutoApplicationService:
         return {
             "id": cv.id,
             "title": cv.title,
-            "summary": cv.summary,
+            "summary": cv.professional_summary,
             "experiences": [
                 {
                     "job_title": exp.job_title,
@@ -803,20 +855,111 @@ class AutoApplicationService:
                     "start_date": exp.start_date.isoformat() if exp.start_date else None,
                     "end_date": exp.end_date.isoformat() if exp.end_date else None
                 }
-                for exp in cv.experiences
+                for exp in cv.work_experiences
             ],
             "education": [
                 {
-                    "degree": edu.degree,
+                    "degree": edu.degree_type,
                     "field_of_study": edu.field_of_study,
-                    "institution": edu.institution,
-                    "graduation_date": edu.graduation_date.isoformat() if edu.graduation_date else None
+                    "institution": edu.institution_name,
+                    "graduation_date": edu.end_date.isoformat() if edu.end_date else None
                 }
-                for edu in cv.education
+                for edu in cv.educations
             ],
-            "skills": [skill.skill_name for skill in cv.skills]
+            "skills": [skill.skill_name for skill in cv.cv_skills]
         }
     
+    async def _generate_ai_cover_letters(
+        self,
+        user_profile: Dict[str, Any],
+        cv_data: Dict[str, Any],
+        jobs: List[Dict[str, Any]]
+    ) -> List[str]:
+        """Generate cover letters for several jobs with one merged AI request."""
+        if len(jobs) == 1:
+            return [await self._generate_ai_cover_letter(user_profile, cv_data, jobs[0])]
+        
+        job_sections = "\n".join(
+            f"""
+        [{number}]
+        - Title: {job_data.get('title', 'N/A')}
+        - Company: {job_data.get('company', 'N/A')}
+        - Description: {(job_data.get('description') or 'N/A')[:500]}..."""
+            for number, job_data in enumerate(jobs, start=1)
+        )
+        
+        prompt = f"""
+        Generate a separate professional cover letter for each of these job applications by the same candidate:
+        
+        Candidate Profile:
+        - Name: {user_profile.get('name', 'Candidate')}
+        - Current Role: {user_profile.get('current_job_title', 'N/A')}
+        - Experience: {user_profile.get('years_of_experience', 0)} years
+        - Key Skills: {', '.join(user_profile.get('skills', [])[:5])}
+        - Career Goals: {user_profile.get('career_goals', 'N/A')}
+        
+        Recent Experience:
+        {cv_data.get('experiences', [{}])[0].get('description', 'N/A') if cv_data.get('experiences') else 'N/A'}
+        
+        Jobs:
+        {job_sections}
+        
+        Write each cover letter so that it:
+        1. Shows enthusiasm for the specific role and company
+        2. Highlights relevant experience and skills
+        3. Demonstrates knowledge of the company/industry
+        4. Is professional yet personable
+        5. Is 3-4 paragraphs, not too long
+        6. Do not make it yappy or generic.
+        
+        Return only a JSON object mapping each job number to its cover letter text,
+        for example {{"1": "Dear ...", "2": "Dear ..."}}.
+        """
+        
+        letters: Dict[int, str] = {}
+        try:
+            response = await ai_service.generate_response(
+                prompt,
+                system_prompt=COVER_LETTER_SYSTEM_PROMPT,
+                max_tokens=COVER_LETTER_MAX_TOKENS * len(jobs)
+            )
+            letters = self._parse_batched_cover_letters(response, len(jobs))
+        except Exception as e:
+            self.logger.error(f"Error generating batched AI cover letters: {str(e)}")
+        
+        # Anything the merged response didn't cover is generated on its own
+        missing = [position for position in range(len(jobs)) if position not in letters]
+        if missing:
+            fallbacks = await asyncio.gather(*[
+                self._generate_ai_cover_letter(user_profile, cv_data, jobs[position])
+                for position in missing
+            ])
+            letters.update(zip(missing, fallbacks))
+        
+        return [letters[position] for position in range(len(jobs))]
+    
+    def _parse_batched_cover_letters(self, response: str, count: int) -> Dict[int, str]:
+        """Parse the JSON object of a merged cover letter response into positions."""
+        start = response.find("{")
+        end = response.rfind("}")
+        if start == -1 or end <= start:
+            return {}
+        
+        try:
+            data = json.loads(response[start:end + 1])
+        except ValueError:
+            return {}
+        
+        letters = {}
+        for key, letter in data.items():
+            try:
+                position = int(key) - 1
+            except (TypeError, ValueError):
+                continue
+            if 0 <= position < count and isinstance(letter, str) and letter.strip():
+                letters[position] = letter.strip()
+        return letters
+    
     async def _generate_ai_cover_letter(
         self,
         user_profile: Dict[str, Any],
@@ -998,7 +1141,7 @@ Best regards,
             # Create pending application record
             pending_app = PendingAutoApplication(
                 user_id=user_id,
-                job_listing_id=job_data.get("id"),
+                job_listing_id=job_data.get("catalog_id"),
                 external_job_id=job_data.get("external_id"),
                 job_title=job_data.get("title", ""),
                 company_name=job_data.get("company", ""),
@@ -0,0 +1,177 @@
+"""
+Badge rule engine.
+Compiles the ``criteria`` JSON of active badges into rules indexed by the
+activity type they listen to, so an activity event only evaluates the rules
+subscribed to it instead of checking every badge.
+
+Criteria format::
+
+    {
+        "activity_type": "complete_lesson",      # or a list of activity types
+        "target": 5,                             # matching events needed ("count" also accepted)
+        "conditions": {                          # optional, checked against event metadata
+            "quality_score": {"gte": 80},
+            "section": "experience"
+        }
+    }
+
+Badges whose criteria name no activity type are not indexed; they are still
+awarded explicitly through ``check_and_award_badge``.
+"""
+import asyncio
+import logging
+import operator
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.database.gamification_models import Badge
+
+logger = logging.getLogger(__name__)
+
+CONDITION_OPERATORS = {
+    "eq": operator.eq,
+    "ne": operator.ne,
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "lt": operator.lt,
+    "lte": operator.le,
+    "in": lambda value, options: value in options,
+}
+
+# Badge columns a compiled rule depends on; changes to others keep the index
+RULE_FIELDS = (
+    "slug", "name", "description", "rarity", "points_required",
+    "prerequisites", "criteria", "is_active",
+)
+
+
+@dataclass(frozen=True)
+class BadgeRule:
+    """A compiled badge criteria."""
+    badge_id: int
+    slug: str
+    name: str
+    description: str
+    rarity: str
+    points: int
+    target: int
+    prerequisites: Tuple[int, ...]
+    # (metadata key, operator name, expected value)
+    conditions: Tuple[Tuple[str, str, Any], ...]
+
+    def matches(self, metadata: Dict[str, Any]) -> bool:
+        """Whether an event's metadata satisfies every condition."""
+        for key, op_name, expected in self.conditions:
+            if key not in metadata:
+                return False
+            try:
+                if not CONDITION_OPERATORS[op_name](metadata[key], expected):
+                    return False
+            except TypeError:
+                return False
+        return True
+
+
+def compile_rule(badge: Badge) -> Tuple[Tuple[str, ...], Optional[BadgeRule]]:
+    """Compile a badge into (subscribed activity types, rule); no rule if it has none."""
+    criteria = badge.criteria if isinstance(badge.criteria, dict) else {}
+    activity_types = criteria.get("activity_type") or criteria.get("activity_types")
+    if not activity_types:
+        return (), None
+    if isinstance(activity_types, str):
+        activity_types = [activity_types]
+
+    conditions = []
+    for key, spec in (criteria.get("conditions") or {}).items():
+        if isinstance(spec, dict):
+            for op_name, expected in spec.items():
+                if op_name not in CONDITION_OPERATORS:
+                    raise ValueError(f"unknown operator {op_name!r} for {key!r}")
+                conditions.append((key, op_name, expected))
+        else:
+            conditions.append((key, "eq", spec))
+
+    target = criteria.get("target") or criteria.get("count") or 1
+    rule = BadgeRule(
+        badge_id=badge.id,
+        slug=badge.slug,
+        name=badge.name,
+        description=badge.description,
+        rarity=badge.rarity.value,
+        points=badge.points_required,
+        target=int(target),
+        prerequisites=tuple(badge.prerequisites or ()),
+        conditions=tuple(conditions),
+    )
+    return tuple(activity_types), rule
+
+
+class BadgeRuleIndex:
+    """
+    Active badge rules grouped by activity type.
+
+    The index is rebuilt from the badges table with one query the first time
+    it is used, after any badge change seen by this process and, to pick up
+    changes made by other workers, once ``refresh_seconds`` have passed.
+    """
+
+    def __init__(self, refresh_seconds: int):
+        self.refresh_seconds = refresh_seconds
+        self._rules: Dict[str, Tuple[BadgeRule, ...]] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    def invalidate(self) -> None:
+        self._loaded_at = None
+
+    async def rules_for(self, db: AsyncSession, activity_type: str) -> Tuple[BadgeRule, ...]:
+        """Rules subscribed to ``activity_type``."""
+        if self._is_stale():
+            async with self._lock:
+                if self._is_stale():
+                    await self._load(db)
+        return self._rules.get(activity_type, ())
+
+    def _is_stale(self) -> bool:
+        return (
+            self._loaded_at is None
+            or time.monotonic() - self._loaded_at >= self.refresh_seconds
+        )
+
+    async def _load(self, db: AsyncSession) -> None:
+        loaded_at = time.monotonic()
+        result = await db.execute(select(Badge).where(Badge.is_active == True))
+        rules: Dict[str, List[BadgeRule]] = {}
+        for badge in result.scalars().all():
+            try:
+                activity_types, rule = compile_rule(badge)
+            except (TypeError, ValueError) as e:
+                logger.warning(f"Skipping badge {badge.slug} with invalid criteria: {e}")
+                continue
+            for activity_type in activity_types:
+                rules.setdefault(activity_type, []).append(rule)
+        self._rules = {activity_type: tuple(group) for activity_type, group in rules.items()}
+        self._loaded_at = loaded_at
+
+
+# Global index shared by every GamificationService instance in the process
+badge_rule_index = BadgeRuleIndex(refresh_seconds=settings.badge_rules_refresh_seconds)
+
+
+@event.listens_for(Badge, "after_insert")
+@event.listens_for(Badge, "after_delete")
+def _invalidate_rules(mapper, connection, target: Badge) -> None:
+    badge_rule_index.invalidate()
+
+
+@event.listens_for(Badge, "after_update")
+def _invalidate_rules_on_change(mapper, connection, target: Badge) -> None:
+    # Earning a badge bumps total_earned; that must not rebuild the index
+    state = inspect(target)
+    if any(state.attrs[field].history.has_changes() for field in RULE_FIELDS):
+        badge_rule_index.invalidate()
@@ -0,0 +1,219 @@
+"""
+Dashboard aggregation service.
+Computes a user's dashboard statistics with SQL aggregates in a single
+statement and keeps the result in a short-lived per-user summary cache that
+is dropped whenever one of the underlying rows is written.
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import event, func, select, true
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.database.cv_models import CV, CVExport
+from app.database.job_models import JobApplication
+from app.database.platform_models import UserModuleProgress, UserAchievement, UserPoints
+from app.database.portfolio_models import Portfolio
+from app.database.project_models import ProjectSimulation, ProjectStatus
+from app.services.level_table import level_table
+
+ACTIVE_APPLICATION_STATUSES = ("applied", "interviewing")
+
+# Models whose rows feed the dashboard summary; writes to them invalidate it
+SUMMARY_SOURCE_MODELS = (
+    UserModuleProgress, ProjectSimulation, CV, CVExport,
+    JobApplication, Portfolio, UserAchievement, UserPoints
+)
+
+
+class DashboardService:
+    """Service for dashboard statistics."""
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._summaries: "OrderedDict[int, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+    async def get_overview_stats(self, db: AsyncSession, user_id: int) -> Dict[str, Any]:
+        """Aggregated dashboard statistics for a user, served from cache when fresh."""
+        summary = self._get_cached(user_id)
+        if summary is None:
+            summary = await self._aggregate(db, user_id)
+            self._set_cached(user_id, summary)
+        return summary
+
+    def invalidate(self, user_id: Optional[int]) -> None:
+        """Drop a user's cached summary."""
+        self._summaries.pop(user_id, None)
+
+    def clear(self) -> None:
+        self._summaries.clear()
+
+    async def _aggregate(self, db: AsyncSession, user_id: int) -> Dict[str, Any]:
+        """Run every dashboard aggregate in one round trip."""
+        # Each CTE is an aggregate without GROUP BY, so it yields exactly one
+        # row even for users with no history and the cross join stays 1 row.
+        learning = (
+            select(
+                func.count().label("modules_started"),
+                func.count().filter(UserModuleProgress.is_completed.is_(True)).label("modules_completed"),
+                func.coalesce(func.sum(UserModuleProgress.time_spent_minutes), 0).label("learning_minutes"),
+            )
+            .where(UserModuleProgress.user_id == user_id)
+            .cte("learning")
+        )
+
+        completed = ProjectSimulation.status == ProjectStatus.COMPLETED
+        simulations = (
+            select(
+                func.count().label("total_simulations"),
+                func.count().filter(completed).label("completed_simulations"),
+                func.avg(ProjectSimulation.ai_feedback_score).filter(completed).label("average_score"),
+                func.count(ProjectSimulation.industry_track_id.distinct()).label("industries_experienced"),
+            )
+            .where(ProjectSimulation.user_id == user_id)
+            .cte("simulations")
+        )
+        current_simulation = (
+            select(ProjectSimulation.title)
+            .where(ProjectSimulation.user_id == user_id, ~completed)
+            .order_by(ProjectSimulation.id.desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+
+        applications = (
+            select(
+                func.count().label("total_applications"),
+                func.count().filter(
+                    JobApplication.status.in_(ACTIVE_APPLICATION_STATUSES)
+                ).label("active_applications"),
+                func.count().filter(JobApplication.status == "saved").label("saved_jobs"),
+            )
+            .where(JobApplication.user_id == user_id)
+            .cte("applications")
+        )
+
+        portfolios = (
+            select(
+                func.count().label("total_portfolios"),
+                func.coalesce(func.sum(Portfolio.view_count), 0).label("portfolio_views"),
+                func.count().filter(Portfolio.is_public.is_(True)).label("public_portfolios"),
+            )
+            .where(Portfolio.user_id == user_id)
+            .cte("portfolios")
+        )
+        cvs = select(func.count().label("cv_count")).where(CV.user_id == user_id).cte("cvs")
+        cv_exports = (
+            select(func.count().label("cv_downloads"))
+            .where(CVExport.user_id == user_id)
+            .cte("cv_exports")
+        )
+        achievements = (
+            select(func.count().label("achievements_earned"))
+            .where(UserAchievement.user_id == user_id)
+            .cte("achievements")
+        )
+        # user_id is unique, so max() just reads the single row (or NULLs)
+        points = (
+            select(
+                func.max(UserPoints.total_points).label("total_points"),
+                func.max(UserPoints.current_level).label("current_level"),
+                func.max(UserPoints.current_streak).label("current_streak"),
+            )
+            .where(UserPoints.user_id == user_id)
+            .cte("points")
+        )
+
+        parts = [learning, simulations, applications, portfolios, cvs, cv_exports, achievements, points]
+        source = parts[0]
+        for part in parts[1:]:
+            source = source.join(part, true())
+
+        result = await db.execute(
+            select(*[column for part in parts for column in part.c], current_simulation.label("current_simulation"))
+            .select_from(source)
+        )
+        row = result.one()._mapping
+
+        modules_started = row["modules_started"]
+        modules_completed = row["modules_completed"]
+        average_score = row["average_score"]
+        total_points = row["total_points"] if row["total_points"] is not None else 0
+        current_level = row["current_level"] if row["current_level"] is not None else 1
+
+        return {
+            "learning_progress": {
+                "modules_started": modules_started,
+                "modules_completed": modules_completed,
+                "completion_rate": (modules_completed / modules_started * 100) if modules_started else 0,
+                "total_learning_hours": round(row["learning_minutes"] / 60, 1),
+            },
+            "simulation_stats": {
+                "total_simulations": row["total_simulations"],
+                "completed_simulations": row["completed_simulations"],
+                "average_score": round(float(average_score), 1) if average_score is not None else None,
+                "industries_experienced": row["industries_experienced"],
+                "current_simulation": row["current_simulation"],
+            },
+            "job_search_stats": {
+                "total_applications": row["total_applications"],
+                "active_applications": row["active_applications"],
+                "saved_jobs": row["saved_jobs"],
+            },
+            "portfolio_stats": {
+                "total_portfolios": row["total_portfolios"],
+                "total_views": row["portfolio_views"],
+                "public_portfolios": row["public_portfolios"],
+                "cv_count": row["cv_count"],
+                # CVs have no view tracking; exports are the download count
+                "cv_views": 0,
+                "cv_downloads": row["cv_downloads"],
+            },
+            "gamification_stats": {
+                "total_points": total_points,
+                "current_level": current_level,
+                "points_to_next_level": level_table.points_to_next_level(total_points, current_level),
+                "next_level_progress": level_table.progress_percent(total_points, current_level),
+                "achievements_earned": row["achievements_earned"],
+                "current_streak": row["current_streak"] if row["current_streak"] is not None else 0,
+            },
+        }
+
+    def _get_cached(self, user_id: int) -> Optional[Dict[str, Any]]:
+        entry = self._summaries.get(user_id)
+        if entry is None:
+            return None
+        expires_at, summary = entry
+        if expires_at <= time.monotonic():
+            self._summaries.pop(user_id, None)
+            return None
+        self._summaries.move_to_end(user_id)
+        return summary
+
+    def _set_cached(self, user_id: int, summary: Dict[str, Any]) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        self._summaries[user_id] = (time.monotonic() + self.ttl_seconds, summary)
+        self._summaries.move_to_end(user_id)
+        while len(self._summaries) > self.max_entries:
+            self._summaries.popitem(last=False)
+
+
+# Global dashboard service instance
+dashboard_service = DashboardService(
+    ttl_seconds=settings.dashboard_summary_cache_ttl_seconds,
+    max_entries=settings.dashboard_summary_cache_max_entries
+)
+
+
+# ORM writes invalidate on flush; bulk statements fall back to the TTL
+def _invalidate_summary(mapper, connection, target) -> None:
+    dashboard_service.invalidate(target.user_id)
+
+
+for _model in SUMMARY_SOURCE_MODELS:
+    for _event_name in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _event_name, _invalidate_summary)
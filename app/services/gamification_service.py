@@ -2,10 +2,14 @@
 Comprehensive gamification service for TURN platform.
 Handles badges, challenges, streaks, points, leaderboards, and user progression.
 """
+import base64
 from datetime import datetime, date, timedelta, timezone
 from typing import List, Optional, Dict, Any, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, and_, or_, func, desc, asc
+from sqlalchemy import (
+    select, update, and_, or_, func, desc, asc, values, column, Integer, String,
+    literal_column, null, tuple_, union_all
+)
 from sqlalchemy.orm import selectinload
 
 from app.database.gamification_models import (
@@ -14,6 +18,7 @@ from app.database.gamification_models import (
     BadgeType, BadgeRarity, ChallengeType, ChallengeStatus, StreakType
 )
 from app.database.platform_models import UserPoints
+from app.database.user_models import User
 from app.schemas.gamification_schemas import (
     BadgeResponse, UserBadgeResponse, BadgeProgressResponse,
     ChallengeResponse, ChallengeParticipationResponse, StreakResponse,
@@ -21,6 +26,14 @@ from app.schemas.gamification_schemas import (
     GamificationStatsResponse, WeeklyChallengesSummary,
     ActivityFeedItem, ActivityFeedResponse
 )
+from app.services.badge_rules import BadgeRule, badge_rule_index
+from app.services.dashboard_service import dashboard_service
+from app.services.gamification_summary import gamification_summary
+from app.services.leaderboard_engine import leaderboard_engine
+from app.services.points_ledger import PointEvent, points_ledger
+from app.services.level_table import level_table
+from app.core.logger import logger
+from app.core.utils import utc_now
 
 
 class GamificationService:
@@ -43,7 +56,7 @@ class GamificationService:
     # XP calculation
     def calculate_xp_for_level(self, level: int) -> int:
         """Calculate total XP required to reach a specific level."""
-        return level * 100 + (level - 1) * 50  # Progressive XP requirement
+        return level_table.xp_for_level(level)
     
     async def initialize_user_gamification(
         self,
@@ -144,42 +157,43 @@ class GamificationService:
             if points_to_award <= 0:
                 return 0, False
             
-            # Get user points record
-            result = await db.execute(
-                select(UserPoints).where(UserPoints.user_id == user_id)
-            )
-            user_points = result.scalar_one_or_none()
-            
-            if not user_points:
-                await self.initialize_user_gamification(db, user_id)
-                result = await db.execute(
-                    select(UserPoints).where(UserPoints.user_id == user_id)
-                )
-                user_points = result.scalar_one()
-            
-            # Record the transaction
-            transaction = PointTransaction(
-                user_id=user_id,
-                transaction_type="earned",
+            # Queue the transaction in the points ledger
+            event = PointEvent(
                 points=points_to_award,
                 source_type=activity_type,
                 source_id=source_id,
-                description=description or f"Points for {activity_type}",
-                balance_before=user_points.total_points,
-                balance_after=user_points.total_points + points_to_award
+                description=description or f"Points for {activity_type}"
             )
-            db.add(transaction)
-            
-            # Update user points
-            old_level = user_points.current_level
-            user_points.total_points += points_to_award
-            user_points.available_points += points_to_award
-            user_points.lifetime_points += points_to_award
+            pending = await points_ledger.record(db, user_id, event)
             
-            # Check for level up
-            level_up = await self._check_level_progression(db, user_id, user_points)
+            if pending is None:
+                await self.initialize_user_gamification(db, user_id)
+                pending = await points_ledger.record(db, user_id, event)
+            
+            # Apply now only when the balance crosses a level threshold, so the
+            # level rows move together with the points; otherwise the ledger flushes
+            stored_total, stored_level, pending_delta = pending
+            level_up = False
+            if (points_ledger.write_through
+                    or stored_total + pending_delta >= self.calculate_xp_for_level(stored_level + 1)):
+                # The awards stay queued until this commit succeeds
+                async with points_ledger.applying(db, [user_id]):
+                    result = await db.execute(
+                        select(UserPoints)
+                        .where(UserPoints.user_id == user_id)
+                        .execution_options(populate_existing=True)
+                    )
+                    user_points = result.scalar_one()
+                    
+                    # Check for level up
+                    level_up = await self._check_level_progression(db, user_id, user_points)
+                    
+                    await db.commit()
             
-            await db.commit()
+            try:
+                await leaderboard_engine.record_points(db, user_id, points_to_award)
+            except Exception as e:
+                logger.error(f"Failed to update leaderboards for user {user_id}: {e}")
             
             return points_to_award, level_up
             
@@ -194,18 +208,14 @@ class GamificationService:
         user_points: UserPoints
     ) -> bool:
         """Check and update user level progression."""
-        current_level = user_points.current_level
-        required_points = self.calculate_xp_for_level(current_level + 1)
-        
-        level_up = False
-        while user_points.total_points >= required_points:
-            current_level += 1
-            level_up = True
-            required_points = self.calculate_xp_for_level(current_level + 1)
+        current_level = level_table.level_for_points(user_points.total_points, user_points.current_level)
+        level_up = current_level > user_points.current_level
         
         if level_up:
             user_points.current_level = current_level
-            user_points.points_to_next_level = required_points - user_points.total_points
+            user_points.points_to_next_level = level_table.points_to_next_level(
+                user_points.total_points, current_level
+            )
             
             # Update UserLevel record
             result = await db.execute(
@@ -227,20 +237,7 @@ class GamificationService:
     
     def _get_title_for_level(self, level: int) -> str:
         """Get title based on user level."""
-        if level >= 50:
-            return "PM Master"
-        elif level >= 40:
-            return "Senior PM"
-        elif level >= 30:
-            return "Project Manager"
-        elif level >= 20:
-            return "Junior PM"
-        elif level >= 10:
-            return "PM Associate"
-        elif level >= 5:
-            return "PM Trainee"
-        else:
-            return "Aspiring PM"
+        return level_table.title_for_level(level)
     
     async def update_streak(
         self,
@@ -320,6 +317,13 @@ class GamificationService:
             
             await db.commit()
             
+            try:
+                await leaderboard_engine.record_streak(
+                    db, user_id, streak_type, user_streak.current_streak
+                )
+            except Exception as e:
+                logger.error(f"Failed to update streak leaderboard for user {user_id}: {e}")
+            
             return {
                 "streak_type": streak_type.value,
                 "current_streak": user_streak.current_streak,
@@ -394,6 +398,11 @@ class GamificationService:
                     
                     await db.commit()
                     
+                    try:
+                        await leaderboard_engine.record_badge(db, user_id)
+                    except Exception as e:
+                        logger.error(f"Failed to update badge leaderboard for user {user_id}: {e}")
+                    
                     return {
                         "badge_earned": True,
                         "badge_name": badge.name,
@@ -559,86 +568,84 @@ class GamificationService:
     ) -> GamificationStatsResponse:
         """Get comprehensive gamification stats for a user."""
         try:
-            # Get user points and level
-            points_result = await db.execute(
-                select(UserPoints).where(UserPoints.user_id == user_id)
-            )
-            user_points = points_result.scalar_one_or_none()
+            await points_ledger.flush(db, [user_id])
             
-            level_result = await db.execute(
-                select(UserLevel).where(UserLevel.user_id == user_id)
-            )
-            user_level = level_result.scalar_one_or_none()
+            cached = gamification_summary.get(user_id, "stats")
+            if cached is not None:
+                return cached
+            
+            # Get user points and level
+            points_query = select(UserPoints, UserLevel).outerjoin(
+                UserLevel, UserLevel.user_id == UserPoints.user_id
+            ).where(UserPoints.user_id == user_id)
+            row = (await db.execute(points_query)).one_or_none()
             
             # Auto-initialize if user doesn't have gamification data
-            if not user_points or not user_level:
+            if not row or row[1] is None:
                 await self.initialize_user_gamification(db, user_id)
                 # Re-fetch after initialization
-                points_result = await db.execute(
-                    select(UserPoints).where(UserPoints.user_id == user_id)
-                )
-                user_points = points_result.scalar_one()
-                
-                level_result = await db.execute(
-                    select(UserLevel).where(UserLevel.user_id == user_id)
-                )
-                user_level = level_result.scalar_one()
+                row = (await db.execute(points_query)).one()
+            user_points, user_level = row
             
-            # Get badges
+            # Count earned badges per rarity
             badges_result = await db.execute(
-                select(UserBadge)
-                .options(selectinload(UserBadge.badge))
+                select(Badge.rarity, func.count(UserBadge.id))
+                .join(Badge, Badge.id == UserBadge.badge_id)
                 .where(
                     and_(
                         UserBadge.user_id == user_id,
                         UserBadge.is_completed == True
                     )
                 )
+                .group_by(Badge.rarity)
             )
-            earned_badges = badges_result.scalars().all()
+            badge_counts = dict(badges_result.all())
             
             # Get streaks
             streaks_result = await db.execute(
-                select(UserStreak).where(UserStreak.user_id == user_id)
+                select(UserStreak.streak_type, UserStreak.current_streak, UserStreak.longest_streak)
+                .where(UserStreak.user_id == user_id)
             )
-            streaks = streaks_result.scalars().all()
+            streaks = streaks_result.all()
             
-            # Get active challenges
-            challenges_result = await db.execute(
-                select(GameChallengeParticipation)
-                .options(selectinload(GameChallengeParticipation.challenge))
-                .where(
+            # Count active challenges
+            active_challenges_count = await db.scalar(
+                select(func.count(GameChallengeParticipation.id)).where(
                     and_(
                         GameChallengeParticipation.user_id == user_id,
                         GameChallengeParticipation.is_completed == False
                     )
                 )
             )
-            active_challenges = challenges_result.scalars().all()
             
-            return GamificationStatsResponse(
+            stats = GamificationStatsResponse(
                 user_id=user_id,
-                total_points=user_points.total_points if user_points else 0,
-                available_points=user_points.available_points if user_points else 0,
-                current_level=user_level.current_level if user_level else 1,
-                current_title=user_level.current_title if user_level else "Aspiring PM",
-                xp_to_next_level=user_level.xp_to_next_level if user_level else 100,
-                total_badges=len(earned_badges),
+                total_points=user_points.total_points,
+                available_points=user_points.available_points,
+                current_level=user_level.current_level,
+                current_title=user_level.current_title,
+                xp_to_next_level=level_table.points_to_next_level(
+                    user_points.total_points, user_level.current_level
+                ),
+                total_badges=sum(badge_counts.values()),
                 badges_by_rarity={
-                    rarity.value: len([b for b in earned_badges if b.badge.rarity == rarity])
+                    rarity.value: badge_counts.get(rarity, 0)
                     for rarity in BadgeRarity
                 },
                 current_streaks={
-                    streak.streak_type.value: streak.current_streak 
-                    for streak in streaks
+                    streak_type.value: current_streak
+                    for streak_type, current_streak, _ in streaks
                 },
                 longest_streaks={
-                    streak.streak_type.value: streak.longest_streak 
-                    for streak in streaks
+                    streak_type.value: longest_streak
+                    for streak_type, _, longest_streak in streaks
                 },
-                active_challenges_count=len(active_challenges),
-                last_activity=user_points.last_activity_date if user_points else None
+                active_challenges_count=active_challenges_count or 0,
+                last_activity=user_points.last_activity_date
             )
+            gamification_summary.put(user_id, "stats", stats)
+            
+            return stats
             
         except Exception as e:
             raise e
@@ -941,6 +948,8 @@ class GamificationService:
     ) -> List[PointTransactionResponse]:
         """Get user's point transaction history."""
         try:
+            await points_ledger.flush(db, [user_id])
+            
             query = select(PointTransaction).where(
                 PointTransaction.user_id == user_id
             )
@@ -983,6 +992,17 @@ class GamificationService:
     ) -> List[Dict[str, Any]]:
         """Get leaderboard entries with user details."""
         try:
+            leaderboard = await db.get(Leaderboard, leaderboard_id)
+            if not leaderboard:
+                return []
+            
+            # Live ranks from the ranking engine; stored snapshots otherwise
+            if leaderboard_engine.supports(leaderboard.metric_type):
+                rows = await leaderboard_engine.get_page(
+                    db, leaderboard.metric_type, leaderboard.time_period, skip, limit
+                )
+                return await self._live_leaderboard_entries(db, leaderboard, rows)
+            
             query = select(LeaderboardEntry).options(
                 selectinload(LeaderboardEntry.user)
             ).where(
@@ -992,17 +1012,7 @@ class GamificationService:
             result = await db.execute(query)
             entries = result.scalars().all()
             
-            return [
-                {
-                    "rank": entry.rank,
-                    "user_id": entry.user_id,
-                    "username": entry.user.username if entry.user else "Unknown",
-                    "score": entry.score,
-                    "points": entry.points,
-                    "level": entry.level
-                }
-                for entry in entries
-            ]
+            return [self._stored_leaderboard_entry(entry) for entry in entries]
             
         except Exception as e:
             raise e
@@ -1015,6 +1025,20 @@ class GamificationService:
     ) -> Optional[Dict[str, Any]]:
         """Get user's position in a specific leaderboard."""
         try:
+            leaderboard = await db.get(Leaderboard, leaderboard_id)
+            if not leaderboard:
+                return None
+            
+            if leaderboard_engine.supports(leaderboard.metric_type):
+                position = await leaderboard_engine.get_position(
+                    db, leaderboard.metric_type, leaderboard.time_period, user_id
+                )
+                if position is None:
+                    return None
+                rank, score = position
+                entries = await self._live_leaderboard_entries(db, leaderboard, [(rank, user_id, score)])
+                return entries[0] if entries else None
+            
             result = await db.execute(
                 select(LeaderboardEntry).options(
                     selectinload(LeaderboardEntry.user)
@@ -1030,18 +1054,69 @@ class GamificationService:
             if not entry:
                 return None
             
-            return {
-                "rank": entry.rank,
-                "user_id": entry.user_id,
-                "username": entry.user.username if entry.user else "Unknown",
-                "score": entry.score,
-                "points": entry.points,
-                "level": entry.level
-            }
+            return self._stored_leaderboard_entry(entry)
             
         except Exception as e:
             raise e
     
+    async def _live_leaderboard_entries(
+        self,
+        db: AsyncSession,
+        leaderboard: Leaderboard,
+        rows: List[Tuple[int, int, float]]
+    ) -> List[Dict[str, Any]]:
+        """Attach usernames and last snapshot ranks to live (rank, user_id, score) rows."""
+        if not rows:
+            return []
+        
+        user_ids = [user_id for _, user_id, _ in rows]
+        result = await db.execute(
+            select(User.id, User.username, LeaderboardEntry)
+            .outerjoin(
+                LeaderboardEntry,
+                and_(
+                    LeaderboardEntry.user_id == User.id,
+                    LeaderboardEntry.leaderboard_id == leaderboard.id
+                )
+            )
+            .where(User.id.in_(user_ids))
+        )
+        details = {user_id: (username, entry) for user_id, username, entry in result.all()}
+        
+        entries = []
+        for rank, user_id, score in rows:
+            username, snapshot = details.get(user_id, ("Unknown", None))
+            previous_rank = snapshot.rank if snapshot else None
+            entries.append({
+                "id": snapshot.id if snapshot else None,
+                "leaderboard_id": leaderboard.id,
+                "user_id": user_id,
+                "rank": rank,
+                "score": score,
+                "previous_rank": previous_rank,
+                "rank_change": (previous_rank - rank) if previous_rank else 0,
+                "created_at": snapshot.created_at if snapshot else None,
+                "updated_at": snapshot.updated_at if snapshot else None,
+                "user_name": username
+            })
+        return entries
+    
+    def _stored_leaderboard_entry(self, entry: LeaderboardEntry) -> Dict[str, Any]:
+        """Leaderboard entry from the last flushed snapshot."""
+        return {
+            "id": entry.id,
+            "leaderboard_id": entry.leaderboard_id,
+            "user_id": entry.user_id,
+            "rank": entry.rank,
+            "score": entry.score,
+            "previous_rank": entry.previous_rank,
+            "rank_change": entry.rank_change,
+            "additional_metrics": entry.additional_metrics,
+            "created_at": entry.created_at,
+            "updated_at": entry.updated_at,
+            "user_name": entry.user.username if entry.user else "Unknown"
+        }
+    
     async def get_user_level(
         self,
         db: AsyncSession,
@@ -1049,18 +1124,109 @@ class GamificationService:
     ) -> Optional[UserLevelResponse]:
         """Get user's current level and progression."""
         try:
+            await points_ledger.flush(db, [user_id])
+            
             result = await db.execute(
-                select(UserLevel).where(UserLevel.user_id == user_id)
+                select(UserLevel, UserPoints.total_points)
+                .outerjoin(UserPoints, UserPoints.user_id == UserLevel.user_id)
+                .where(UserLevel.user_id == user_id)
             )
-            user_level = result.scalar_one_or_none()
+            row = result.one_or_none()
             
-            if user_level:
-                return UserLevelResponse.model_validate(user_level)
-            return None
+            if not row:
+                return None
+            
+            # Progress fields come from the level table so they match the current curve
+            user_level, total_points = row
+            response = UserLevelResponse.model_validate(user_level)
+            if total_points is None:
+                return response
+            level = response.current_level
+            return response.model_copy(update={
+                "total_xp": total_points,
+                "current_xp": total_points - (level_table.xp_for_level(level) if level > 1 else 0),
+                "xp_to_next_level": level_table.points_to_next_level(total_points, level),
+                "current_title": level_table.title_for_level(level)
+            })
             
         except Exception as e:
             raise e
     
+    async def recompute_all_levels(self, db: AsyncSession) -> int:
+        """
+        Recompute every user's level from their points after an XP curve change.
+        
+        Levels are assigned in one set-based statement by range-joining point
+        totals against the level table; returns the number of users updated.
+        """
+        try:
+            await points_ledger.flush_all()
+            
+            max_points = await db.scalar(select(func.max(UserPoints.total_points)))
+            if max_points is None:
+                return 0
+            
+            levels = values(
+                column("level", Integer),
+                column("min_points", Integer),
+                column("next_points", Integer),
+                column("title", String),
+                name="levels",
+                literal_binds=True  # one row per level; keeps bind count flat
+            ).data(level_table.rows(max_points))
+            
+            points_table = UserPoints.__table__
+            levels_table = UserLevel.__table__
+            computed = (
+                select(
+                    points_table.c.user_id,
+                    points_table.c.total_points,
+                    levels.c.level,
+                    levels.c.next_points,
+                    levels.c.title
+                )
+                .join(levels, and_(
+                    points_table.c.total_points >= levels.c.min_points,
+                    points_table.c.total_points < levels.c.next_points
+                ))
+                .cte("computed")
+            )
+            points_update = (
+                update(points_table)
+                .where(points_table.c.user_id == computed.c.user_id)
+                .values(
+                    current_level=computed.c.level,
+                    points_to_next_level=computed.c.next_points - computed.c.total_points,
+                    updated_at=func.now()
+                )
+                .returning(points_table.c.user_id)
+                .cte("points_update")
+            )
+            # Postgres runs the data-modifying CTE as part of this statement
+            levels_update = (
+                update(levels_table)
+                .where(levels_table.c.user_id == computed.c.user_id)
+                .values(
+                    current_level=computed.c.level,
+                    total_xp=computed.c.total_points,
+                    xp_to_next_level=computed.c.next_points - computed.c.total_points,
+                    current_title=computed.c.title,
+                    updated_at=func.now()
+                )
+                .add_cte(points_update)
+            )
+            
+            result = await db.execute(levels_update)
+            await db.commit()
+            dashboard_service.clear()
+            gamification_summary.clear()
+            
+            return result.rowcount
+            
+        except Exception as e:
+            await db.rollback()
+            raise e
+    
     async def create_badge(
         self,
         db: AsyncSession,
@@ -1172,6 +1338,8 @@ class GamificationService:
     ) -> Dict[str, Any]:
         """Get basic user stats (points balance)."""
         try:
+            await points_ledger.flush(db, [user_id])
+            
             result = await db.execute(
                 select(UserPoints).where(UserPoints.user_id == user_id)
             )
@@ -1220,6 +1388,8 @@ class GamificationService:
     ):
         """Update user level based on current points."""
         try:
+            await points_ledger.flush(db, [user_id])
+            
             # Get user points
             result = await db.execute(
                 select(UserPoints).where(UserPoints.user_id == user_id)
@@ -1249,19 +1419,36 @@ class GamificationService:
     ) -> Dict[str, Any]:
         """Get gamification dashboard data."""
         try:
-            # Get comprehensive stats
-            stats = await self.get_user_gamification_stats(db, user_id)
+            await points_ledger.flush(db, [user_id])
             
-            # Get recent challenges
-            challenges = await self.get_challenges(db, limit=5, status=ChallengeStatus.ACTIVE)
+            # Active challenges are the same for every user
+            challenges = gamification_summary.get_shared("featured_challenges")
+            if challenges is None:
+                challenges = await self.get_challenges(db, limit=5, status=ChallengeStatus.ACTIVE)
+                gamification_summary.put_shared("featured_challenges", challenges)
             
-            # Get user participations
-            participations = await self.get_user_challenge_participations(
-                db, user_id, completed_only=False
-            )
+            dashboard = gamification_summary.get(user_id, "dashboard")
+            if dashboard is None:
+                dashboard = await self._build_user_dashboard(db, user_id)
+                gamification_summary.put(user_id, "dashboard", dashboard)
+            
+            return {**dashboard, "featured_challenges": challenges[:3]}
+            
+        except Exception as e:
+            raise e
+    
+    async def _build_user_dashboard(
+        self,
+        db: AsyncSession,
+        user_id: int
+    ) -> Dict[str, Any]:
+        """Per-user part of the gamification dashboard."""
+        try:
+            # Get comprehensive stats
+            stats = await self.get_user_gamification_stats(db, user_id)
             
             # Get recent transactions
-            transactions = await self.get_point_transactions(db, user_id, limit=10)
+            transactions = await self.get_point_transactions(db, user_id, limit=5)
             
             # Calculate upcoming milestones
             current_level = stats.current_level
@@ -1334,8 +1521,7 @@ class GamificationService:
             
             return {
                 "user_stats": stats,
-                "featured_challenges": challenges[:3],
-                "recent_activities": transactions[:5],
+                "recent_activities": transactions,
                 "upcoming_milestones": upcoming_milestones[:5],
                 "suggested_actions": suggested_actions[:4]
             }
@@ -1349,73 +1535,142 @@ class GamificationService:
         user_id: int,
         skip: int = 0,
         limit: int = 50,
-        activity_type: Optional[str] = None
+        activity_type: Optional[str] = None,
+        cursor: Optional[str] = None
     ) -> ActivityFeedResponse:
-        """Get user's gamification activity feed."""
+        """
+        Get user's gamification activity feed.
+        
+        Point transactions and earned badges are merged, ordered and paged by
+        one UNION query. Pass the previous page's ``next_cursor`` to page by
+        keyset; ``skip`` is only used for the first request.
+        """
         try:
-            # Get point transactions as activity feed
-            transactions = await self.get_point_transactions(
-                db, user_id, skip, limit, activity_type
-            )
-            
-            # Get recently earned badges
-            badges_result = await db.execute(
-                select(UserBadge).options(
-                    selectinload(UserBadge.badge)
-                ).where(
-                    and_(
-                        UserBadge.user_id == user_id,
-                        UserBadge.is_completed == True
+            await points_ledger.flush(db, [user_id])
+            
+            branches = []
+            if activity_type != "badge_earned":
+                transactions = select(
+                    literal_column("'transaction'").label("kind"),
+                    PointTransaction.id.label("item_id"),
+                    PointTransaction.created_at.label("occurred_at"),
+                    PointTransaction.source_type.label("activity_type"),
+                    PointTransaction.points.label("points"),
+                    null().label("title"),
+                    PointTransaction.description.label("description"),
+                    PointTransaction.source_id.label("source_id"),
+                    PointTransaction.balance_before.label("balance_before"),
+                    PointTransaction.balance_after.label("balance_after"),
+                    null().label("badge_id")
+                ).where(PointTransaction.user_id == user_id)
+                if activity_type:
+                    transactions = transactions.where(PointTransaction.source_type == activity_type)
+                branches.append(transactions)
+            if not activity_type or activity_type == "badge_earned":
+                branches.append(
+                    select(
+                        literal_column("'badge'").label("kind"),
+                        UserBadge.id.label("item_id"),
+                        func.coalesce(UserBadge.earned_at, UserBadge.updated_at).label("occurred_at"),
+                        literal_column("'badge_earned'").label("activity_type"),
+                        UserBadge.points_earned.label("points"),
+                        Badge.name.label("title"),
+                        Badge.description.label("description"),
+                        null().label("source_id"),
+                        null().label("balance_before"),
+                        null().label("balance_after"),
+                        UserBadge.badge_id.label("badge_id")
+                    )
+                    .join(Badge, Badge.id == UserBadge.badge_id)
+                    .where(
+                        and_(
+                            UserBadge.user_id == user_id,
+                            UserBadge.is_completed == True
+                        )
                     )
-                ).order_by(desc(UserBadge.earned_at)).limit(10)
-            )
-            recent_badges = badges_result.scalars().all()
-            
-            activities = [
-                ActivityFeedItem(
-                    id=f"transaction-{transaction.id}",
-                    activity_type=transaction.source_type,
-                    title=f"Points Earned: {transaction.points}",
-                    description=transaction.description,
-                    points_earned=transaction.points,
-                    badge_earned=None,
-                    timestamp=transaction.created_at,
-                    metadata={
-                        "source_id": transaction.source_id,
-                        "balance_before": transaction.balance_before,
-                        "balance_after": transaction.balance_after
-                    }
                 )
-                for transaction in transactions
-            ]
-
-            activities.extend(
-                ActivityFeedItem(
-                    id=f"badge-{user_badge.id}",
-                    activity_type="badge_earned",
-                    title=f"Badge Earned: {user_badge.badge.name}",
-                    description=user_badge.badge.description,
-                    points_earned=user_badge.points_earned,
-                    badge_earned=BadgeResponse.model_validate(user_badge.badge),
-                    timestamp=user_badge.earned_at or user_badge.updated_at,
-                    metadata={"rarity": user_badge.badge.rarity.value}
+            
+            feed = (union_all(*branches) if len(branches) > 1 else branches[0]).subquery("feed")
+            query = select(feed).order_by(
+                desc(feed.c.occurred_at), desc(feed.c.kind), desc(feed.c.item_id)
+            ).limit(limit + 1)
+            if cursor:
+                occurred_at, kind, item_id = self._decode_feed_cursor(cursor)
+                query = query.where(
+                    tuple_(feed.c.occurred_at, feed.c.kind, feed.c.item_id) < tuple_(occurred_at, kind, item_id)
                 )
-                for user_badge in recent_badges
-            )
-
-            activities.sort(key=lambda item: item.timestamp, reverse=True)
-
+            else:
+                query = query.offset(skip)
+            
+            rows = (await db.execute(query)).all()
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+            
+            # Full badge details only for badges on this page
+            badge_ids = {row.badge_id for row in rows if row.kind == "badge"}
+            badges = {}
+            if badge_ids:
+                badges_result = await db.execute(select(Badge).where(Badge.id.in_(badge_ids)))
+                badges = {badge.id: badge for badge in badges_result.scalars().all()}
+            
+            activities = []
+            for row in rows:
+                if row.kind == "transaction":
+                    activities.append(ActivityFeedItem(
+                        id=f"transaction-{row.item_id}",
+                        activity_type=row.activity_type,
+                        title=f"Points Earned: {row.points}",
+                        description=row.description,
+                        points_earned=row.points,
+                        badge_earned=None,
+                        timestamp=row.occurred_at,
+                        metadata={
+                            "source_id": row.source_id,
+                            "balance_before": row.balance_before,
+                            "balance_after": row.balance_after
+                        }
+                    ))
+                else:
+                    badge = badges[row.badge_id]
+                    activities.append(ActivityFeedItem(
+                        id=f"badge-{row.item_id}",
+                        activity_type=row.activity_type,
+                        title=f"Badge Earned: {row.title}",
+                        description=row.description,
+                        points_earned=row.points,
+                        badge_earned=BadgeResponse.model_validate(badge),
+                        timestamp=row.occurred_at,
+                        metadata={"rarity": badge.rarity.value}
+                    ))
+            
+            next_cursor = None
+            if has_more and rows:
+                last = rows[-1]
+                next_cursor = self._encode_feed_cursor(last.occurred_at, last.kind, last.item_id)
+            
             return ActivityFeedResponse(
                 activities=activities,
                 total_count=len(activities),
                 page=(skip // limit) + 1,
                 per_page=limit,
-                has_more=len(activities) == limit
+                has_more=has_more,
+                next_cursor=next_cursor
             )
             
         except Exception as e:
             raise e
     
+    def _encode_feed_cursor(self, occurred_at: datetime, kind: str, item_id: int) -> str:
+        raw = f"{occurred_at.isoformat()}|{kind}|{item_id}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+    
+    def _decode_feed_cursor(self, cursor: str) -> Tuple[datetime, str, int]:
+        try:
+            occurred_at, kind, item_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+            return datetime.fromisoformat(occurred_at), kind, int(item_id)
+        except (ValueError, UnicodeDecodeError) as e:
+            raise ValueError("Invalid activity feed cursor") from e
+    
     async def initialize_user(
         self,
         db: AsyncSession,
@@ -1446,8 +1701,8 @@ class GamificationService:
         db: AsyncSession,
         user_id: int,
         activity_data: Dict[str, Any]
-    ):
-        """Process gamification events from other services."""
+    ) -> List[Dict[str, Any]]:
+        """Process gamification events from other services; returns badges earned."""
         try:
             activity_type = activity_data.get("activity_type")
             
@@ -1473,7 +1728,107 @@ class GamificationService:
                 if streak_type:
                     await self.update_streak(db, user_id, streak_type)
             
+            # Advance badges whose rules listen to this activity
+            if activity_type:
+                return await self._apply_badge_rules(
+                    db, user_id, activity_type, activity_data.get("metadata") or {}
+                )
+            return []
+            
+        except Exception as e:
+            raise e
+    
+    async def _apply_badge_rules(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        activity_type: str,
+        metadata: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """Evaluate the badge rules subscribed to an activity; returns badges earned."""
+        try:
+            rules: List[BadgeRule] = [
+                rule for rule in await badge_rule_index.rules_for(db, activity_type)
+                if rule.matches(metadata)
+            ]
+            if not rules:
+                return []
+            
+            # One query for the rules' badges and their prerequisites
+            badge_ids = {rule.badge_id for rule in rules}
+            badge_ids.update(badge_id for rule in rules for badge_id in rule.prerequisites)
+            result = await db.execute(
+                select(UserBadge).where(
+                    and_(
+                        UserBadge.user_id == user_id,
+                        UserBadge.badge_id.in_(badge_ids)
+                    )
+                )
+            )
+            user_badges = {ub.badge_id: ub for ub in result.scalars().all()}
+            completed = {badge_id for badge_id, ub in user_badges.items() if ub.is_completed}
+            
+            now = utc_now()
+            earned: List[BadgeRule] = []
+            for rule in rules:
+                if rule.badge_id in completed:
+                    continue
+                if not all(badge_id in completed for badge_id in rule.prerequisites):
+                    continue
+                
+                user_badge = user_badges.get(rule.badge_id)
+                if not user_badge:
+                    user_badge = UserBadge(
+                        user_id=user_id,
+                        badge_id=rule.badge_id,
+                        progress=0,
+                        target=rule.target
+                    )
+                    db.add(user_badge)
+                    user_badges[rule.badge_id] = user_badge
+                
+                user_badge.progress += 1
+                user_badge.updated_at = now
+                if user_badge.progress >= user_badge.target:
+                    user_badge.is_completed = True
+                    user_badge.earned_at = now
+                    user_badge.points_earned = rule.points
+                    earned.append(rule)
+            
+            if earned:
+                await db.execute(
+                    update(Badge)
+                    .where(Badge.id.in_([rule.badge_id for rule in earned]))
+                    .values(total_earned=Badge.total_earned + 1)
+                    .execution_options(synchronize_session=False)
+                )
+            await db.commit()
+            
+            for rule in earned:
+                await self.award_points(
+                    db, user_id, 'earn_badge',
+                    points=rule.points,
+                    source_id=rule.badge_id,
+                    description=f"Earned badge: {rule.name}"
+                )
+                try:
+                    await leaderboard_engine.record_badge(db, user_id)
+                except Exception as e:
+                    logger.error(f"Failed to update badge leaderboard for user {user_id}: {e}")
+            
+            return [
+                {
+                    "badge_earned": True,
+                    "badge_name": rule.name,
+                    "badge_description": rule.description,
+                    "points_awarded": rule.points,
+                    "rarity": rule.rarity
+                }
+                for rule in earned
+            ]
+            
         except Exception as e:
+            await db.rollback()
             raise e
 
 
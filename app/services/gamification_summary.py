@@ -0,0 +1,100 @@
+"""
+Per-user gamification summary cache.
+Holds each user's computed gamification stats and dashboard payload, plus
+the challenge list every dashboard shares, so the gamification dashboard is
+served from memory on repeat reads. Entries are dropped by the points, badge,
+streak and challenge writers (ORM flush events here, explicit calls for bulk
+statements) and expire after a short TTL so other workers catch up.
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.database.gamification_models import (
+    Challenge, GameChallengeParticipation, PointTransaction, UserBadge, UserLevel, UserStreak
+)
+from app.database.platform_models import UserPoints
+
+# Per-user rows that feed the summary; writes to them drop that user's entry
+SUMMARY_SOURCE_MODELS = (
+    UserPoints, UserLevel, UserBadge, UserStreak, GameChallengeParticipation, PointTransaction
+)
+
+
+class GamificationSummaryCache:
+    """LRU of per-user summary sections ("stats", "dashboard") and shared sections, with a TTL."""
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._shared: Dict[str, Tuple[float, Any]] = {}
+
+    def get(self, user_id: int, section: str) -> Optional[Any]:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        expires_at, sections = entry
+        if expires_at <= time.monotonic():
+            self._entries.pop(user_id, None)
+            return None
+        self._entries.move_to_end(user_id)
+        return sections.get(section)
+
+    def put(self, user_id: int, section: str, value: Any) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        entry = self._entries.get(user_id)
+        if entry is None or entry[0] <= time.monotonic():
+            entry = (time.monotonic() + self.ttl_seconds, {})
+            self._entries[user_id] = entry
+        entry[1][section] = value
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_shared(self, section: str) -> Optional[Any]:
+        entry = self._shared.get(section)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        return entry[1]
+
+    def put_shared(self, section: str, value: Any) -> None:
+        if self.ttl_seconds > 0:
+            self._shared[section] = (time.monotonic() + self.ttl_seconds, value)
+
+    def invalidate(self, user_id: Optional[int]) -> None:
+        """Drop a user's cached summary."""
+        self._entries.pop(user_id, None)
+
+    def invalidate_shared(self) -> None:
+        self._shared.clear()
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._shared.clear()
+
+
+# Global summary cache shared by every GamificationService instance in the process
+gamification_summary = GamificationSummaryCache(
+    ttl_seconds=settings.gamification_summary_cache_ttl_seconds,
+    max_entries=settings.gamification_summary_cache_max_entries
+)
+
+
+# ORM writes invalidate on flush; bulk statements must call invalidate()
+def _invalidate_summary(mapper, connection, target) -> None:
+    gamification_summary.invalidate(target.user_id)
+
+
+def _invalidate_challenges(mapper, connection, target) -> None:
+    gamification_summary.invalidate_shared()
+
+
+for _event_name in ("after_insert", "after_update", "after_delete"):
+    for _model in SUMMARY_SOURCE_MODELS:
+        event.listen(_model, _event_name, _invalidate_summary)
+    event.listen(Challenge, _event_name, _invalidate_challenges)
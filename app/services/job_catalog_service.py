@@ -0,0 +1,271 @@
+"""
+Persistent catalog of external job postings.
+Upserts normalized jobs from the job feeds into job_listings so matching, alerts
+and deduplication can query an indexed local table instead of upstream APIs.
+"""
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, Optional, Sequence
+from sqlalchemy import select, update, and_, or_, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.utils import utc_now
+from app.database.job_models import JobListing
+from app.services.job_search_service import job_search_service, compute_job_fingerprint
+from app.services.job_matching_service import job_matching_service
+
+logger = logging.getLogger(__name__)
+
+# Rows per INSERT statement; keeps bind parameters well under the asyncpg limit
+UPSERT_BATCH_SIZE = 500
+
+# Columns refreshed when an existing job's fingerprint changes
+UPDATABLE_COLUMNS = [
+    'title', 'company_name', 'location', 'description', 'requirements',
+    'responsibilities', 'employment_type', 'work_mode', 'experience_level',
+    'salary_min', 'salary_max', 'salary_currency', 'required_skills', 'industry',
+    'application_url', 'source_url', 'is_remote_friendly', 'is_active',
+    'posted_at', 'content_fingerprint'
+]
+
+
+class JobCatalogService:
+    """Incremental ingestion and lookup for the external job catalog."""
+
+    async def ingest_external_jobs(self, db: AsyncSession) -> Dict[str, int]:
+        """Pull the current job feeds, upsert them and batch-encode any new jobs."""
+        normalized_jobs = await job_search_service.get_normalized_jobs()
+        counts = await self.upsert_jobs(db, normalized_jobs)
+        # An empty pull means the feeds failed, not that every job was withdrawn
+        if counts["received"]:
+            counts["deactivated"] = await self.deactivate_unseen_jobs(
+                db, settings.job_catalog_unseen_days
+            )
+        counts["encoded"] = await job_matching_service.index_jobs(normalized_jobs)
+        return counts
+
+    async def upsert_jobs(
+        self,
+        db: AsyncSession,
+        normalized_jobs: List[Dict[str, Any]]
+    ) -> Dict[str, int]:
+        """
+        Bulk upsert normalized jobs keyed on (source, external id).
+
+        Existing rows are only rewritten when their content fingerprint differs
+        from the incoming one; unchanged postings only get ``last_seen_at``
+        bumped (and are reactivated) by one narrow UPDATE per batch.
+
+        Returns:
+            Counts of jobs received and rows written
+        """
+        rows = {}
+        for job in normalized_jobs:
+            row = self._job_to_row(job)
+            if row:
+                # Last occurrence wins when a feed repeats a posting
+                rows[(row['source_platform'], row['external_job_id'])] = row
+
+        rows = list(rows.values())
+        written = 0
+        seen_at = utc_now()
+
+        for i in range(0, len(rows), UPSERT_BATCH_SIZE):
+            batch = [{**row, 'last_seen_at': seen_at} for row in rows[i:i + UPSERT_BATCH_SIZE]]
+            stmt = pg_insert(JobListing).values(batch)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[JobListing.source_platform, JobListing.external_job_id],
+                set_={
+                    **{column: stmt.excluded[column] for column in UPDATABLE_COLUMNS},
+                    'updated_at': utc_now()
+                },
+                where=JobListing.content_fingerprint.is_distinct_from(
+                    stmt.excluded.content_fingerprint
+                )
+            ).returning(JobListing.id)
+
+            result = await db.execute(stmt)
+            written += len(result.all())
+
+            await db.execute(
+                update(JobListing)
+                .where(
+                    tuple_(JobListing.source_platform, JobListing.external_job_id).in_(
+                        [(row['source_platform'], row['external_job_id']) for row in batch]
+                    )
+                )
+                # Keep updated_at meaning "content last changed"
+                .values(last_seen_at=seen_at, is_active=True, updated_at=JobListing.updated_at)
+                .execution_options(synchronize_session=False)
+            )
+
+        await db.commit()
+
+        logger.info(f"Job catalog upsert: {len(rows)} jobs received, {written} rows written")
+        return {
+            "received": len(rows),
+            "written": written,
+            "unchanged": len(rows) - written
+        }
+
+    async def deactivate_unseen_jobs(self, db: AsyncSession, max_unseen_days: int) -> int:
+        """Deactivate catalog jobs the feeds have not returned for ``max_unseen_days``."""
+        result = await db.execute(
+            update(JobListing)
+            .where(
+                and_(
+                    JobListing.is_active == True,
+                    JobListing.content_fingerprint.isnot(None),
+                    JobListing.last_seen_at < utc_now() - timedelta(days=max_unseen_days)
+                )
+            )
+            .values(is_active=False)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+
+        if result.rowcount:
+            logger.info(f"Job catalog: deactivated {result.rowcount} jobs unseen for {max_unseen_days} days")
+        return result.rowcount
+
+    async def get_catalog_jobs(
+        self,
+        db: AsyncSession,
+        max_age_days: Optional[int] = 30,
+        limit: Optional[int] = None,
+        locations: Optional[Sequence[str]] = None,
+        remote_only: bool = False,
+        salary_min: Optional[int] = None,
+        excluded_companies: Optional[Sequence[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get active catalog jobs in the normalized job dict format, newest first.
+
+        ``max_age_days`` limits results to jobs the feeds returned within that
+        many days.
+
+        Optional filters run in the query: ``locations`` and
+        ``excluded_companies`` are case-insensitive substring matches,
+        ``remote_only`` requires "remote" in the title, description or
+        location, and ``salary_min`` (whole currency units) keeps jobs
+        without a listed salary.
+        """
+        query = (
+            select(JobListing)
+            .where(
+                and_(
+                    JobListing.is_active == True,
+                    JobListing.content_fingerprint.isnot(None)
+                )
+            )
+            .order_by(JobListing.posted_at.desc().nullslast())
+        )
+
+        if max_age_days is not None:
+            query = query.where(
+                JobListing.last_seen_at >= utc_now() - timedelta(days=max_age_days)
+            )
+        if locations:
+            location_match = [
+                JobListing.location.icontains(location, autoescape=True) for location in locations
+            ]
+            if remote_only:
+                location_match.append(JobListing.location.icontains("remote"))
+            query = query.where(or_(*location_match))
+        if remote_only:
+            query = query.where(or_(
+                JobListing.title.icontains("remote"),
+                JobListing.description.icontains("remote"),
+                JobListing.location.icontains("remote")
+            ))
+        if salary_min:
+            # job_listings stores salaries in cents
+            query = query.where(or_(
+                JobListing.salary_min.is_(None),
+                JobListing.salary_min >= salary_min * 100
+            ))
+        for company in excluded_companies or ():
+            query = query.where(~JobListing.company_name.icontains(company, autoescape=True))
+        if limit:
+            query = query.limit(limit)
+
+        result = await db.execute(query)
+        return [self._listing_to_job(listing) for listing in result.scalars().all()]
+
+    def _job_to_row(self, job: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Map a normalized job dict onto job_listings columns."""
+        source = job.get('source')
+        external_id = job.get('external_id')
+        if not source or not external_id or not job.get('title'):
+            return None
+
+        url = job.get('application_url') or job.get('url') or ''
+        remote = bool(job.get('remote_option'))
+
+        return {
+            'title': job['title'][:200],
+            'company_name': (job.get('company') or 'Unknown')[:100],
+            'location': (job.get('location') or '')[:100] or None,
+            'description': job.get('description') or '',
+            'requirements': job.get('requirements') or None,
+            'responsibilities': job.get('responsibilities') or None,
+            'employment_type': (job.get('employment_type') or 'full-time')[:20],
+            'work_mode': 'remote' if remote else 'onsite',
+            'experience_level': (job.get('experience_level') or 'mid-level')[:20],
+            # job_listings stores salaries in cents
+            'salary_min': job['salary_min'] * 100 if job.get('salary_min') else None,
+            'salary_max': job['salary_max'] * 100 if job.get('salary_max') else None,
+            'salary_currency': (job.get('currency') or 'USD')[:3],
+            'required_skills': job.get('skills_required') or [],
+            'industry': (job.get('industry') or '')[:50] or None,
+            'application_url': url[:500] or None,
+            'source_platform': source[:50],
+            'source_url': url[:1000],
+            'external_job_id': str(external_id)[:100],
+            'is_remote_friendly': remote,
+            'is_active': True,
+            'posted_at': self._parse_posted_at(job.get('posted_at')),
+            'content_fingerprint': job.get('fingerprint') or compute_job_fingerprint(job)
+        }
+
+    def _listing_to_job(self, listing: JobListing) -> Dict[str, Any]:
+        """Map a catalog row back to the normalized job dict format."""
+        return {
+            'id': f"{listing.source_platform.lower()}_{listing.external_job_id}",
+            'catalog_id': listing.id,
+            'external_id': listing.external_job_id,
+            'title': listing.title,
+            'company': listing.company_name,
+            'location': listing.location or '',
+            'remote_option': listing.is_remote_friendly,
+            'description': listing.description,
+            'requirements': listing.requirements or '',
+            'responsibilities': listing.responsibilities or '',
+            'salary_min': listing.salary_min // 100 if listing.salary_min else None,
+            'salary_max': listing.salary_max // 100 if listing.salary_max else None,
+            'currency': listing.salary_currency,
+            'experience_level': listing.experience_level,
+            'employment_type': listing.employment_type,
+            'industry': listing.industry or '',
+            'skills_required': listing.required_skills or [],
+            'application_url': listing.application_url or '',
+            'posted_at': listing.posted_at.isoformat() if listing.posted_at else '',
+            'source': listing.source_platform,
+            'fingerprint': listing.content_fingerprint
+        }
+
+    def _parse_posted_at(self, value: Any) -> Optional[datetime]:
+        """Parse the normalized posted_at string into a datetime."""
+        if not value or not isinstance(value, str):
+            return None
+        try:
+            parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+        return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+# Global instance
+job_catalog_service = JobCatalogService()
@@ -0,0 +1,306 @@
+"""
+Shared on-disk store of job embeddings keyed by job content fingerprint.
+Vectors live in a memory-mapped NumPy matrix so every worker process on the host
+reads the same encoded jobs instead of re-running the embedding model.
+"""
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+try:
+    import numpy as np  # type: ignore
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+try:
+    import fcntl  # type: ignore
+    FCNTL_AVAILABLE = True
+except ImportError:  # Windows development machines
+    FCNTL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class JobEmbeddingStore:
+    """
+    LRU-bounded embedding cache backed by a memory-mapped ``.npy`` matrix.
+
+    Row slots are assigned per fingerprint and tracked in a JSON index next to
+    the matrix. Writers take an exclusive file lock, merge the latest index from
+    disk and persist it atomically; readers reload the index when it changes.
+    Stored vectors are L2-normalised, so a dot product is the cosine similarity.
+    Slots are dense, so row ``i`` of ``snapshot()`` is slot ``i``. The
+    ``generation`` counter is bumped by ingestion writes and versions indexes
+    built over the store.
+    """
+
+    def __init__(self, directory: str, name: str, capacity: int):
+        self.directory = directory
+        self.capacity = capacity
+        self.matrix_path = os.path.join(directory, f"{name}.npy")
+        self.index_path = os.path.join(directory, f"{name}.index.json")
+        self.lock_path = os.path.join(directory, f"{name}.lock")
+        self.dimension: Optional[int] = None
+
+        self._matrix = None
+        self._slots: "OrderedDict[str, int]" = OrderedDict()
+        self._index_mtime: Optional[int] = None
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        """Number of vectors currently stored."""
+        return len(self._slots)
+
+    @property
+    def generation(self) -> int:
+        """Ingestion generation, shared with other processes through the index."""
+        with self._lock:
+            self._reload_if_changed()
+            return self._generation
+
+    def snapshot(self) -> Tuple[int, Optional["np.ndarray"]]:
+        """Generation and a view (no copy) of the occupied rows, or None if empty."""
+        with self._lock:
+            self._reload_if_changed()
+            if self._matrix is None or not self._slots:
+                return self._generation, None
+            return self._generation, self._matrix[:len(self._slots)]
+
+    def lookup_slots(self, fingerprints: List[str]) -> Tuple["np.ndarray", List[int]]:
+        """
+        Slots for fingerprints without copying any vectors.
+
+        Returns:
+            Slot per fingerprint (-1 for misses) and the positions of the misses
+        """
+        with self._lock:
+            self._reload_if_changed()
+            slots = np.full(len(fingerprints), -1, dtype=np.int64)
+            missing = []
+            for position, fingerprint in enumerate(fingerprints):
+                slot = self._slots.get(fingerprint)
+                if slot is None:
+                    missing.append(position)
+                else:
+                    self._slots.move_to_end(fingerprint)
+                    slots[position] = slot
+            return slots, missing
+
+    def vectors_at(self, slots: "np.ndarray") -> "np.ndarray":
+        """Copy of the vectors in the given slots."""
+        with self._lock:
+            return np.asarray(self._matrix[slots])
+
+    def get_many(self, fingerprints: List[str]) -> Tuple[Optional["np.ndarray"], List[int]]:
+        """
+        Look up vectors for fingerprints.
+
+        Returns:
+            Matrix with one row per fingerprint (zero rows for misses, or None if
+            nothing is stored yet) and the positions of the missing fingerprints
+        """
+        with self._lock:
+            self._reload_if_changed()
+            if self._matrix is None:
+                return None, list(range(len(fingerprints)))
+
+            rows = np.zeros((len(fingerprints), self.dimension), dtype=np.float32)
+            missing = []
+            hit_positions = []
+            hit_slots = []
+            for position, fingerprint in enumerate(fingerprints):
+                slot = self._slots.get(fingerprint)
+                if slot is None:
+                    missing.append(position)
+                else:
+                    self._slots.move_to_end(fingerprint)
+                    hit_positions.append(position)
+                    hit_slots.append(slot)
+
+            if hit_slots:
+                rows[hit_positions] = self._matrix[hit_slots]
+            return rows, missing
+
+    def put_many(
+        self,
+        fingerprints: List[str],
+        vectors: "np.ndarray",
+        bump_generation: bool = False
+    ) -> None:
+        """
+        Store vectors for fingerprints, evicting least recently used rows when full.
+
+        Ingestion passes ``bump_generation`` so indexes over the store rebuild.
+        """
+        if not fingerprints:
+            return
+
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.maximum(norms, 1e-12)
+
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self.lock_path, "a") as lock_file:
+                if FCNTL_AVAILABLE:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    # Merge whatever other workers wrote since our last read
+                    self._reload_if_changed()
+                    self._ensure_matrix(vectors.shape[1])
+
+                    for fingerprint, vector in zip(fingerprints, vectors):
+                        slot = self._slots.get(fingerprint)
+                        if slot is None:
+                            slot = self._allocate_slot()
+                        self._slots[fingerprint] = slot
+                        self._slots.move_to_end(fingerprint)
+                        self._matrix[slot] = vector
+                    if bump_generation:
+                        self._generation += 1
+
+                    self._matrix.flush()
+                    self._write_index()
+                finally:
+                    if FCNTL_AVAILABLE:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _allocate_slot(self) -> int:
+        """Return a free row, evicting the least recently used one if full."""
+        # Slots are handed out densely and evicted rows are reused in place,
+        # so while the store is not full the next free row is its size
+        if len(self._slots) < self.capacity:
+            return len(self._slots)
+        _, slot = self._slots.popitem(last=False)
+        return slot
+
+    def _ensure_matrix(self, dimension: int) -> None:
+        """Open (or create) the memory-mapped matrix for a vector dimension."""
+        if self._matrix is not None and self.dimension == dimension:
+            return
+
+        shape = (self.capacity, dimension)
+        if os.path.exists(self.matrix_path):
+            matrix = np.lib.format.open_memmap(self.matrix_path, mode="r+")
+            if matrix.shape == shape and matrix.dtype == np.float32:
+                self._matrix = matrix
+                self.dimension = dimension
+                return
+            # Model or capacity changed: the stored vectors are unusable
+            logger.warning(f"Resetting embedding store {self.matrix_path}: shape {matrix.shape} != {shape}")
+            del matrix
+            self._slots.clear()
+
+        self._matrix = np.lib.format.open_memmap(
+            self.matrix_path, mode="w+", dtype=np.float32, shape=shape
+        )
+        self.dimension = dimension
+
+    def _reload_if_changed(self) -> None:
+        """Reload the slot index (and matrix) if another process rewrote it."""
+        try:
+            mtime = os.stat(self.index_path).st_mtime_ns
+        except OSError:
+            return
+        if mtime == self._index_mtime:
+            return
+
+        try:
+            with open(self.index_path) as f:
+                index = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read embedding index {self.index_path}: {e}")
+            return
+
+        if index.get("capacity") != self.capacity:
+            return
+
+        self._ensure_matrix(index["dimension"])
+        self._slots = OrderedDict((fp, int(slot)) for fp, slot in index["slots"])
+        self._generation = index.get("generation", 0)
+        self._index_mtime = mtime
+
+    def _write_index(self) -> None:
+        """Atomically persist the slot index in LRU order."""
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "dimension": self.dimension,
+                "capacity": self.capacity,
+                "generation": self._generation,
+                "slots": list(self._slots.items())
+            }, f)
+        os.replace(tmp_path, self.index_path)
+        self._index_mtime = os.stat(self.index_path).st_mtime_ns
+
+
+def top_k_indices(scores: "np.ndarray", k: Optional[int]) -> "np.ndarray":
+    """Indices of the ``k`` highest scores, best first, without sorting the rest."""
+    n = len(scores)
+    if k is None or k >= n:
+        return np.argsort(-scores, kind="stable")
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    partition = np.argpartition(-scores, k - 1)[:k]
+    return partition[np.argsort(-scores[partition], kind="stable")]
+
+
+class JobVectorIVFIndex:
+    """
+    Inverted-file approximate nearest-neighbour index over job vectors.
+
+    A spherical k-means coarse quantiser (trained on a sample) splits the
+    vectors into ``n_lists`` cells; a query only scores the jobs in the
+    ``n_probe`` cells whose centroids are closest to it.
+    """
+
+    def __init__(
+        self,
+        vectors: "np.ndarray",
+        n_lists: Optional[int] = None,
+        n_iter: int = 8,
+        sample_size: int = 10000,
+        seed: int = 0
+    ):
+        n = len(vectors)
+        # Rows indexed; row i is store slot i
+        self.size = n
+        rng = np.random.default_rng(seed)
+        sample = vectors[rng.choice(n, min(n, sample_size), replace=False)]
+        self.n_lists = max(1, min(n_lists or int(np.sqrt(n)), len(sample)))
+
+        centroids = sample[rng.choice(len(sample), self.n_lists, replace=False)]
+        for _ in range(n_iter):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            counts = np.bincount(assignment, minlength=self.n_lists)
+            # Empty cells keep their previous centroid
+            filled = counts > 0
+            centroids[filled] = sums[filled] / counts[filled, None]
+            centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+        self.centroids = centroids
+
+        # Assign every vector in chunks to bound the temporary score matrix
+        assignment = np.empty(n, dtype=np.int64)
+        for start in range(0, n, 8192):
+            chunk = vectors[start:start + 8192]
+            assignment[start:start + 8192] = np.argmax(chunk @ centroids.T, axis=1)
+
+        self._order = np.argsort(assignment, kind="stable")
+        self._offsets = np.concatenate(
+            ([0], np.cumsum(np.bincount(assignment, minlength=self.n_lists)))
+        )
+
+    def search(self, query: "np.ndarray", n_probe: int) -> "np.ndarray":
+        """Candidate row indices from the cells nearest to the query."""
+        cells = top_k_indices(self.centroids @ query, n_probe)
+        return np.concatenate([
+            self._order[self._offsets[cell]:self._offsets[cell + 1]] for cell in cells
+        ])
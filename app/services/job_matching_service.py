@@ -3,11 +3,15 @@ Smart Job Matching Service using FREE sentence-transformers for semantic similar
 Provides intelligent job recommendations based on user skills, experience, and preferences.
 """
 import asyncio
+import importlib.util
 import json
+import time
+from collections import OrderedDict
 from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_
+from sqlalchemy import select, and_, or_, func
+from sqlalchemy.orm import selectinload
 
 # Optional ML libraries - as it's not available in Python 3.13 yet
 try:
@@ -23,17 +27,62 @@ try:
 except ImportError:
     SKLEARN_AVAILABLE = False
 
-#embedding libraries
-try:
-    from sentence_transformers import SentenceTransformer  # type: ignore
-    SENTENCE_TRANSFORMERS_AVAILABLE = True
-except ImportError:
-    SENTENCE_TRANSFORMERS_AVAILABLE = False
+#embedding libraries - only probed here; the model (and torch) load lazily
+SENTENCE_TRANSFORMERS_AVAILABLE = importlib.util.find_spec("sentence_transformers") is not None
 
+from app.core.config import settings
+from app.core.model_registry import model_registry
 from app.database.job_models import JobApplication, SavedJob
-from app.database.user_models import User, UserSkill
+from app.database.user_models import User, Profile, UserSkill
 from app.database.cv_models import CV, WorkExperience, Education, CVSkill
 from app.schemas.job_schemas import JobMatchResponse, JobRecommendationResponse
+from app.services.job_embedding_store import JobEmbeddingStore, JobVectorIVFIndex, top_k_indices
+from app.services.job_search_service import compute_job_fingerprint
+
+EMBEDDING_MODEL_NAME = 'all-MiniLM-L6-v2'
+EMBEDDING_BATCH_SIZE = 64
+
+# Profile text cache: entries are re-validated against profile/CV timestamps,
+# but not more often than PROFILE_TEXT_RECHECK_SECONDS
+PROFILE_TEXT_CACHE_SIZE = 10000
+PROFILE_TEXT_RECHECK_SECONDS = 60
+
+
+class TfidfCorpusModel:
+    """
+    TF-IDF model fitted once over the job corpus.
+    
+    Instances are never mutated after construction: a refit builds a new model
+    and swaps the reference, so concurrent requests can score against whichever
+    snapshot they picked up without locking.
+    """
+    
+    def __init__(self, vectorizer: "TfidfVectorizer", matrix: Any, rows: Dict[str, int]):
+        self.vectorizer = vectorizer
+        self.matrix = matrix  # sparse CSR, one L2-normalised row per job
+        self.rows = rows      # job fingerprint -> matrix row
+    
+    def score(self, profile_text: str, fingerprints: List[str], texts: List[str]) -> "np.ndarray":
+        """Cosine similarity of the profile against each job (blocking)."""
+        profile_vector = self.vectorizer.transform([profile_text]).T
+        scores = np.zeros(len(fingerprints), dtype=np.float32)
+        
+        hit_positions, hit_rows, missing = [], [], []
+        for position, fingerprint in enumerate(fingerprints):
+            row = self.rows.get(fingerprint)
+            if row is None:
+                missing.append(position)
+            else:
+                hit_positions.append(position)
+                hit_rows.append(row)
+        
+        if hit_rows:
+            scores[hit_positions] = (self.matrix[hit_rows] @ profile_vector).toarray().ravel()
+        if missing:
+            # Jobs that arrived after the last fit are projected onto the fitted vocabulary
+            extra = self.vectorizer.transform([texts[i] for i in missing])
+            scores[missing] = (extra @ profile_vector).toarray().ravel()
+        return scores
 
 
 class JobMatchingService:
@@ -41,94 +90,216 @@ class JobMatchingService:
     
     def __init__(self):
         """Initialize job matching service with free embedding models."""
-        self.embedding_model = None
-        self.tfidf_vectorizer = None
-        self.sentence_transformers_loaded = False
-        
-        # Initialize TF-IDF if sklearn available
-        if SKLEARN_AVAILABLE:
-            self.tfidf_vectorizer = TfidfVectorizer(
-                max_features=1000,
-                stop_words='english',
-                ngram_range=(1, 2)
-            )
+        self.embedding_store = None
+        self._ann_index: Optional[JobVectorIVFIndex] = None
+        self._ann_index_generation: Optional[int] = None
+        self._ann_index_lock = asyncio.Lock()
+        self._tfidf_model: Optional[TfidfCorpusModel] = None
+        # user_id -> (version, text, last checked)
+        self._profile_text_cache: "OrderedDict[int, Tuple[Tuple, str, float]]" = OrderedDict()
         
-        # Initialize embedding model if available
+        # The embedding model is loaded on first use (or at warm-up) in the
+        # model registry's background thread; until then matching uses TF-IDF
         if SENTENCE_TRANSFORMERS_AVAILABLE:
-            try:
-                # Use free, lightweight models
-                self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')  # 22MB model
-                print("Sentence Transformers loaded successfully")
-                self.sentence_transformers_loaded = True
-            except Exception as e:
-                print(f"WARNING: Could not load sentence transformers: {e}")
-                self.embedding_model = None
-                self.sentence_transformers_loaded = False
+            model_registry.register(EMBEDDING_MODEL_NAME, self._load_embedding_model)
+            
+            # Job vectors are shared across users and workers
+            self.embedding_store = JobEmbeddingStore(
+                directory=settings.job_embedding_store_dir,
+                name=EMBEDDING_MODEL_NAME,
+                capacity=settings.job_embedding_store_capacity
+            )
         else:
             print("WARNING: Sentence Transformers not available. Using basic matching.")
-            self.sentence_transformers_loaded = False
+    
+    @property
+    def embedding_model(self):
+        """The sentence transformer if it has finished loading, else None (starts the load)."""
+        if not SENTENCE_TRANSFORMERS_AVAILABLE:
+            return None
+        return model_registry.get(EMBEDDING_MODEL_NAME)
+    
+    @property
+    def sentence_transformers_loaded(self) -> bool:
+        return model_registry.is_ready(EMBEDDING_MODEL_NAME)
+    
+    async def load_embedding_model(self):
+        """Wait for the sentence transformer to load; None if unavailable."""
+        if not SENTENCE_TRANSFORMERS_AVAILABLE:
+            return None
+        return await model_registry.load(EMBEDDING_MODEL_NAME)
+    
+    def _load_embedding_model(self):
+        """Build the sentence transformer (blocking; runs in the registry thread)."""
+        from sentence_transformers import SentenceTransformer  # type: ignore
+        # Use free, lightweight models
+        model = SentenceTransformer(EMBEDDING_MODEL_NAME)  # 22MB model
+        print("Sentence Transformers loaded successfully")
+        return model
     
     async def get_user_profile_text(self, db: AsyncSession, user_id: int) -> str:
         """Generate comprehensive user profile text for matching."""
-        profile_parts = []
+        profile_texts = await self.get_user_profile_texts(db, [user_id])
+        return profile_texts.get(user_id, "")
+    
+    async def get_user_profile_texts(self, db: AsyncSession, user_ids: List[int]) -> Dict[int, str]:
+        """
+        Build profile texts for many users in a constant number of queries.
+        
+        Texts are cached per user and keyed on a version made of the profile,
+        skill and default-CV ``updated_at`` timestamps and child row counts, so
+        unchanged profiles are served from memory.
+        
+        Returns:
+            Mapping of user id to profile text (users that do not exist are omitted)
+        """
+        user_ids = list(dict.fromkeys(user_ids))
+        now = time.monotonic()
+        texts: Dict[int, str] = {}
+        
+        # Entries validated within the recheck window need no query at all
+        to_check = []
+        for user_id in user_ids:
+            cached = self._profile_text_cache.get(user_id)
+            if cached and now - cached[2] < PROFILE_TEXT_RECHECK_SECONDS:
+                self._profile_text_cache.move_to_end(user_id)
+                texts[user_id] = cached[1]
+            else:
+                to_check.append(user_id)
+        
+        if not to_check:
+            return texts
+        
+        versions = await self._get_profile_versions(db, to_check)
+        
+        to_build = []
+        for user_id in to_check:
+            if user_id not in versions:
+                self._profile_text_cache.pop(user_id, None)
+                continue
+            cached = self._profile_text_cache.get(user_id)
+            if cached and cached[0] == versions[user_id]:
+                self._cache_profile_text(user_id, versions[user_id], cached[1], now)
+                texts[user_id] = cached[1]
+            else:
+                to_build.append(user_id)
+        
+        if to_build:
+            built = await self._build_profile_texts(db, to_build)
+            for user_id, text in built.items():
+                self._cache_profile_text(user_id, versions[user_id], text, now)
+                texts[user_id] = text
         
-        # Get user basic info
-        user_result = await db.execute(select(User).where(User.id == user_id))
-        user = user_result.scalar_one_or_none()
-        if not user:
-            return ""
+        return texts
+    
+    async def _get_profile_versions(self, db: AsyncSession, user_ids: List[int]) -> Dict[int, Tuple]:
+        """
+        Fetch the values that determine whether a cached profile text is stale.
+        
+        Child tables contribute their row count as well as their latest
+        ``updated_at``, so deleting a skill, experience or education changes
+        the version too.
+        """
+        def child_version(model, parent_column, parent):
+            return (
+                select(func.max(model.updated_at)).where(parent_column == parent.id)
+                .correlate(parent).scalar_subquery(),
+                select(func.count()).where(parent_column == parent.id)
+                .correlate(parent).scalar_subquery()
+            )
         
-        # Get user skills
-        skills_result = await db.execute(
-            select(UserSkill).where(UserSkill.user_id == user_id)
+        skills_updated, skills_count = child_version(UserSkill, UserSkill.profile_id, Profile)
+        experiences_updated, experiences_count = child_version(WorkExperience, WorkExperience.cv_id, CV)
+        educations_updated, educations_count = child_version(Education, Education.cv_id, CV)
+        
+        result = await db.execute(
+            select(
+                User.id,
+                Profile.updated_at,
+                skills_updated,
+                skills_count,
+                CV.id,
+                CV.updated_at,
+                experiences_updated,
+                experiences_count,
+                educations_updated,
+                educations_count
+            )
+            .outerjoin(Profile, Profile.user_id == User.id)
+            .outerjoin(CV, and_(CV.user_id == User.id, CV.is_default == True))
+            .where(User.id.in_(user_ids))
+            .order_by(User.id, CV.id)
         )
-        skills = skills_result.scalars().all()
-        if skills:
-            skill_names = [skill.skill_name for skill in skills]
-            profile_parts.append(f"Skills: {', '.join(skill_names)}")
         
-        # Get latest CV data
-        cv_result = await db.execute(
+        versions: Dict[int, Tuple] = {}
+        for row in result.all():
+            # Keep the first default CV per user, matching _build_profile_texts
+            versions.setdefault(row[0], tuple(row[1:]))
+        return versions
+    
+    async def _build_profile_texts(self, db: AsyncSession, user_ids: List[int]) -> Dict[int, str]:
+        """Load users, skills and default CVs for many users and render their profile texts."""
+        users_result = await db.execute(
+            select(User)
+            .options(selectinload(User.profile).selectinload(Profile.skills))
+            .where(User.id.in_(user_ids))
+        )
+        users = users_result.scalars().all()
+        
+        cvs_result = await db.execute(
             select(CV)
-            .where(and_(CV.user_id == user_id, CV.is_default == True))
-            .limit(1)
+            .options(selectinload(CV.work_experiences), selectinload(CV.educations))
+            .where(and_(CV.user_id.in_(user_ids), CV.is_default == True))
+            .order_by(CV.id)
         )
-        cv = cv_result.scalar_one_or_none()
+        default_cvs: Dict[int, CV] = {}
+        for cv in cvs_result.scalars().all():
+            default_cvs.setdefault(cv.user_id, cv)
         
-        if cv:
-            if cv.summary:
-                profile_parts.append(f"Summary: {cv.summary}")
-            
-            # Get work experience
-            exp_result = await db.execute(
-                select(WorkExperience).where(WorkExperience.cv_id == cv.id)
-            )
-            experiences = exp_result.scalars().all()
+        texts = {}
+        for user in users:
+            profile_parts = []
             
-            for exp in experiences:
-                exp_text = f"Experience: {exp.job_title} at {exp.company_name}"
-                if exp.description:
-                    exp_text += f" - {exp.description}"
-                profile_parts.append(exp_text)
+            # User skills
+            skills = user.profile.skills if user.profile else []
+            if skills:
+                skill_names = [skill.skill_name for skill in skills]
+                profile_parts.append(f"Skills: {', '.join(skill_names)}")
             
-            # Get education
-            edu_result = await db.execute(
-                select(Education).where(Education.cv_id == cv.id)
-            )
-            education = edu_result.scalars().all()
+            # Latest CV data
+            cv = default_cvs.get(user.id)
+            if cv:
+                if cv.professional_summary:
+                    profile_parts.append(f"Summary: {cv.professional_summary}")
+                
+                for exp in cv.work_experiences:
+                    exp_text = f"Experience: {exp.job_title} at {exp.company_name}"
+                    if exp.description:
+                        exp_text += f" - {exp.description}"
+                    profile_parts.append(exp_text)
+                
+                for edu in cv.educations:
+                    profile_parts.append(f"Education: {edu.degree_type} in {edu.field_of_study}")
             
-            for edu in education:
-                profile_parts.append(f"Education: {edu.degree} in {edu.field_of_study}")
+            texts[user.id] = " ".join(profile_parts)
         
-        return " ".join(profile_parts)
+        return texts
+    
+    def _cache_profile_text(self, user_id: int, version: Tuple, text: str, checked_at: float) -> None:
+        """Store a profile text, evicting the least recently used entries."""
+        self._profile_text_cache[user_id] = (version, text, checked_at)
+        self._profile_text_cache.move_to_end(user_id)
+        while len(self._profile_text_cache) > PROFILE_TEXT_CACHE_SIZE:
+            self._profile_text_cache.popitem(last=False)
     
     def get_job_text(self, job: Dict[str, Any]) -> str:
         """Extract relevant text from job posting for matching."""
         job_parts = []
         
-        # Job title and company
-        if job.get('position'):
-            job_parts.append(f"Position: {job['position']}")
+        # Job title and company (raw feeds use 'position', normalized jobs 'title')
+        position = job.get('position') or job.get('title')
+        if position:
+            job_parts.append(f"Position: {position}")
         if job.get('company'):
             job_parts.append(f"Company: {job['company']}")
         
@@ -137,11 +308,12 @@ class JobMatchingService:
             job_parts.append(f"Description: {job['description']}")
         
         # Required skills/tags
-        if job.get('tags'):
-            if isinstance(job['tags'], list):
-                job_parts.append(f"Skills: {', '.join(job['tags'])}")
-            elif isinstance(job['tags'], str):
-                job_parts.append(f"Skills: {job['tags']}")
+        tags = job.get('tags') or job.get('skills_required')
+        if tags:
+            if isinstance(tags, list):
+                job_parts.append(f"Skills: {', '.join(str(tag) for tag in tags)}")
+            elif isinstance(tags, str):
+                job_parts.append(f"Skills: {tags}")
         
         # Location preferences
         if job.get('location'):
@@ -152,80 +324,252 @@ class JobMatchingService:
     async def calculate_job_similarity_embeddings(
         self, 
         user_profile: str, 
-        jobs: List[Dict[str, Any]]
+        jobs: List[Dict[str, Any]],
+        limit: Optional[int] = None
     ) -> List[Tuple[Dict[str, Any], float]]:
-        """Calculate job similarity using sentence transformers (free)."""
+        """Calculate job similarity using sentence transformers (free), returning the top ``limit`` jobs."""
         if not self.embedding_model or not user_profile.strip():
             return []
         
         try:
-            # Prepare texts
-            job_texts = [self.get_job_text(job) for job in jobs]
-            all_texts = [user_profile] + job_texts
+            loop = asyncio.get_event_loop()
             
-            # Generate embeddings
-            embeddings = await asyncio.get_event_loop().run_in_executor(
-                None, self.embedding_model.encode, all_texts
+            # Only the profile needs a model pass; job vectors come from the store
+            user_embedding = await loop.run_in_executor(
+                None, self._encode_texts, [user_profile]
             )
+            user_vector = user_embedding[0]
+            fingerprints = [self._job_fingerprint(job) for job in jobs]
             
-            # Calculate similarities
-            user_embedding = embeddings[0].reshape(1, -1)
-            job_embeddings = embeddings[1:]
-            
-            similarities = cosine_similarity(user_embedding, job_embeddings)[0]
-            
-            # Pair jobs with similarity scores
-            job_scores = list(zip(jobs, similarities))
+            # Large job sets only score the jobs in the nearest ANN cells
+            candidates = await self._get_ann_candidates(jobs, fingerprints, user_vector, limit)
+            if candidates is None:
+                positions = np.arange(len(jobs))
+                job_embeddings = await self.get_job_embeddings(jobs, fingerprints)
+            else:
+                positions, job_embeddings = candidates
             
-            # Sort by similarity (highest first)
-            job_scores.sort(key=lambda x: x[1], reverse=True)
+            # Vectors are L2-normalised, so one matrix-vector product gives cosine similarity
+            similarities = job_embeddings @ user_vector
             
-            return job_scores
+            # Select the top-k without sorting the whole catalog
+            top = top_k_indices(similarities, limit)
+            return [(jobs[positions[i]], float(similarities[i])) for i in top]
             
         except Exception as e:
             print(f"WARNING: Error in embedding similarity: {e}")
             return []
     
+    async def get_job_embeddings(
+        self,
+        jobs: List[Dict[str, Any]],
+        fingerprints: Optional[List[str]] = None
+    ) -> "np.ndarray":
+        """Get normalised embeddings for jobs, encoding only those not yet in the store."""
+        if fingerprints is None:
+            fingerprints = [self._job_fingerprint(job) for job in jobs]
+        
+        vectors, missing = self.embedding_store.get_many(fingerprints)
+        if not missing:
+            return vectors
+        
+        missing_vectors = await self._encode_jobs(
+            [jobs[i] for i in missing], [fingerprints[i] for i in missing]
+        )
+        if vectors is None:
+            vectors = np.zeros((len(jobs), missing_vectors.shape[1]), dtype=np.float32)
+        vectors[missing] = missing_vectors
+        return vectors
+    
+    async def _encode_jobs(
+        self,
+        jobs: List[Dict[str, Any]],
+        fingerprints: List[str],
+        bump_generation: bool = False
+    ) -> "np.ndarray":
+        """Encode jobs and add them to the embedding store."""
+        loop = asyncio.get_event_loop()
+        vectors = await loop.run_in_executor(
+            None, self._encode_texts, [self.get_job_text(job) for job in jobs]
+        )
+        self.embedding_store.put_many(fingerprints, vectors, bump_generation=bump_generation)
+        return vectors
+    
+    async def _get_ann_candidates(
+        self,
+        jobs: List[Dict[str, Any]],
+        fingerprints: List[str],
+        user_vector: "np.ndarray",
+        limit: Optional[int]
+    ) -> Optional[Tuple["np.ndarray", "np.ndarray"]]:
+        """
+        Prefilter jobs through the IVF index over the embedding store.
+        
+        The index covers the whole store; the request's own job set only
+        filters the candidate slots it returns, so no job vectors are copied
+        except the candidates'.
+        
+        Returns:
+            Candidate positions in ``jobs`` and their vectors, or None to
+            score every job exactly
+        """
+        if not settings.job_ann_enabled or not limit or len(jobs) < settings.job_ann_min_jobs:
+            return None
+        
+        index = await self._get_ann_index()
+        if index is None:
+            return None
+        
+        slots, missing = self.embedding_store.lookup_slots(fingerprints)
+        # Jobs stored after the index was built are scored exactly
+        in_cells = np.isin(slots, index.search(user_vector, settings.job_ann_n_probe))
+        positions = np.flatnonzero(in_cells | (slots >= index.size))
+        if len(positions) + len(missing) < limit:
+            return None
+        
+        vectors = self.embedding_store.vectors_at(slots[positions])
+        if missing:
+            missing_vectors = await self._encode_jobs(
+                [jobs[i] for i in missing], [fingerprints[i] for i in missing]
+            )
+            positions = np.concatenate([positions, missing])
+            vectors = np.concatenate([vectors, missing_vectors])
+        return positions, vectors
+    
+    async def _get_ann_index(self) -> Optional[JobVectorIVFIndex]:
+        """The IVF index for the store's current ingestion generation, rebuilt when it moves on."""
+        generation, vectors = self.embedding_store.snapshot()
+        if vectors is None:
+            return None
+        if self._ann_index is None or self._ann_index_generation != generation:
+            async with self._ann_index_lock:
+                if self._ann_index is None or self._ann_index_generation != generation:
+                    loop = asyncio.get_event_loop()
+                    self._ann_index = await loop.run_in_executor(
+                        None, JobVectorIVFIndex, vectors
+                    )
+                    self._ann_index_generation = generation
+        return self._ann_index
+    
+    async def index_jobs(self, jobs: List[Dict[str, Any]]) -> int:
+        """
+        Batch-encode newly ingested jobs into the embedding store, or refit the
+        TF-IDF corpus model on deployments without sentence-transformers.
+        
+        New jobs start a new store generation, and the ANN index is rebuilt
+        for it here rather than on the request path.
+        
+        Returns:
+            Number of jobs that had to be encoded
+        """
+        if not jobs:
+            return 0
+        
+        fingerprints = [self._job_fingerprint(job) for job in jobs]
+        
+        # Ingestion runs in the background, so it can wait for the model
+        if not await self.load_embedding_model() or not self.embedding_store:
+            model = self._tfidf_model
+            if SKLEARN_AVAILABLE and (
+                model is None or any(fingerprint not in model.rows for fingerprint in fingerprints)
+            ):
+                await self.fit_tfidf_corpus(jobs, fingerprints)
+            return 0
+        
+        _, missing = self.embedding_store.lookup_slots(fingerprints)
+        if missing:
+            await self._encode_jobs(
+                [jobs[i] for i in missing],
+                [fingerprints[i] for i in missing],
+                bump_generation=True
+            )
+        if settings.job_ann_enabled and self.embedding_store.size >= settings.job_ann_min_jobs:
+            await self._get_ann_index()
+        return len(missing)
+    
+    def _encode_texts(self, texts: List[str]) -> "np.ndarray":
+        """Encode texts into L2-normalised float32 vectors (blocking)."""
+        return self.embedding_model.encode(
+            texts,
+            batch_size=EMBEDDING_BATCH_SIZE,
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        ).astype(np.float32)
+    
+    def _job_fingerprint(self, job: Dict[str, Any]) -> str:
+        """Fingerprint for a job, computed from its text when the feed did not supply one."""
+        return job.get('fingerprint') or compute_job_fingerprint({
+            **job,
+            'description': self.get_job_text(job)
+        })
+    
     async def calculate_job_similarity_tfidf(
         self, 
         user_profile: str, 
-        jobs: List[Dict[str, Any]]
+        jobs: List[Dict[str, Any]],
+        limit: Optional[int] = None
     ) -> List[Tuple[Dict[str, Any], float]]:
-        """Fallback job similarity using TF-IDF (completely free)."""
-        if not user_profile.strip():
+        """Fallback job similarity using TF-IDF (completely free), returning the top ``limit`` jobs."""
+        if not SKLEARN_AVAILABLE or not user_profile.strip() or not jobs:
             return []
         
         try:
-            # Prepare texts
-            job_texts = [self.get_job_text(job) for job in jobs]
-            all_texts = [user_profile] + job_texts
-            
-            # Remove empty texts
-            valid_texts = [text for text in all_texts if text.strip()]
-            if len(valid_texts) < 2:
+            # Fit lazily if no ingestion cycle has produced a corpus model yet
+            model = self._tfidf_model or await self.fit_tfidf_corpus(jobs)
+            if model is None:
                 return []
             
-            # Calculate TF-IDF vectors
-            tfidf_matrix = self.tfidf_vectorizer.fit_transform(valid_texts)
-            
-            # Calculate similarities
-            user_vector = tfidf_matrix[0]
-            job_vectors = tfidf_matrix[1:]
-            
-            similarities = cosine_similarity(user_vector, job_vectors)[0]
-            
-            # Pair jobs with similarity scores
-            job_scores = list(zip(jobs, similarities))
+            fingerprints = [self._job_fingerprint(job) for job in jobs]
+            # Texts are only needed for jobs the model has not seen
+            texts = [
+                self.get_job_text(job) if fingerprint not in model.rows else ""
+                for job, fingerprint in zip(jobs, fingerprints)
+            ]
             
-            # Sort by similarity (highest first)
-            job_scores.sort(key=lambda x: x[1], reverse=True)
+            loop = asyncio.get_event_loop()
+            similarities = await loop.run_in_executor(
+                None, model.score, user_profile, fingerprints, texts
+            )
             
-            return job_scores
+            # Select the top-k without sorting the whole list
+            top = top_k_indices(similarities, limit)
+            return [(jobs[i], float(similarities[i])) for i in top]
             
         except Exception as e:
             print(f"WARNING: Error in TF-IDF similarity: {e}")
             return []
     
+    async def fit_tfidf_corpus(
+        self,
+        jobs: List[Dict[str, Any]],
+        fingerprints: Optional[List[str]] = None
+    ) -> Optional[TfidfCorpusModel]:
+        """Fit a fresh TF-IDF model over the job corpus; ingestion decides when one is due."""
+        if not SKLEARN_AVAILABLE or not jobs:
+            return self._tfidf_model
+        
+        if fingerprints is None:
+            fingerprints = [self._job_fingerprint(job) for job in jobs]
+        texts = [self.get_job_text(job) for job in jobs]
+        
+        def fit() -> TfidfCorpusModel:
+            vectorizer = TfidfVectorizer(
+                max_features=1000,
+                stop_words='english',
+                ngram_range=(1, 2)
+            )
+            matrix = vectorizer.fit_transform(texts).tocsr()
+            rows = {fingerprint: row for row, fingerprint in enumerate(fingerprints)}
+            return TfidfCorpusModel(vectorizer, matrix, rows)
+        
+        try:
+            loop = asyncio.get_event_loop()
+            self._tfidf_model = await loop.run_in_executor(None, fit)
+        except ValueError as e:
+            # e.g. an empty vocabulary when every job text is blank
+            print(f"WARNING: Could not fit TF-IDF corpus: {e}")
+        return self._tfidf_model
+    
     async def get_job_recommendations(
         self, 
         db: AsyncSession, 
@@ -250,20 +594,21 @@ class JobMatchingService:
         
         # Calculate similarities using best available method
         if SENTENCE_TRANSFORMERS_AVAILABLE and self.embedding_model:
-            job_scores = await self.calculate_job_similarity_embeddings(user_profile, jobs)
+            job_scores = await self.calculate_job_similarity_embeddings(user_profile, jobs, limit)
             method = "Semantic Embeddings"
         else:
-            job_scores = await self.calculate_job_similarity_tfidf(user_profile, jobs)
+            job_scores = await self.calculate_job_similarity_tfidf(user_profile, jobs, limit)
             method = "TF-IDF"
         
         # Format recommendations
         recommendations = []
-        for job, score in job_scores[:limit]:
+        for job, score in job_scores:
             match_reasons = self._generate_match_reasons(user_profile, job, score)
             
             recommendations.append(JobRecommendationResponse(
                 job=job,
-                similarity_score=float(score),
+                # Cosine similarity can dip below zero; the schema expects 0-1
+                similarity_score=min(max(float(score), 0.0), 1.0),
                 match_reasons=match_reasons,
                 matching_method=method
             ))
@@ -372,7 +717,7 @@ class JobMatchingService:
         """Get information about available matching capabilities."""
         return {
             "sentence_transformers_available": self.sentence_transformers_loaded,
-            "embedding_model": "all-MiniLM-L6-v2" if self.embedding_model else None,
+            "embedding_model": EMBEDDING_MODEL_NAME if self.embedding_model else None,
             "fallback_method": "TF-IDF with scikit-learn",
             "features": [
                 "Semantic similarity matching",
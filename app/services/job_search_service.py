@@ -3,14 +3,150 @@ Real job search API integration service with smart matching.
 """
 import aiohttp
 import asyncio
-from typing import List, Dict, Any, Optional
+import hashlib
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Callable, Awaitable
 from datetime import datetime, timedelta
 import json
 import re
+import time
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
 
+# First retry delay after a failed feed refresh; doubles per consecutive failure
+FEED_RETRY_SECONDS = 30
+
+
+def compute_job_fingerprint(job: Dict[str, Any]) -> str:
+    """
+    Stable content fingerprint for a normalized job.
+
+    Hashes the source, external id, title and company together with a digest of
+    the description, so the same posting always maps to the same value and any
+    edit to its content produces a new one.
+    """
+    description_digest = hashlib.sha256(
+        (job.get('description') or '').encode('utf-8')
+    ).hexdigest()
+    parts = [
+        str(job.get('source') or '').strip().lower(),
+        str(job.get('external_id') or '').strip(),
+        str(job.get('title') or '').strip().lower(),
+        str(job.get('company') or '').strip().lower(),
+        description_digest
+    ]
+    return hashlib.sha256('|'.join(parts).encode('utf-8')).hexdigest()
+
+
+@dataclass
+class JobFeedEntry:
+    """Cached jobs for a single source."""
+    raw_jobs: List[Dict[str, Any]]
+    normalized_jobs: List[Dict[str, Any]]
+    # When the data was last fetched successfully (-inf if never)
+    fetched_at: float = field(default_factory=time.monotonic)
+    # Consecutive failed refreshes, and when the next one may start
+    failures: int = 0
+    retry_at: float = 0.0
+
+
+class JobFeedCache:
+    """
+    Per-source job feed cache shared by every caller in the process.
+
+    Entries younger than ``ttl_seconds`` are served directly. Older entries are
+    still served for ``stale_ttl_seconds`` while one background refresh runs,
+    and concurrent misses for the same source await a single in-flight fetch.
+    A failed refresh keeps the entry's data and age, and the source is not
+    retried until an exponential backoff (capped at ``ttl_seconds``) passes.
+    """
+
+    def __init__(self, ttl_seconds: int, stale_ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self.stale_ttl_seconds = stale_ttl_seconds
+        self._entries: Dict[str, JobFeedEntry] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    async def get(
+        self,
+        source: str,
+        loader: Callable[[], Awaitable[JobFeedEntry]]
+    ) -> JobFeedEntry:
+        """Return the cached entry for a source, loading it if needed."""
+        entry = self._entries.get(source)
+        if entry:
+            now = time.monotonic()
+            if now < entry.retry_at:
+                # The last refresh failed; serve what we have until the backoff passes
+                return entry
+            age = now - entry.fetched_at
+            if age < self.ttl_seconds:
+                return entry
+            if age < self.ttl_seconds + self.stale_ttl_seconds:
+                # Stale-while-revalidate: answer now, refresh in the background
+                self._refresh(source, loader)
+                return entry
+        
+        # Shield so a cancelled caller does not cancel the shared fetch
+        return await asyncio.shield(self._refresh(source, loader))
+
+    def invalidate(self, source: Optional[str] = None) -> None:
+        """Drop one source (or every source) from the cache."""
+        if source is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(source, None)
+
+    def _refresh(
+        self,
+        source: str,
+        loader: Callable[[], Awaitable[JobFeedEntry]]
+    ) -> asyncio.Task:
+        """Start a fetch for a source unless one is already in flight."""
+        task = self._inflight.get(source)
+        if task is None:
+            task = asyncio.create_task(self._load(source, loader))
+            self._inflight[source] = task
+            task.add_done_callback(lambda _: self._inflight.pop(source, None))
+        return task
+
+    async def _load(
+        self,
+        source: str,
+        loader: Callable[[], Awaitable[JobFeedEntry]]
+    ) -> JobFeedEntry:
+        """Fetch a source and store it, keeping the last good data on failure."""
+        previous = self._entries.get(source)
+        try:
+            entry = await loader()
+        except Exception as e:
+            print(f"Error refreshing {source} job feed: {e}")
+            entry = None
+        
+        # Upstream clients swallow errors and return [], so an empty result
+        # while we still hold data is treated as a failed refresh.
+        if entry is None or (previous and not entry.raw_jobs):
+            failures = previous.failures + 1 if previous else 1
+            backoff = min(FEED_RETRY_SECONDS * 2 ** (failures - 1), self.ttl_seconds)
+            entry = JobFeedEntry(
+                previous.raw_jobs if previous else [],
+                previous.normalized_jobs if previous else [],
+                fetched_at=previous.fetched_at if previous else float("-inf"),
+                failures=failures,
+                retry_at=time.monotonic() + backoff
+            )
+        
+        self._entries[source] = entry
+        return entry
+
+
+# Process-wide job feed cache
+job_feed_cache = JobFeedCache(
+    ttl_seconds=settings.job_feed_cache_ttl_seconds,
+    stale_ttl_seconds=settings.job_feed_stale_ttl_seconds
+)
+
 
 class RemoteOKAPI:
     """Integration with RemoteOK job board API."""
@@ -264,56 +400,71 @@ class JobSearchService:
             'indeed': IndeedAPI,
             'crunchbase': CrunchbaseAPI
         }
+        # Shared by every JobSearchService instance in the process
+        self.feed_cache = job_feed_cache
     
     async def fetch_all_pm_jobs(self) -> Dict[str, List[Dict[str, Any]]]:
-        """Fetch project management jobs from all sources."""
-        jobs = {}
-        
+        """Fetch project management jobs from all sources (served from the feed cache)."""
+        entries = await self._get_feed_entries()
+        return {source: entry.raw_jobs for source, entry in entries.items()}
+    
+    async def get_normalized_jobs(self) -> List[Dict[str, Any]]:
+        """Get normalized jobs from all sources (served from the feed cache)."""
+        entries = await self._get_feed_entries()
+        normalized_jobs = []
+        for entry in entries.values():
+            normalized_jobs.extend(entry.normalized_jobs)
+        return normalized_jobs
+    
+    async def _get_feed_entries(self) -> Dict[str, JobFeedEntry]:
+        """Resolve every enabled source through the shared feed cache."""
         # Free APIs (no key required)
-        free_tasks = [
-            self._fetch_remoteok_jobs(),
-            self._fetch_remotive_jobs(),
-            self._fetch_github_jobs()
-        ]
+        fetchers = {
+            'remoteok': self._fetch_remoteok_jobs,
+            'remotive': self._fetch_remotive_jobs,
+            'github': self._fetch_github_jobs
+        }
         
         # Paid APIs (require keys)
-        paid_tasks = []
-        
         linkedin_key = getattr(settings, 'linkedin_rapidapi_key', None)
         if linkedin_key:
-            paid_tasks.append(self._fetch_linkedin_jobs(linkedin_key))
+            fetchers['linkedin'] = lambda: self._fetch_linkedin_jobs(linkedin_key)
         
         indeed_key = getattr(settings, 'indeed_rapidapi_key', None)
         if indeed_key:
-            paid_tasks.append(self._fetch_indeed_jobs(indeed_key))
+            fetchers['indeed'] = lambda: self._fetch_indeed_jobs(indeed_key)
         
         crunchbase_key = getattr(settings, 'crunchbase_api_key', None)
         if crunchbase_key:
-            paid_tasks.append(self._fetch_crunchbase_jobs(crunchbase_key))
-        
-        # Execute all tasks
-        all_tasks = free_tasks + paid_tasks
-        results = await asyncio.gather(*all_tasks, return_exceptions=True)
-        
-        # Process results
-        jobs['remoteok'] = results[0] if len(results) > 0 and not isinstance(results[0], Exception) else []
-        jobs['remotive'] = results[1] if len(results) > 1 and not isinstance(results[1], Exception) else []
-        jobs['github'] = results[2] if len(results) > 2 and not isinstance(results[2], Exception) else []
-        
-        # Add paid API results
-        result_index = 3
-        if linkedin_key and len(results) > result_index:
-            jobs['linkedin'] = results[result_index] if not isinstance(results[result_index], Exception) else []
-            result_index += 1
-        
-        if indeed_key and len(results) > result_index:
-            jobs['indeed'] = results[result_index] if not isinstance(results[result_index], Exception) else []
-            result_index += 1
-        
-        if crunchbase_key and len(results) > result_index:
-            jobs['crunchbase'] = results[result_index] if not isinstance(results[result_index], Exception) else []
-        
-        return jobs
+            fetchers['crunchbase'] = lambda: self._fetch_crunchbase_jobs(crunchbase_key)
+        
+        sources = list(fetchers.keys())
+        results = await asyncio.gather(
+            *[
+                self.feed_cache.get(source, self._make_feed_loader(source, fetchers[source]))
+                for source in sources
+            ],
+            return_exceptions=True
+        )
+        
+        return {
+            source: result if not isinstance(result, Exception) else JobFeedEntry([], [])
+            for source, result in zip(sources, results)
+        }
+    
+    def _make_feed_loader(
+        self,
+        source: str,
+        fetcher: Callable[[], Awaitable[List[Dict[str, Any]]]]
+    ) -> Callable[[], Awaitable[JobFeedEntry]]:
+        """Build a cache loader that fetches a source and normalizes it once."""
+        async def load() -> JobFeedEntry:
+            raw_jobs = await fetcher()
+            return JobFeedEntry(
+                raw_jobs=raw_jobs,
+                normalized_jobs=self.normalize_job_data({source: raw_jobs})
+            )
+        return load
     
     async def _fetch_remoteok_jobs(self) -> List[Dict[str, Any]]:
         """Fetch RemoteOK jobs."""
@@ -348,6 +499,7 @@ class JobSearchService:
             if isinstance(job, dict) and job.get('position'):
                 normalized_jobs.append({
                     'id': f"remoteok_{job.get('id')}",
+                    'external_id': str(job.get('id')),
                     'title': job.get('position', ''),
                     'company': job.get('company', ''),
                     'location': 'Remote',
@@ -372,6 +524,7 @@ class JobSearchService:
         for job in raw_jobs.get('remotive', []):
             normalized_jobs.append({
                 'id': f"remotive_{job.get('id')}",
+                'external_id': str(job.get('id')),
                 'title': job.get('title', ''),
                 'company': job.get('company_name', ''),
                 'location': 'Remote',
@@ -394,6 +547,10 @@ class JobSearchService:
         
         # Add other sources...
         
+        # Fingerprint every job so the catalog and caches can key on content
+        for job in normalized_jobs:
+            job['fingerprint'] = compute_job_fingerprint(job)
+        
         return normalized_jobs
     
     def _extract_requirements(self, description: str) -> str:
@@ -509,33 +666,15 @@ class JobSearchService:
             # Import here to avoid circular imports
             from app.services.job_matching_service import job_matching_service
             
-            # Fetch jobs from all free sources
-            all_jobs = []
-            
-            # Get jobs from free APIs
-            remoteok_jobs = await RemoteOKAPI.fetch_pm_jobs()
-            remotive_jobs = await RemotiveAPI.fetch_pm_jobs()
-            github_jobs = await GitHubJobsAPI.fetch_pm_jobs()
-            
-            # Combine and normalize jobs
-            for job in remoteok_jobs:
-                normalized_job = self._normalize_job_data(job, 'remoteok')
-                all_jobs.append(normalized_job)
-            
-            for job in remotive_jobs:
-                normalized_job = self._normalize_job_data(job, 'remotive')
-                all_jobs.append(normalized_job)
-            
-            for job in github_jobs:
-                normalized_job = self._normalize_job_data(job, 'github')
-                all_jobs.append(normalized_job)
+            # Jobs from all sources, shared with every other caller via the feed cache
+            all_jobs = await self.get_normalized_jobs()
             
             # Remove duplicates based on job title and company
             unique_jobs = []
             seen_jobs = set()
             
             for job in all_jobs:
-                job_key = f"{job.get('position', '')}-{job.get('company', '')}".lower()
+                job_key = f"{job.get('title', '')}-{job.get('company', '')}".lower()
                 if job_key not in seen_jobs:
                     seen_jobs.add(job_key)
                     unique_jobs.append(job)
@@ -550,11 +689,7 @@ class JobSearchService:
         except Exception as e:
             print(f"Error getting personalized recommendations: {e}")
             # Fallback to regular job search
-            jobs_data = await self.fetch_all_pm_jobs()
-            all_jobs = []
-            for source, jobs in jobs_data.items():
-                for job in jobs[:5]:  # Limit fallback
-                    all_jobs.append(self._normalize_job_data(job, source))
+            all_jobs = await self.get_normalized_jobs()
             return all_jobs[:limit]
     
     async def save_job_for_user(
@@ -0,0 +1,517 @@
+"""
+Live leaderboard ranking engine.
+Keeps one sorted score set per metric and time period, fed by gamification
+events, so score updates, rank lookups and page reads cost O(log n) instead of
+re-sorting users. Sets live in Redis ZSETs or, as a single-process stand-in,
+in in-memory indexable skip lists; snapshots are flushed to LeaderboardEntry.
+"""
+import asyncio
+import logging
+import random
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+try:
+    import redis.asyncio as aioredis  # type: ignore
+except ImportError:
+    aioredis = None
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.utils import utc_now
+from app.database.gamification_models import (
+    Leaderboard, LeaderboardEntry, PointTransaction, UserBadge, UserStreak, StreakType
+)
+from app.database.platform_models import UserPoints
+from app.services.points_ledger import points_ledger
+
+logger = logging.getLogger(__name__)
+
+TIME_PERIODS = ("daily", "weekly", "monthly", "all_time")
+POINTS_METRIC = "points"
+BADGES_METRIC = "badges"
+STREAK_METRIC_SUFFIX = "_streak"
+
+REDIS_KEY_PREFIX = "leaderboard:"
+# Period boards outlive their period a little so the last snapshot can be flushed
+PERIOD_KEY_GRACE = timedelta(days=2)
+# Upper bound on one board load from the database
+LOAD_LOCK_SECONDS = 30
+
+_SKIPLIST_MAX_LEVEL = 16
+_SKIPLIST_P = 0.25
+
+
+def streak_metric(streak_type: StreakType) -> str:
+    return f"{streak_type.value}{STREAK_METRIC_SUFFIX}"
+
+
+def period_start(time_period: str, now: datetime) -> Optional[datetime]:
+    """Start of the period containing ``now`` (UTC); None for all-time boards."""
+    day = now.astimezone(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    if time_period == "daily":
+        return day
+    if time_period == "weekly":
+        return day - timedelta(days=day.weekday())
+    if time_period == "monthly":
+        return day.replace(day=1)
+    return None
+
+
+def board_key(metric: str, time_period: str, now: datetime) -> str:
+    """Set name for a metric's board in the period containing ``now``."""
+    # Streaks are a current value, not an accumulation, so they have no periods
+    if metric.endswith(STREAK_METRIC_SUFFIX):
+        time_period = "all_time"
+    start = period_start(time_period, now)
+    suffix = start.strftime("%Y-%m-%d") if start else "all"
+    return f"{metric}:{time_period}:{suffix}"
+
+
+class _SkipNode:
+    __slots__ = ("key", "next", "width")
+
+    def __init__(self, key, height: int):
+        self.key = key
+        self.next: List[Optional["_SkipNode"]] = [None] * height
+        # Bottom-level steps to next[level]; past the last node, to the end
+        self.width = [1] * height
+
+
+class IndexableSkipList:
+    """Skip list of unique, ordered keys with O(log n) insert, remove, rank and index."""
+
+    def __init__(self):
+        self._head = _SkipNode(None, _SKIPLIST_MAX_LEVEL)
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _random_height(self) -> int:
+        height = 1
+        while height < _SKIPLIST_MAX_LEVEL and random.random() < _SKIPLIST_P:
+            height += 1
+        return height
+
+    def _find_chain(self, key) -> Tuple[List[_SkipNode], List[int]]:
+        """Last node before ``key`` on every level, and its position."""
+        chain = [self._head] * _SKIPLIST_MAX_LEVEL
+        positions = [0] * _SKIPLIST_MAX_LEVEL
+        node, position = self._head, 0
+        for level in reversed(range(_SKIPLIST_MAX_LEVEL)):
+            while node.next[level] is not None and node.next[level].key < key:
+                position += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+            positions[level] = position
+        return chain, positions
+
+    def insert(self, key) -> None:
+        chain, positions = self._find_chain(key)
+        position = positions[0]
+        height = self._random_height()
+        node = _SkipNode(key, height)
+        for level in range(height):
+            previous = chain[level]
+            skipped = position - positions[level]
+            node.next[level] = previous.next[level]
+            node.width[level] = previous.width[level] - skipped
+            previous.next[level] = node
+            previous.width[level] = skipped + 1
+        for level in range(height, _SKIPLIST_MAX_LEVEL):
+            chain[level].width[level] += 1
+        self.size += 1
+
+    def remove(self, key) -> None:
+        chain, _ = self._find_chain(key)
+        node = chain[0].next[0]
+        if node is None or node.key != key:
+            raise KeyError(key)
+        for level in range(len(node.next)):
+            previous = chain[level]
+            previous.width[level] += node.width[level] - 1
+            previous.next[level] = node.next[level]
+        for level in range(len(node.next), _SKIPLIST_MAX_LEVEL):
+            chain[level].width[level] -= 1
+        self.size -= 1
+
+    def rank(self, key) -> Optional[int]:
+        """0-based index of ``key``, or None if absent."""
+        chain, positions = self._find_chain(key)
+        node = chain[0].next[0]
+        if node is None or node.key != key:
+            return None
+        return positions[0]
+
+    def slice(self, start: int, count: int) -> list:
+        """Up to ``count`` keys starting at 0-based index ``start``."""
+        if start >= self.size or count <= 0:
+            return []
+        node, position = self._head, 0
+        target = start + 1
+        for level in reversed(range(_SKIPLIST_MAX_LEVEL)):
+            while node.next[level] is not None and position + node.width[level] <= target:
+                position += node.width[level]
+                node = node.next[level]
+        keys = []
+        while node is not None and len(keys) < count:
+            keys.append(node.key)
+            node = node.next[0]
+        return keys
+
+
+class MemoryScoreSets:
+    """Per-process sorted sets: highest score first, ties by lower user id."""
+
+    def __init__(self):
+        self._scores: Dict[str, Dict[int, float]] = {}
+        self._orders: Dict[str, IndexableSkipList] = {}
+        self._load_locks: Dict[str, asyncio.Lock] = {}
+
+    async def exists(self, key: str) -> bool:
+        return key in self._scores
+
+    @asynccontextmanager
+    async def load_lock(self, key: str):
+        async with self._load_locks.setdefault(key, asyncio.Lock()):
+            yield
+
+    async def replace(self, key: str, scores: Dict[int, float]) -> None:
+        order = IndexableSkipList()
+        for member, score in scores.items():
+            order.insert((-score, member))
+        self._scores[key] = dict(scores)
+        self._orders[key] = order
+
+    async def incr(self, key: str, member: int, delta: float) -> None:
+        current = self._scores.get(key, {}).get(member, 0.0)
+        await self.set(key, member, current + delta)
+
+    async def set(self, key: str, member: int, score: float) -> None:
+        scores = self._scores.setdefault(key, {})
+        order = self._orders.setdefault(key, IndexableSkipList())
+        if member in scores:
+            order.remove((-scores[member], member))
+        scores[member] = score
+        order.insert((-score, member))
+
+    async def rank(self, key: str, member: int) -> Optional[Tuple[int, float]]:
+        scores = self._scores.get(key)
+        if not scores or member not in scores:
+            return None
+        return self._orders[key].rank((-scores[member], member)), scores[member]
+
+    async def page(self, key: str, start: int, count: int) -> List[Tuple[int, float]]:
+        order = self._orders.get(key)
+        if order is None:
+            return []
+        return [(member, -negated) for negated, member in order.slice(start, count)]
+
+    async def drop_expired(self, live_keys: set) -> None:
+        for key in [key for key in self._scores if key not in live_keys]:
+            self._scores.pop(key, None)
+            self._orders.pop(key, None)
+
+
+class RedisScoreSets:
+    """Sorted sets shared by all workers through Redis ZSETs."""
+
+    # Deletes the lock only if this worker still holds it
+    RELEASE_SCRIPT = """
+    if redis.call('GET', KEYS[1]) == ARGV[1] then
+        return redis.call('DEL', KEYS[1])
+    end
+    return 0
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self._release = client.register_script(self.RELEASE_SCRIPT)
+        self._local_locks: Dict[str, asyncio.Lock] = {}
+
+    async def exists(self, key: str) -> bool:
+        return bool(await self.client.exists(REDIS_KEY_PREFIX + "loaded:" + key))
+
+    @asynccontextmanager
+    async def load_lock(self, key: str):
+        """Let one worker at a time load a board, so a second load can't wipe increments."""
+        lock_key = REDIS_KEY_PREFIX + "loading:" + key
+        token = uuid.uuid4().hex
+        async with self._local_locks.setdefault(key, asyncio.Lock()):
+            while not await self.client.set(lock_key, token, nx=True, ex=LOAD_LOCK_SECONDS):
+                await asyncio.sleep(0.05)
+            try:
+                yield
+            finally:
+                await self._release(keys=[lock_key], args=[token])
+
+    async def replace(self, key: str, scores: Dict[int, float]) -> None:
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.delete(REDIS_KEY_PREFIX + key)
+            if scores:
+                pipe.zadd(REDIS_KEY_PREFIX + key, {str(member): score for member, score in scores.items()})
+            pipe.set(REDIS_KEY_PREFIX + "loaded:" + key, 1)
+            if not key.endswith(":all"):
+                ttl = int(timedelta(days=31).total_seconds() + PERIOD_KEY_GRACE.total_seconds())
+                pipe.expire(REDIS_KEY_PREFIX + key, ttl)
+                pipe.expire(REDIS_KEY_PREFIX + "loaded:" + key, ttl)
+            await pipe.execute()
+
+    async def incr(self, key: str, member: int, delta: float) -> None:
+        await self.client.zincrby(REDIS_KEY_PREFIX + key, delta, str(member))
+
+    async def set(self, key: str, member: int, score: float) -> None:
+        await self.client.zadd(REDIS_KEY_PREFIX + key, {str(member): score})
+
+    async def rank(self, key: str, member: int) -> Optional[Tuple[int, float]]:
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.zrevrank(REDIS_KEY_PREFIX + key, str(member))
+            pipe.zscore(REDIS_KEY_PREFIX + key, str(member))
+            rank, score = await pipe.execute()
+        if rank is None:
+            return None
+        return int(rank), float(score)
+
+    async def page(self, key: str, start: int, count: int) -> List[Tuple[int, float]]:
+        if count <= 0:
+            return []
+        rows = await self.client.zrevrange(REDIS_KEY_PREFIX + key, start, start + count - 1, withscores=True)
+        return [(int(member), float(score)) for member, score in rows]
+
+    async def drop_expired(self, live_keys: set) -> None:
+        # Period keys expire on their own
+        return None
+
+
+class LeaderboardEngine:
+    """
+    Event-fed leaderboards.
+
+    Boards are loaded from the database the first time they are touched and
+    then kept up to date by ``record_*`` calls; ``flush_snapshots`` writes the
+    top of each configured Leaderboard to LeaderboardEntry with rank changes.
+    """
+
+    def __init__(self, score_sets, redis_client=None):
+        self.score_sets = score_sets
+        self._redis = redis_client
+
+    async def record_points(self, db: AsyncSession, user_id: int, points: int) -> None:
+        """Add earned points to every period's points board."""
+        now = utc_now()
+        for time_period in TIME_PERIODS:
+            await self._apply(db, board_key(POINTS_METRIC, time_period, now), user_id, delta=points)
+
+    async def record_badge(self, db: AsyncSession, user_id: int) -> None:
+        """Count an earned badge on every period's badges board."""
+        now = utc_now()
+        for time_period in TIME_PERIODS:
+            await self._apply(db, board_key(BADGES_METRIC, time_period, now), user_id, delta=1)
+
+    async def record_streak(
+        self, db: AsyncSession, user_id: int, streak_type: StreakType, current_streak: int
+    ) -> None:
+        """Set a user's current streak on that streak type's board."""
+        key = board_key(streak_metric(streak_type), "all_time", utc_now())
+        await self._apply(db, key, user_id, value=current_streak)
+
+    async def get_page(
+        self, db: AsyncSession, metric: str, time_period: str, skip: int, limit: int
+    ) -> List[Tuple[int, int, float]]:
+        """(rank, user_id, score) rows for one page of a board, rank 1 first."""
+        key = board_key(metric, time_period, utc_now())
+        await self._ensure_loaded(db, key)
+        return [
+            (skip + offset + 1, member, score)
+            for offset, (member, score) in enumerate(await self.score_sets.page(key, skip, limit))
+        ]
+
+    async def get_position(
+        self, db: AsyncSession, metric: str, time_period: str, user_id: int
+    ) -> Optional[Tuple[int, float]]:
+        """(rank, score) of a user, or None if not on the board."""
+        key = board_key(metric, time_period, utc_now())
+        await self._ensure_loaded(db, key)
+        position = await self.score_sets.rank(key, user_id)
+        if position is None:
+            return None
+        rank, score = position
+        return rank + 1, score
+
+    def supports(self, metric: str) -> bool:
+        return metric in (POINTS_METRIC, BADGES_METRIC) or any(
+            metric == streak_metric(streak_type) for streak_type in StreakType
+        )
+
+    @property
+    def shared(self) -> bool:
+        """Whether every worker ranks from the same boards."""
+        return self._redis is not None
+
+    async def flush_snapshots(self, db: AsyncSession) -> int:
+        """Write the current top of every active leaderboard; returns boards flushed."""
+        # Per-process boards diverge between workers; writing them over the
+        # shared table would scramble ranks and rank changes
+        if not self.shared:
+            raise RuntimeError("Leaderboard snapshots require the Redis leaderboard backend")
+
+        # One worker flushes per interval
+        acquired = await self._redis.set(
+            REDIS_KEY_PREFIX + "flush-lock", 1, nx=True,
+            ex=max(settings.leaderboard_snapshot_interval_seconds - 1, 1)
+        )
+        if not acquired:
+            return 0
+
+        result = await db.execute(select(Leaderboard).where(Leaderboard.is_active == True))
+        leaderboards = [lb for lb in result.scalars().all() if self.supports(lb.metric_type)]
+        now = utc_now()
+        live_keys = set()
+
+        for leaderboard in leaderboards:
+            key = board_key(leaderboard.metric_type, leaderboard.time_period, now)
+            live_keys.add(key)
+            rows = await self.get_page(
+                db, leaderboard.metric_type, leaderboard.time_period, 0, leaderboard.max_entries
+            )
+
+            existing_result = await db.execute(
+                select(LeaderboardEntry).where(LeaderboardEntry.leaderboard_id == leaderboard.id)
+            )
+            existing = {entry.user_id: entry for entry in existing_result.scalars().all()}
+            ranked_users = set()
+
+            for rank, user_id, score in rows:
+                ranked_users.add(user_id)
+                entry = existing.get(user_id)
+                if entry is None:
+                    db.add(LeaderboardEntry(
+                        leaderboard_id=leaderboard.id,
+                        user_id=user_id,
+                        rank=rank,
+                        score=score,
+                        rank_change=0
+                    ))
+                    continue
+                entry.previous_rank = entry.rank
+                entry.rank_change = entry.rank - rank
+                entry.rank = rank
+                entry.score = score
+
+            dropped = [user_id for user_id in existing if user_id not in ranked_users]
+            if dropped:
+                await db.execute(
+                    delete(LeaderboardEntry).where(and_(
+                        LeaderboardEntry.leaderboard_id == leaderboard.id,
+                        LeaderboardEntry.user_id.in_(dropped)
+                    ))
+                )
+
+            leaderboard.last_updated = now
+
+        await db.commit()
+        await self.score_sets.drop_expired(live_keys | self._current_keys(now))
+        return len(leaderboards)
+
+    async def run_snapshot_loop(self, interval_seconds: int) -> None:
+        """Flush snapshots forever; started from the application lifespan."""
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                async with AsyncSessionLocal() as db:
+                    await self.flush_snapshots(db)
+            except Exception as e:
+                logger.error(f"Error flushing leaderboard snapshots: {e}")
+
+    def _current_keys(self, now: datetime) -> set:
+        metrics = [POINTS_METRIC, BADGES_METRIC] + [streak_metric(t) for t in StreakType]
+        return {board_key(metric, period, now) for metric in metrics for period in TIME_PERIODS}
+
+    async def _apply(
+        self,
+        db: AsyncSession,
+        key: str,
+        user_id: int,
+        delta: Optional[float] = None,
+        value: Optional[float] = None
+    ) -> None:
+        # A board loaded now already includes the event: badges and streaks
+        # are committed before they are recorded, and point boards flush the
+        # ledger before loading
+        if not await self._ensure_loaded(db, key):
+            return
+        if delta is not None:
+            await self.score_sets.incr(key, user_id, delta)
+        else:
+            await self.score_sets.set(key, user_id, value)
+
+    async def _ensure_loaded(self, db: AsyncSession, key: str) -> bool:
+        """Load a board from the database if needed; False if this call loaded it."""
+        if await self.score_sets.exists(key):
+            return True
+        async with self.score_sets.load_lock(key):
+            if await self.score_sets.exists(key):
+                return True
+            # Buffered awards are not in the tables yet; write them first so
+            # the board neither misses them nor drops the triggering award
+            if key.startswith(POINTS_METRIC + ":"):
+                await points_ledger.flush_all()
+            await self.score_sets.replace(key, await self._load_scores(db, key))
+        return False
+
+    async def _load_scores(self, db: AsyncSession, key: str) -> Dict[int, float]:
+        """Rebuild a board's scores from the source tables."""
+        metric, time_period, suffix = key.split(":")
+        start = None
+        if suffix != "all":
+            start = datetime.strptime(suffix, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+
+        if metric == POINTS_METRIC and start is None:
+            query = select(UserPoints.user_id, UserPoints.total_points).where(UserPoints.total_points > 0)
+        elif metric == POINTS_METRIC:
+            query = (
+                select(PointTransaction.user_id, func.sum(PointTransaction.points))
+                .where(and_(
+                    PointTransaction.transaction_type == "earned",
+                    PointTransaction.created_at >= start
+                ))
+                .group_by(PointTransaction.user_id)
+            )
+        elif metric == BADGES_METRIC:
+            conditions = [UserBadge.is_completed == True]
+            if start is not None:
+                conditions.append(UserBadge.earned_at >= start)
+            query = (
+                select(UserBadge.user_id, func.count(UserBadge.id))
+                .where(and_(*conditions))
+                .group_by(UserBadge.user_id)
+            )
+        else:
+            streak_type = StreakType(metric[:-len(STREAK_METRIC_SUFFIX)])
+            query = select(UserStreak.user_id, UserStreak.current_streak).where(and_(
+                UserStreak.streak_type == streak_type,
+                UserStreak.current_streak > 0
+            ))
+
+        result = await db.execute(query)
+        return {user_id: float(score) for user_id, score in result.all()}
+
+
+def create_leaderboard_engine() -> LeaderboardEngine:
+    """Build the engine on the configured backend."""
+    if settings.leaderboard_backend == "redis":
+        if aioredis is None:
+            raise RuntimeError("redis package is required for the Redis leaderboard backend")
+        client = aioredis.from_url(settings.redis_url, decode_responses=True)
+        return LeaderboardEngine(RedisScoreSets(client), redis_client=client)
+    return LeaderboardEngine(MemoryScoreSets())
+
+
+# Global engine shared by every GamificationService instance in the process
+leaderboard_engine = create_leaderboard_engine()
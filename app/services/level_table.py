@@ -0,0 +1,97 @@
+"""
+Level thresholds and titles.
+Cumulative XP needed for each level is precomputed once and looked up by
+binary search, so a level for any point total costs O(log n) instead of
+walking the curve level by level. Shared by gamification and dashboard code.
+"""
+from bisect import bisect_right
+from typing import Callable, List, Sequence, Tuple
+
+# (first level, title), ascending
+LEVEL_TITLES: Tuple[Tuple[int, str], ...] = (
+    (1, "Aspiring PM"),
+    (5, "PM Trainee"),
+    (10, "PM Associate"),
+    (20, "Junior PM"),
+    (30, "Project Manager"),
+    (40, "Senior PM"),
+    (50, "PM Master"),
+)
+
+
+def xp_curve(level: int) -> int:
+    """Total XP required to reach a specific level."""
+    return level * 100 + (level - 1) * 50  # Progressive XP requirement
+
+
+class LevelTable:
+    """
+    Precomputed cumulative XP thresholds for an increasing XP curve.
+
+    The table starts with ``initial_levels`` entries and is extended on
+    demand, so totals beyond it still resolve to the right level.
+    """
+
+    def __init__(
+        self,
+        curve: Callable[[int], int],
+        titles: Sequence[Tuple[int, str]],
+        initial_levels: int = 200
+    ):
+        self.curve = curve
+        self._title_levels = [level for level, _ in titles]
+        self._titles = [title for _, title in titles]
+        # _thresholds[i] is the XP required to reach level i + 2
+        self._thresholds: List[int] = []
+        self._extend(initial_levels)
+
+    def _extend(self, levels: int) -> None:
+        start = len(self._thresholds) + 2
+        self._thresholds.extend(self.curve(level) for level in range(start, start + levels))
+
+    def _cover(self, total_points: int) -> None:
+        while total_points >= self._thresholds[-1]:
+            self._extend(len(self._thresholds))
+
+    def xp_for_level(self, level: int) -> int:
+        """Total XP required to reach ``level``."""
+        if level < 2:
+            return self.curve(level)
+        while level - 2 >= len(self._thresholds):
+            self._extend(len(self._thresholds))
+        return self._thresholds[level - 2]
+
+    def level_for_points(self, total_points: int, current_level: int = 1) -> int:
+        """Highest level reached with ``total_points``; never below ``current_level``."""
+        self._cover(total_points)
+        return max(current_level, bisect_right(self._thresholds, total_points) + 1)
+
+    def points_to_next_level(self, total_points: int, level: int) -> int:
+        return self.xp_for_level(level + 1) - total_points
+
+    def progress_percent(self, total_points: int, level: int) -> int:
+        """Progress from ``level`` towards the next level, 0-100."""
+        floor = self.xp_for_level(level) if level > 1 else 0
+        span = self.xp_for_level(level + 1) - floor
+        return max(0, min(100, (total_points - floor) * 100 // span))
+
+    def title_for_level(self, level: int) -> str:
+        index = bisect_right(self._title_levels, level) - 1
+        return self._titles[max(index, 0)]
+
+    def rows(self, max_points: int) -> List[Tuple[int, int, int, str]]:
+        """(level, min_points, next_level_points, title) for every level up to ``max_points``."""
+        self._cover(max_points)
+        rows = []
+        floor = 0
+        for index, threshold in enumerate(self._thresholds):
+            level = index + 1
+            rows.append((level, floor, threshold, self.title_for_level(level)))
+            if threshold > max_points:
+                break
+            floor = threshold
+        return rows
+
+
+# Global table for the platform's XP curve
+level_table = LevelTable(xp_curve, LEVEL_TITLES)
@@ -4,7 +4,6 @@ OTP (One-Time Password) service for authentication and verification.
 
 import random
 import string
-from datetime import datetime, timedelta
 from typing import Dict, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
@@ -12,14 +11,22 @@ from sqlalchemy.future import select
 from app.core.config import settings
 from app.services.email_service import email_service
 from app.services.sms_service import sms_service
+from app.services.otp_store import OTPStore, InMemoryOTPStore, RedisOTPStore
+
+
+def create_otp_store() -> OTPStore:
+    """Build the configured OTP backend."""
+    if settings.otp_store_backend == "redis":
+        return RedisOTPStore.from_url(settings.redis_url)
+    return InMemoryOTPStore(max_entries=settings.otp_memory_max_entries)
 
 
 class OTPService:
     """Service for handling OTP generation, storage, and verification."""
     
-    def __init__(self):
-        # In-memory storage for OTPs (in production, use Redis or database)
-        self._otp_storage: Dict[str, Dict] = {}
+    def __init__(self, store: Optional[OTPStore] = None):
+        # Redis in multi-worker deployments so any worker can verify a code
+        self.store = store or create_otp_store()
     
     def generate_otp(self, length: int = 6) -> str:
         """
@@ -33,7 +40,7 @@ class OTPService:
         """
         return ''.join(random.choices(string.digits, k=length))
     
-    def store_otp(
+    async def store_otp(
         self, 
         identifier: str, 
         otp: str, 
@@ -49,17 +56,9 @@ class OTPService:
             purpose: Purpose of the OTP (verification, reset, etc.)
             expires_in_minutes: OTP expiration time in minutes
         """
-        expires_at = datetime.utcnow() + timedelta(minutes=expires_in_minutes)
-        
-        self._otp_storage[identifier] = {
-            "otp": otp,
-            "purpose": purpose,
-            "expires_at": expires_at,
-            "created_at": datetime.utcnow(),
-            "attempts": 0
-        }
+        await self.store.save(identifier, otp, purpose, ttl_seconds=expires_in_minutes * 60)
     
-    def verify_otp(
+    async def verify_otp(
         self, 
         identifier: str, 
         otp: str, 
@@ -78,31 +77,7 @@ class OTPService:
         Returns:
             True if OTP is valid, False otherwise
         """
-        stored_data = self._otp_storage.get(identifier)
-        
-        if not stored_data:
-            return False
-        
-        # Check if too many attempts
-        if stored_data["attempts"] >= max_attempts:
-            self._otp_storage.pop(identifier, None)
-            return False
-        
-        # Increment attempts
-        stored_data["attempts"] += 1
-        
-        # Check expiration
-        if datetime.utcnow() > stored_data["expires_at"]:
-            self._otp_storage.pop(identifier, None)
-            return False
-        
-        # Check purpose and OTP
-        if stored_data["purpose"] != purpose or stored_data["otp"] != otp:
-            return False
-        
-        # Valid OTP - remove from storage
-        self._otp_storage.pop(identifier, None)
-        return True
+        return await self.store.verify(identifier, otp, purpose, max_attempts)
     
     async def send_email_otp(
         self, 
@@ -122,7 +97,7 @@ class OTPService:
             Generated OTP (for testing purposes)
         """
         otp = self.generate_otp()
-        self.store_otp(email, otp, purpose)
+        await self.store_otp(email, otp, purpose)
         
         # Determine email template based on purpose
         if purpose == "verification":
@@ -188,7 +163,7 @@ class OTPService:
             Generated OTP (for testing purposes)
         """
         otp = self.generate_otp()
-        self.store_otp(phone_number, otp, purpose)
+        await self.store_otp(phone_number, otp, purpose)
         
         try:
             # Send SMS using Termii SMS service
@@ -210,17 +185,11 @@ class OTPService:
         return otp
     
     def cleanup_expired_otps(self) -> None:
-        """Remove expired OTPs from storage."""
-        current_time = datetime.utcnow()
-        expired_keys = [
-            key for key, data in self._otp_storage.items()
-            if current_time > data["expires_at"]
-        ]
-        
-        for key in expired_keys:
-            self._otp_storage.pop(key, None)
+        """Remove expired OTPs from storage (Redis expires them on its own)."""
+        if isinstance(self.store, InMemoryOTPStore):
+            self.store.sweep()
     
-    def get_otp_info(self, identifier: str) -> Optional[Dict]:
+    async def get_otp_info(self, identifier: str) -> Optional[Dict]:
         """
         Get OTP information for debugging/testing.
         
@@ -230,7 +199,7 @@ class OTPService:
         Returns:
             OTP information or None if not found
         """
-        return self._otp_storage.get(identifier)
+        return await self.store.get(identifier)
 
 
 # Global OTP service instance
@@ -0,0 +1,177 @@
+"""
+Storage backends for one-time passwords.
+The Redis backend shares OTPs across workers with native key expiry and an
+atomic verify script; the in-memory backend is a bounded, expiry-sweeping
+stand-in for single-process deployments and tests.
+"""
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+try:
+    import redis.asyncio as aioredis  # type: ignore
+except ImportError:
+    aioredis = None
+
+OTP_KEY_PREFIX = "otp:"
+
+# Atomically check and consume an OTP. Mirrors the in-memory rules: a record
+# that has used up its attempts is deleted, every check counts as an attempt,
+# and a matching code is consumed.
+# KEYS[1] = otp key; ARGV = otp, purpose, max_attempts
+VERIFY_OTP_SCRIPT = """
+local data = redis.call('HMGET', KEYS[1], 'otp', 'purpose', 'attempts')
+if not data[1] then
+    return 0
+end
+if tonumber(data[3]) >= tonumber(ARGV[3]) then
+    redis.call('DEL', KEYS[1])
+    return 0
+end
+if data[1] == ARGV[1] and data[2] == ARGV[2] then
+    redis.call('DEL', KEYS[1])
+    return 1
+end
+redis.call('HINCRBY', KEYS[1], 'attempts', 1)
+return 0
+"""
+
+
+class OTPStore:
+    """Interface for OTP storage backends."""
+
+    async def save(self, identifier: str, otp: str, purpose: str, ttl_seconds: int) -> None:
+        """Store an OTP for an identifier, replacing any previous one."""
+        raise NotImplementedError
+
+    async def verify(self, identifier: str, otp: str, purpose: str, max_attempts: int) -> bool:
+        """Check an OTP, counting the attempt and consuming the OTP on success."""
+        raise NotImplementedError
+
+    async def get(self, identifier: str) -> Optional[Dict]:
+        """Stored OTP record for an identifier, if it has not expired."""
+        raise NotImplementedError
+
+
+class InMemoryOTPStore(OTPStore):
+    """
+    Per-process OTP store with a hard size bound.
+
+    Records are kept in insertion order, so with a shared TTL the oldest
+    entries expire first: writes sweep expired records off the front and then
+    evict the oldest live ones if the store is still over capacity.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._records: "OrderedDict[str, Dict]" = OrderedDict()
+
+    async def save(self, identifier: str, otp: str, purpose: str, ttl_seconds: int) -> None:
+        now = time.time()
+        self._records.pop(identifier, None)
+        self._records[identifier] = {
+            "otp": otp,
+            "purpose": purpose,
+            "expires_at": now + ttl_seconds,
+            "created_at": now,
+            "attempts": 0
+        }
+        self.sweep(now)
+        while len(self._records) > self.max_entries:
+            self._records.popitem(last=False)
+
+    async def verify(self, identifier: str, otp: str, purpose: str, max_attempts: int) -> bool:
+        record = self._records.get(identifier)
+        if not record:
+            return False
+
+        # Check if too many attempts
+        if record["attempts"] >= max_attempts:
+            self._records.pop(identifier, None)
+            return False
+
+        record["attempts"] += 1
+
+        # Check expiration
+        if time.time() > record["expires_at"]:
+            self._records.pop(identifier, None)
+            return False
+
+        if record["purpose"] != purpose or record["otp"] != otp:
+            return False
+
+        # Valid OTP - remove from storage
+        self._records.pop(identifier, None)
+        return True
+
+    async def get(self, identifier: str) -> Optional[Dict]:
+        record = self._records.get(identifier)
+        if record and time.time() > record["expires_at"]:
+            self._records.pop(identifier, None)
+            return None
+        return record
+
+    def sweep(self, now: Optional[float] = None) -> None:
+        """Drop expired records from the front of the store."""
+        now = now if now is not None else time.time()
+        while self._records:
+            identifier, record = next(iter(self._records.items()))
+            if record["expires_at"] > now:
+                break
+            self._records.pop(identifier)
+
+
+class RedisOTPStore(OTPStore):
+    """
+    OTP store shared by all workers through Redis.
+
+    Each OTP is a hash with a TTL, so expired codes disappear on their own;
+    verification runs as one Lua script, so concurrent attempts on different
+    workers cannot race past the attempt limit.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self._verify_script = client.register_script(VERIFY_OTP_SCRIPT)
+
+    @classmethod
+    def from_url(cls, redis_url: str) -> "RedisOTPStore":
+        if aioredis is None:
+            raise RuntimeError("redis package is required for the Redis OTP store")
+        return cls(aioredis.from_url(redis_url, decode_responses=True))
+
+    async def save(self, identifier: str, otp: str, purpose: str, ttl_seconds: int) -> None:
+        key = OTP_KEY_PREFIX + identifier
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.delete(key)
+            pipe.hset(key, mapping={
+                "otp": otp,
+                "purpose": purpose,
+                "created_at": time.time(),
+                "attempts": 0
+            })
+            pipe.expire(key, ttl_seconds)
+            await pipe.execute()
+
+    async def verify(self, identifier: str, otp: str, purpose: str, max_attempts: int) -> bool:
+        result = await self._verify_script(
+            keys=[OTP_KEY_PREFIX + identifier],
+            args=[otp, purpose, max_attempts]
+        )
+        return bool(int(result))
+
+    async def get(self, identifier: str) -> Optional[Dict]:
+        key = OTP_KEY_PREFIX + identifier
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hgetall(key)
+            pipe.ttl(key)
+            record, ttl = await pipe.execute()
+        if not record:
+            return None
+        return {
+            "otp": record["otp"],
+            "purpose": record["purpose"],
+            "expires_at": time.time() + max(int(ttl), 0),
+            "created_at": float(record["created_at"]),
+            "attempts": int(record["attempts"])
+        }
@@ -0,0 +1,443 @@
+"""
+Write-behind points ledger.
+Buffers point awards per user and applies them in batches: one bulk insert of
+PointTransaction rows and one ``total_points = total_points + :delta`` update
+per user, instead of a read-modify-write and commit for every award. Pending
+awards live in process memory or, to be shared by all workers, in Redis.
+"""
+import asyncio
+import json
+import logging
+import time
+import uuid
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, bindparam, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+try:
+    import redis.asyncio as aioredis  # type: ignore
+except ImportError:
+    aioredis = None
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.utils import utc_now
+from app.database.gamification_models import PointTransaction
+from app.database.platform_models import UserPoints
+from app.services.dashboard_service import dashboard_service
+from app.services.gamification_summary import gamification_summary
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY_PREFIX = "points_ledger:"
+
+# A batch still unacknowledged after this long belongs to a dead worker
+STALE_BATCH_SECONDS = 300
+
+# (stored total_points, stored current_level, pending delta)
+PendingBalance = Tuple[int, int, int]
+
+
+@dataclass
+class PointEvent:
+    """One buffered point award."""
+    points: int
+    source_type: str
+    description: str
+    source_id: Optional[int] = None
+    created_at: Optional[datetime] = None
+
+    def to_json(self) -> str:
+        data = asdict(self)
+        data["created_at"] = self.created_at.isoformat() if self.created_at else None
+        return json.dumps(data)
+
+    @classmethod
+    def from_json(cls, raw: str) -> "PointEvent":
+        data = json.loads(raw)
+        if data.get("created_at"):
+            data["created_at"] = datetime.fromisoformat(data["created_at"])
+        return cls(**data)
+
+
+class MemoryPointsQueue:
+    """Pending awards for a single process."""
+
+    def __init__(self):
+        self._bases: Dict[int, Tuple[int, int]] = {}
+        self._deltas: Dict[int, int] = {}
+        self._events: Dict[int, List[PointEvent]] = {}
+        self._processing: Dict[str, Dict[int, List[PointEvent]]] = {}
+
+    async def append(
+        self, user_id: int, event: PointEvent, base: Optional[Tuple[int, int]] = None
+    ) -> Optional[PendingBalance]:
+        """Queue an award; None (and nothing queued) if the user's base balance is unknown."""
+        if user_id not in self._bases:
+            if base is None:
+                return None
+            self._bases[user_id] = base
+        self._deltas[user_id] = self._deltas.get(user_id, 0) + event.points
+        self._events.setdefault(user_id, []).append(event)
+        base_total, base_level = self._bases[user_id]
+        return base_total, base_level, self._deltas[user_id]
+
+    async def drain(self, batch_id: str, user_ids: Iterable[int]) -> Dict[int, List[PointEvent]]:
+        """Move users' pending awards into batch ``batch_id`` until it is acked or requeued."""
+        drained = {}
+        for user_id in user_ids:
+            self._bases.pop(user_id, None)
+            self._deltas.pop(user_id, None)
+            events = self._events.pop(user_id, None)
+            if events:
+                drained[user_id] = events
+        if drained:
+            self._processing[batch_id] = drained
+        return drained
+
+    async def ack(self, batch_id: str, user_ids: Iterable[int]) -> None:
+        self._processing.pop(batch_id, None)
+
+    async def requeue(self, batch_id: str, user_ids: Iterable[int]) -> None:
+        # The base is dropped so the next award reloads it from the database
+        for user_id, events in self._processing.pop(batch_id, {}).items():
+            self._bases.pop(user_id, None)
+            self._deltas[user_id] = self._deltas.get(user_id, 0) + sum(e.points for e in events)
+            self._events[user_id] = events + self._events.get(user_id, [])
+
+    async def stale_batches(self, older_than_seconds: int) -> List[Tuple[str, int]]:
+        # In-process batches are always acked or requeued by their flush
+        return []
+
+    async def pending_users(self, limit: int) -> List[int]:
+        return list(self._events)[:limit]
+
+
+class RedisPointsQueue:
+    """
+    Pending awards shared by all workers through Redis.
+
+    Draining renames a user's event list to a per-batch processing list that
+    is only deleted once the batch's database commit succeeded, so a worker
+    dying mid-flush leaves the awards behind for ``recover_stale`` to settle.
+    """
+
+    # KEYS: state hash, events list, dirty set
+    # ARGV: user id, points, event json, base total, base level
+    APPEND_SCRIPT = """
+    if redis.call('HEXISTS', KEYS[1], 'base_total') == 0 then
+        if ARGV[4] == '' then
+            return false
+        end
+        redis.call('HSET', KEYS[1], 'base_total', ARGV[4], 'base_level', ARGV[5])
+    end
+    local delta = redis.call('HINCRBY', KEYS[1], 'delta', ARGV[2])
+    redis.call('RPUSH', KEYS[2], ARGV[3])
+    redis.call('SADD', KEYS[3], ARGV[1])
+    return {tonumber(redis.call('HGET', KEYS[1], 'base_total')),
+            tonumber(redis.call('HGET', KEYS[1], 'base_level')), delta}
+    """
+
+    # KEYS: state hash, events list, dirty set, processing list, processing index
+    # ARGV: user id, processing index field, started at
+    DRAIN_SCRIPT = """
+    local events = redis.call('LRANGE', KEYS[2], 0, -1)
+    if #events > 0 then
+        redis.call('RENAME', KEYS[2], KEYS[4])
+        redis.call('HSET', KEYS[5], ARGV[2], ARGV[3])
+    end
+    redis.call('DEL', KEYS[1])
+    redis.call('SREM', KEYS[3], ARGV[1])
+    return events
+    """
+
+    # KEYS: processing list, processing index; ARGV: processing index field
+    ACK_SCRIPT = """
+    redis.call('DEL', KEYS[1])
+    redis.call('HDEL', KEYS[2], ARGV[1])
+    return 1
+    """
+
+    # KEYS: state hash, events list, dirty set, processing list, processing index
+    # ARGV: user id, processing index field
+    REQUEUE_SCRIPT = """
+    local events = redis.call('LRANGE', KEYS[4], 0, -1)
+    local delta = 0
+    for i = #events, 1, -1 do
+        redis.call('LPUSH', KEYS[2], events[i])
+        delta = delta + cjson.decode(events[i])['points']
+    end
+    redis.call('HDEL', KEYS[1], 'base_total', 'base_level')
+    redis.call('HINCRBY', KEYS[1], 'delta', delta)
+    if #events > 0 then
+        redis.call('SADD', KEYS[3], ARGV[1])
+    end
+    redis.call('DEL', KEYS[4])
+    redis.call('HDEL', KEYS[5], ARGV[2])
+    return #events
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self._append = client.register_script(self.APPEND_SCRIPT)
+        self._drain = client.register_script(self.DRAIN_SCRIPT)
+        self._ack = client.register_script(self.ACK_SCRIPT)
+        self._requeue = client.register_script(self.REQUEUE_SCRIPT)
+
+    def _keys(self, user_id: int) -> List[str]:
+        return [
+            f"{REDIS_KEY_PREFIX}state:{user_id}",
+            f"{REDIS_KEY_PREFIX}events:{user_id}",
+            f"{REDIS_KEY_PREFIX}dirty",
+        ]
+
+    def _processing_keys(self, batch_id: str, user_id: int) -> List[str]:
+        return [f"{REDIS_KEY_PREFIX}processing:{batch_id}:{user_id}", f"{REDIS_KEY_PREFIX}processing"]
+
+    async def append(
+        self, user_id: int, event: PointEvent, base: Optional[Tuple[int, int]] = None
+    ) -> Optional[PendingBalance]:
+        base_total, base_level = base if base is not None else ("", "")
+        result = await self._append(
+            keys=self._keys(user_id),
+            args=[user_id, event.points, event.to_json(), base_total, base_level]
+        )
+        if not result:
+            return None
+        return int(result[0]), int(result[1]), int(result[2])
+
+    async def drain(self, batch_id: str, user_ids: Iterable[int]) -> Dict[int, List[PointEvent]]:
+        drained = {}
+        started_at = int(time.time())
+        for user_id in user_ids:
+            events = await self._drain(
+                keys=self._keys(user_id) + self._processing_keys(batch_id, user_id),
+                args=[user_id, f"{batch_id}:{user_id}", started_at]
+            )
+            if events:
+                drained[user_id] = [PointEvent.from_json(raw) for raw in events]
+        return drained
+
+    async def ack(self, batch_id: str, user_ids: Iterable[int]) -> None:
+        for user_id in user_ids:
+            await self._ack(keys=self._processing_keys(batch_id, user_id), args=[f"{batch_id}:{user_id}"])
+
+    async def requeue(self, batch_id: str, user_ids: Iterable[int]) -> None:
+        for user_id in user_ids:
+            await self._requeue(
+                keys=self._keys(user_id) + self._processing_keys(batch_id, user_id),
+                args=[user_id, f"{batch_id}:{user_id}"]
+            )
+
+    async def stale_batches(self, older_than_seconds: int) -> List[Tuple[str, int]]:
+        """(batch id, user id) of processing lists left behind for longer than the cutoff."""
+        cutoff = time.time() - older_than_seconds
+        entries = await self.client.hgetall(f"{REDIS_KEY_PREFIX}processing")
+        stale = []
+        for field, started_at in (entries or {}).items():
+            if float(started_at) < cutoff:
+                batch_id, user_id = field.rsplit(":", 1)
+                stale.append((batch_id, int(user_id)))
+        return stale
+
+    async def pending_users(self, limit: int) -> List[int]:
+        members = await self.client.srandmember(f"{REDIS_KEY_PREFIX}dirty", limit)
+        return [int(member) for member in members or []]
+
+
+class PointsLedger:
+    """
+    Coalesces point awards per user and applies them in batches.
+
+    ``record`` queues an award and returns the user's balance including
+    everything still pending. ``applying`` writes pending awards into a
+    session; they leave the queue only once the caller's commit succeeded
+    and go back to it on any failure. ``flush`` wraps that with a commit;
+    callers that read balances flush that user first so reads never miss
+    queued points. A flush interval of zero makes every award write through.
+    """
+
+    def __init__(self, queue, flush_interval_seconds: int, batch_size: int):
+        self.queue = queue
+        self.flush_interval_seconds = flush_interval_seconds
+        self.batch_size = batch_size
+
+    @property
+    def write_through(self) -> bool:
+        return self.flush_interval_seconds <= 0
+
+    async def record(
+        self, db: AsyncSession, user_id: int, event: PointEvent
+    ) -> Optional[PendingBalance]:
+        """Queue an award; None if the user has no UserPoints row yet."""
+        if event.created_at is None:
+            event.created_at = utc_now()
+        pending = await self.queue.append(user_id, event)
+        if pending is not None:
+            return pending
+
+        # First award since the last flush: capture the stored balance once
+        result = await db.execute(
+            select(UserPoints.total_points, UserPoints.current_level)
+            .where(UserPoints.user_id == user_id)
+        )
+        row = result.one_or_none()
+        if row is None:
+            return None
+        return await self.queue.append(user_id, event, base=(row[0], row[1]))
+
+    @asynccontextmanager
+    async def applying(self, db: AsyncSession, user_ids: Iterable[int]):
+        """
+        Write users' pending awards into ``db``; yields the number applied.
+
+        The caller commits inside the block. Awards are acknowledged when the
+        block exits cleanly and requeued if it raises, so a failed write or
+        commit never loses them.
+        """
+        batch_id = uuid.uuid4().hex
+        pending = await self.queue.drain(batch_id, user_ids)
+        try:
+            if pending:
+                await self._write(db, batch_id, pending)
+            yield sum(len(events) for events in pending.values())
+        except BaseException:
+            if pending:
+                await self.queue.requeue(batch_id, list(pending))
+            raise
+        if pending:
+            await self.queue.ack(batch_id, list(pending))
+            for user_id in pending:
+                dashboard_service.invalidate(user_id)
+                gamification_summary.invalidate(user_id)
+
+    async def flush(self, db: AsyncSession, user_ids: Optional[Iterable[int]] = None) -> int:
+        """Apply and commit pending awards for ``user_ids``, or one batch of all users."""
+        if user_ids is None:
+            user_ids = await self.queue.pending_users(self.batch_size)
+        user_ids = list(user_ids)
+        if not user_ids:
+            return 0
+        try:
+            async with self.applying(db, user_ids) as applied:
+                if applied:
+                    await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+        return applied
+
+    async def flush_all(self) -> int:
+        """Drain every pending award in batches on fresh sessions."""
+        applied = 0
+        while True:
+            async with AsyncSessionLocal() as db:
+                flushed = await self.flush(db)
+            if not flushed:
+                return applied
+            applied += flushed
+
+    async def recover_stale(self, db: AsyncSession) -> int:
+        """
+        Settle batches whose worker died between draining and acknowledging.
+
+        A batch whose transactions reached the database is acknowledged,
+        anything else is requeued; returns the number of batches settled.
+        """
+        stale = await self.queue.stale_batches(STALE_BATCH_SECONDS)
+        for batch_id, user_id in stale:
+            committed = await db.scalar(
+                select(PointTransaction.id).where(and_(
+                    PointTransaction.user_id == user_id,
+                    PointTransaction.transaction_metadata["ledger_batch"].as_string() == batch_id
+                )).limit(1)
+            )
+            if committed is not None:
+                await self.queue.ack(batch_id, [user_id])
+            else:
+                await self.queue.requeue(batch_id, [user_id])
+        return len(stale)
+
+    async def run_flush_loop(self, interval_seconds: int) -> None:
+        """Flush pending awards forever; started from the application lifespan."""
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                async with AsyncSessionLocal() as db:
+                    await self.recover_stale(db)
+                await self.flush_all()
+            except Exception as e:
+                logger.error(f"Error flushing points ledger: {e}")
+
+    async def _write(self, db: AsyncSession, batch_id: str, pending: Dict[int, List[PointEvent]]) -> None:
+        # Lock the balances so transaction rows chain exactly onto them
+        result = await db.execute(
+            select(UserPoints.user_id, UserPoints.total_points)
+            .where(UserPoints.user_id.in_(list(pending)))
+            .with_for_update()
+        )
+        balances = dict(result.all())
+
+        transactions = []
+        deltas = []
+        for user_id, events in pending.items():
+            if user_id not in balances:
+                logger.warning(f"Dropping {len(events)} point awards for user {user_id} without points record")
+                continue
+            balance = balances[user_id]
+            for event in events:
+                transactions.append({
+                    "user_id": user_id,
+                    "transaction_type": "earned",
+                    "points": event.points,
+                    "source_type": event.source_type,
+                    "source_id": event.source_id,
+                    "description": event.description,
+                    # Lets recovery tell whether a batch was committed
+                    "transaction_metadata": {"ledger_batch": batch_id},
+                    "balance_before": balance,
+                    "balance_after": balance + event.points,
+                    "created_at": event.created_at,
+                })
+                balance += event.points
+            deltas.append({"b_user_id": user_id, "delta": balance - balances[user_id]})
+        if not transactions:
+            return
+
+        table = UserPoints.__table__
+        connection = await db.connection()
+        await connection.execute(insert(PointTransaction.__table__), transactions)
+        await connection.execute(
+            update(table)
+            .where(table.c.user_id == bindparam("b_user_id"))
+            .values(
+                total_points=table.c.total_points + bindparam("delta"),
+                available_points=table.c.available_points + bindparam("delta"),
+                lifetime_points=table.c.lifetime_points + bindparam("delta"),
+                updated_at=utc_now(),
+            ),
+            deltas
+        )
+
+
+def create_points_ledger() -> PointsLedger:
+    """Build the ledger on the configured backend."""
+    if settings.points_ledger_backend == "redis":
+        if aioredis is None:
+            raise RuntimeError("redis package is required for the Redis points ledger backend")
+        queue = RedisPointsQueue(aioredis.from_url(settings.redis_url, decode_responses=True))
+    else:
+        queue = MemoryPointsQueue()
+    return PointsLedger(
+        queue,
+        flush_interval_seconds=settings.points_ledger_flush_interval_seconds,
+        batch_size=settings.points_ledger_batch_size
+    )
+
+
+# Global ledger shared by every GamificationService instance in the process
+points_ledger = create_points_ledger()
@@ -0,0 +1,108 @@
+"""
+Short-lived cache of authenticated users.
+Lets get_current_user resolve a valid token without querying the user and
+profile on every request; entries are dropped whenever the user or profile
+row changes and expire after a short TTL so other workers catch up.
+"""
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.core.config import settings
+from app.database.user_models import User, Profile
+
+
+def _detached_copy(instance):
+    """Copy the loaded column values of an ORM instance into a detached instance."""
+    state = inspect(instance)
+    copy = state.mapper.class_manager.new_instance()
+    for key in state.mapper.column_attrs.keys():
+        if key in state.dict:
+            set_committed_value(copy, key, state.dict[key])
+    return copy
+
+
+class AuthenticatedUserCache:
+    """
+    LRU of detached user snapshots per user id, each tagged with the token
+    version it was loaded for; a token of any other version misses.
+
+    Snapshots are never handed out directly: ``get`` merges them into the
+    caller's session without loading, so each request gets its own
+    persistent User (with profile) and no query is issued.
+    """
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, Tuple[float, int, User]]" = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    async def get(self, db: AsyncSession, user_id: int, token_version: int) -> Optional[User]:
+        """The cached user attached to ``db``, or None on a miss."""
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        expires_at, cached_version, snapshot = entry
+        if expires_at <= time.monotonic():
+            self._entries.pop(user_id, None)
+            return None
+        if cached_version != token_version:
+            return None
+        self._entries.move_to_end(user_id)
+        return await db.merge(snapshot, load=False)
+
+    def put(self, user: User) -> None:
+        """Cache a freshly loaded user; its profile must already be loaded."""
+        if not self.enabled:
+            return
+        snapshot = _detached_copy(user)
+        profile = inspect(user).dict.get("profile")
+        if profile is not None:
+            profile_snapshot = _detached_copy(profile)
+            set_committed_value(snapshot, "profile", profile_snapshot)
+            set_committed_value(profile_snapshot, "user", snapshot)
+            make_transient_to_detached(profile_snapshot)
+        elif "profile" in inspect(user).dict:
+            set_committed_value(snapshot, "profile", None)
+        make_transient_to_detached(snapshot)
+
+        self._entries[user.id] = (time.monotonic() + self.ttl_seconds, user.token_version, snapshot)
+        self._entries.move_to_end(user.id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        """Drop a user's cached snapshot."""
+        self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+# Global cache instance
+user_cache = AuthenticatedUserCache(
+    ttl_seconds=settings.auth_user_cache_ttl_seconds,
+    max_entries=settings.auth_user_cache_max_entries
+)
+
+
+# ORM writes invalidate on flush; bulk UPDATE statements must call invalidate()
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_user(mapper, connection, target: User) -> None:
+    user_cache.invalidate(target.id)
+
+
+@event.listens_for(Profile, "after_update")
+@event.listens_for(Profile, "after_delete")
+def _invalidate_profile(mapper, connection, target: Profile) -> None:
+    user_cache.invalidate(target.user_id)
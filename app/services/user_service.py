@@ -8,6 +8,7 @@ from sqlalchemy import select, update, and_, or_
 from sqlalchemy.orm import selectinload
 
 from app.database.user_models import User, Profile, MentorProfile
+from app.services.user_cache import user_cache
 from app.schemas.user_schemas import (
     UserResponse, UserUpdate, ProfileUpdate, UserPreferencesUpdate,
     MentorProfileCreate, MentorProfileUpdate, MentorProfileResponse,
@@ -198,6 +199,7 @@ class UserService:
         )
         
         await db.commit()
+        user_cache.invalidate(user_id)
         return result.rowcount > 0
     
     async def reactivate_user(
@@ -225,6 +227,7 @@ class UserService:
         )
         
         await db.commit()
+        user_cache.invalidate(user_id)
         return result.rowcount > 0
     
     async def search_users(
@@ -0,0 +1,30 @@
+"""add_job_listing_last_seen
+
+Revision ID: a9e4c7d2b613
+Revises: f2b6d8a1c4e7
+Create Date: 2026-10-17 21:07:52.318640
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9e4c7d2b613'
+down_revision: Union[str, None] = 'f2b6d8a1c4e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # When the job feeds last returned each catalog job
+    op.add_column('job_listings', sa.Column('last_seen_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False))
+    op.execute('UPDATE job_listings SET last_seen_at = updated_at')
+    op.create_index('idx_job_listings_active_last_seen', 'job_listings', ['is_active', 'last_seen_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_job_listings_active_last_seen', table_name='job_listings')
+    op.drop_column('job_listings', 'last_seen_at')
@@ -0,0 +1,33 @@
+"""add_job_catalog_fingerprint
+
+Revision ID: c3d9e1f4a7b2
+Revises: a24ca9246672
+Create Date: 2026-10-17 09:12:31.482113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3d9e1f4a7b2'
+down_revision: Union[str, None] = 'a24ca9246672'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Content fingerprint for incremental upserts of external jobs
+    op.add_column('job_listings', sa.Column('content_fingerprint', sa.String(length=64), nullable=True))
+    op.create_index('uq_job_listings_source_external_id', 'job_listings', ['source_platform', 'external_job_id'], unique=True)
+    op.create_index('idx_job_listings_content_fingerprint', 'job_listings', ['content_fingerprint'], unique=False)
+    op.create_index('idx_job_listings_active_posted', 'job_listings', ['is_active', 'posted_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_job_listings_active_posted', table_name='job_listings')
+    op.drop_index('idx_job_listings_content_fingerprint', table_name='job_listings')
+    op.drop_index('uq_job_listings_source_external_id', table_name='job_listings')
+    op.drop_column('job_listings', 'content_fingerprint')
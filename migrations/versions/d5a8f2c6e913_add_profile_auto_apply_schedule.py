@@ -0,0 +1,33 @@
+"""add_profile_auto_apply_schedule
+
+Revision ID: d5a8f2c6e913
+Revises: c3d9e1f4a7b2
+Create Date: 2026-10-17 11:04:52.317640
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a8f2c6e913'
+down_revision: Union[str, None] = 'c3d9e1f4a7b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Scan bookkeeping and application window for the auto-apply scheduler
+    op.add_column('profiles', sa.Column('auto_apply_window_start', sa.Time(), nullable=True))
+    op.add_column('profiles', sa.Column('auto_apply_window_end', sa.Time(), nullable=True))
+    op.add_column('profiles', sa.Column('last_job_scan_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index('idx_profile_auto_apply_scan', 'profiles', ['auto_apply_enabled', 'last_job_scan_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_profile_auto_apply_scan', table_name='profiles')
+    op.drop_column('profiles', 'last_job_scan_at')
+    op.drop_column('profiles', 'auto_apply_window_end')
+    op.drop_column('profiles', 'auto_apply_window_start')
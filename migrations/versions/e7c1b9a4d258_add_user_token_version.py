@@ -0,0 +1,27 @@
+"""add_user_token_version
+
+Revision ID: e7c1b9a4d258
+Revises: d5a8f2c6e913
+Create Date: 2026-10-17 15:22:08.418305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7c1b9a4d258'
+down_revision: Union[str, None] = 'd5a8f2c6e913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Tokens carry this version; bumping it revokes the user's existing tokens
+    op.add_column('users', sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'token_version')
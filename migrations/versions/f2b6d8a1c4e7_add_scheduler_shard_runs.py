@@ -0,0 +1,33 @@
+"""add_scheduler_shard_runs
+
+Revision ID: f2b6d8a1c4e7
+Revises: e7c1b9a4d258
+Create Date: 2026-10-17 18:41:36.902114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b6d8a1c4e7'
+down_revision: Union[str, None] = 'e7c1b9a4d258'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Last completed run per distributed scheduler shard
+    op.create_table(
+        'scheduler_shard_runs',
+        sa.Column('shard_index', sa.Integer(), nullable=False),
+        sa.Column('shard_count', sa.Integer(), nullable=False),
+        sa.Column('processed_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('shard_index', 'shard_count')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('scheduler_shard_runs')
@@ -0,0 +1,69 @@
+"""Measure the per-request cost of a rate limit check.
+
+Run with::
+
+    python scripts/benchmark_rate_limiter.py --storage-uri localfirst+redis://localhost:6379/0
+
+Defaults to in-memory storage. Allowed checks measure one storage round trip;
+rejected checks show the effect of the local block cache on Redis storage.
+The target is well under a millisecond per check.
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import STRATEGIES
+
+# Ensure project root is on the import path when run as a script
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+# Registers the localfirst+redis storage scheme
+from app.core.rate_limiter import LocalFirstRedisStorage  # noqa: F401
+
+
+def time_checks(rate_limiter, limit, key: str, count: int):
+    timings = []
+    for _ in range(count):
+        started = time.perf_counter()
+        rate_limiter.hit(limit, key)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def report(label: str, timings) -> None:
+    timings = sorted(timings)
+    p99 = timings[int(len(timings) * 0.99) - 1]
+    print(
+        f"{label:<10} n={len(timings):<6} mean={statistics.mean(timings):.3f}ms "
+        f"p50={statistics.median(timings):.3f}ms p99={p99:.3f}ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--storage-uri", default="memory://")
+    parser.add_argument("--strategy", default="moving-window")
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    storage = storage_from_string(args.storage_uri)
+    rate_limiter = STRATEGIES[args.strategy](storage)
+    run_id = int(time.time())
+
+    # Allowed: every check goes to storage
+    allowed = parse(f"{args.requests * 2}/hour")
+    report("allowed", time_checks(rate_limiter, allowed, f"bench:allowed:{run_id}", args.requests))
+
+    # Rejected: the key is exhausted after the first few checks
+    rejected = parse("5/hour")
+    report("rejected", time_checks(rate_limiter, rejected, f"bench:rejected:{run_id}", args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""Recompute every user's level from their points.
+
+Run with::
+
+    python scripts/recompute_levels.py
+
+Use after changing the XP curve or level titles in app/services/level_table.py.
+Buffered point awards are flushed first; levels are then reassigned with a
+single set-based UPDATE over user_points and user_levels.
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# Ensure project root is on the import path when run as a script
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.core.database import AsyncSessionLocal
+from app.services.gamification_service import GamificationService
+
+
+async def main() -> None:
+    async with AsyncSessionLocal() as session:
+        updated = await GamificationService().recompute_all_levels(session)
+    print(f"Recomputed levels for {updated} users")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,57 @@
+"""
+Tests for the keyset cursor used to page the activity feed.
+"""
+import base64
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.services.gamification_service import GamificationService
+
+
+@pytest.fixture
+def service():
+    return GamificationService()
+
+
+def encode_raw(raw: str) -> str:
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def test_cursor_round_trip(service):
+    occurred_at = datetime(2024, 3, 5, 12, 30, 15, 123456, tzinfo=timezone.utc)
+
+    cursor = service._encode_feed_cursor(occurred_at, "badge", 42)
+
+    assert service._decode_feed_cursor(cursor) == (occurred_at, "badge", 42)
+
+
+def test_cursor_keeps_utc_offset(service):
+    occurred_at = datetime(2024, 3, 5, 12, 30, tzinfo=timezone(timedelta(hours=2)))
+
+    decoded_at, _, _ = service._decode_feed_cursor(
+        service._encode_feed_cursor(occurred_at, "activity", 7)
+    )
+
+    assert decoded_at.utcoffset() == timedelta(hours=2)
+    assert decoded_at == occurred_at
+
+
+def test_cursor_is_url_safe(service):
+    cursor = service._encode_feed_cursor(datetime.now(timezone.utc), "activity", 10**12)
+
+    assert set(cursor) <= set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_=")
+
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "not a cursor",
+    encode_raw("2024-03-05T12:30:00+00:00|badge"),
+    encode_raw("2024-03-05T12:30:00+00:00|badge|42|extra"),
+    encode_raw("yesterday|badge|42"),
+    encode_raw("2024-03-05T12:30:00+00:00|badge|forty-two"),
+    base64.urlsafe_b64encode(b"\xff\xfe|badge|42").decode(),
+])
+def test_invalid_cursor_raises(service, cursor):
+    with pytest.raises(ValueError, match="Invalid activity feed cursor"):
+        service._decode_feed_cursor(cursor)
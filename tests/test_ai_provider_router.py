@@ -0,0 +1,199 @@
+"""
+Tests for AI provider routing: latency averaging, circuit breaking and quotas.
+"""
+import pytest
+
+from app.services import ai_provider_router as router_module
+from app.services.ai_provider_router import (
+    CIRCUIT_COOLDOWN_SECONDS, FAILURE_THRESHOLD, LATENCY_SMOOTHING,
+    ProviderLimits, ProviderRouter, TokenBucket, is_throttling_error
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(router_module, "time", clock)
+    return clock
+
+
+def make_router(**limits) -> ProviderRouter:
+    return ProviderRouter({
+        "fast": ProviderLimits(timeout_seconds=10, expected_latency_seconds=1.0, **limits),
+        "slow": ProviderLimits(timeout_seconds=10, expected_latency_seconds=5.0),
+    })
+
+
+def trip(router: ProviderRouter, provider: str) -> None:
+    for _ in range(FAILURE_THRESHOLD):
+        router.record_failure(provider, 1.0)
+
+
+def test_orders_by_expected_latency(clock):
+    router = make_router()
+
+    assert router.attempt_order(["slow", "fast"], 100) == ["fast", "slow"]
+
+    router.record_success("fast", 9.0)
+    assert router.attempt_order(["slow", "fast"], 100) == ["slow", "fast"]
+
+
+def test_unknown_providers_keep_caller_order(clock):
+    router = make_router()
+
+    assert router.attempt_order(["other", "fast"], 100) == ["other", "fast"]
+
+
+def test_latency_is_an_exponential_moving_average(clock):
+    router = make_router()
+    router.record_success("fast", 2.0)
+    router.record_success("fast", 4.0)
+
+    expected = LATENCY_SMOOTHING * 4.0 + (1 - LATENCY_SMOOTHING) * 2.0
+    assert router.snapshot()["fast"]["expected_latency"] == pytest.approx(expected, abs=1e-3)
+
+
+def test_error_rate_adds_timeout_cost(clock):
+    router = make_router()
+    router.record_success("fast", 1.0)
+    router.record_failure("fast", 1.0)
+
+    health = router.snapshot()["fast"]
+    assert health["error_rate"] == 0.5
+    assert health["expected_latency"] == pytest.approx(1.0 + 0.5 * 10, abs=1e-3)
+
+
+def test_circuit_opens_after_consecutive_failures(clock):
+    router = make_router()
+    for _ in range(FAILURE_THRESHOLD - 1):
+        router.record_failure("fast", 1.0)
+    assert "fast" in router.attempt_order(["fast"], 100)
+
+    router.record_failure("fast", 1.0)
+
+    assert router.attempt_order(["fast", "slow"], 100) == ["slow"]
+    assert not router.acquire("fast", 100)
+    assert router.snapshot()["fast"]["circuit_open"]
+
+
+def test_half_open_circuit_allows_one_probe(clock):
+    router = make_router()
+    trip(router, "fast")
+    clock.now += CIRCUIT_COOLDOWN_SECONDS
+
+    assert router.attempt_order(["fast"], 100) == ["fast"]
+    assert router.acquire("fast", 100)
+    # Only one probe at a time
+    assert not router.acquire("fast", 100)
+    assert router.attempt_order(["fast"], 100) == []
+
+
+def test_successful_probe_closes_circuit(clock):
+    router = make_router()
+    trip(router, "fast")
+    clock.now += CIRCUIT_COOLDOWN_SECONDS
+    assert router.acquire("fast", 100)
+
+    router.record_success("fast", 1.0)
+
+    assert not router.snapshot()["fast"]["circuit_open"]
+    assert router.acquire("fast", 100)
+    assert router.acquire("fast", 100)
+
+
+def test_failed_probe_doubles_cooldown(clock):
+    router = make_router()
+    trip(router, "fast")
+    clock.now += CIRCUIT_COOLDOWN_SECONDS
+    assert router.acquire("fast", 100)
+
+    router.record_failure("fast", 1.0)
+
+    clock.now += CIRCUIT_COOLDOWN_SECONDS
+    assert not router.acquire("fast", 100)
+    clock.now += CIRCUIT_COOLDOWN_SECONDS
+    assert router.acquire("fast", 100)
+
+
+def test_release_frees_probe_slot(clock):
+    router = make_router()
+    trip(router, "fast")
+    clock.now += CIRCUIT_COOLDOWN_SECONDS
+    assert router.acquire("fast", 100)
+
+    router.release("fast")
+
+    assert router.acquire("fast", 100)
+
+
+def test_request_quota_refills(clock):
+    router = make_router(requests_per_minute=2)
+
+    assert router.acquire("fast", 1)
+    assert router.acquire("fast", 1)
+    assert not router.acquire("fast", 1)
+    assert router.attempt_order(["fast", "slow"], 1) == ["slow"]
+
+    clock.now += 30
+    assert router.acquire("fast", 1)
+
+
+def test_throttling_drains_request_bucket(clock):
+    router = make_router(requests_per_minute=10)
+
+    router.record_failure("fast", 1.0, throttled=True)
+
+    assert not router.acquire("fast", 1)
+
+
+def test_quota_is_split_across_workers(clock):
+    router = ProviderRouter(
+        {"fast": ProviderLimits(timeout_seconds=10, expected_latency_seconds=1.0,
+                                requests_per_minute=10, tokens_per_day=1000)},
+        workers=2
+    )
+
+    snapshot = router.snapshot()["fast"]
+    assert snapshot["requests_available"] == 5
+    assert snapshot["tokens_available"] == 500
+
+
+def test_settle_refunds_and_charges_token_usage(clock):
+    router = make_router(tokens_per_day=1000)
+    assert router.acquire("fast", 400)
+
+    router.settle("fast", 400, 100)
+    assert router.snapshot()["fast"]["tokens_available"] == 900
+
+    router.settle("fast", 0, 1200)
+    assert router.snapshot()["fast"]["tokens_available"] == -300
+    assert not router.acquire("fast", 1)
+
+
+def test_token_bucket_caps_oversized_requests(clock):
+    bucket = TokenBucket(capacity=100, refill_per_second=1)
+
+    assert bucket.consume(500)
+    assert not bucket.available(1)
+    clock.now += 100
+    assert bucket.available(500)
+
+
+def test_is_throttling_error():
+    class RateLimitError(Exception):
+        pass
+
+    class StatusError(Exception):
+        status_code = 429
+
+    assert is_throttling_error(RateLimitError())
+    assert is_throttling_error(StatusError())
+    assert not is_throttling_error(ValueError())
@@ -0,0 +1,155 @@
+"""
+Tests for compiling badge criteria into rules and matching activity metadata.
+"""
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.badge_rules import BadgeRuleIndex, compile_rule
+
+
+def make_badge(criteria, badge_id=1, slug="first-lesson", prerequisites=None):
+    return SimpleNamespace(
+        id=badge_id,
+        slug=slug,
+        name="First Lesson",
+        description="Complete a lesson",
+        rarity=SimpleNamespace(value="common"),
+        points_required=50,
+        prerequisites=prerequisites,
+        criteria=criteria,
+    )
+
+
+class FakeResult:
+    def __init__(self, badges):
+        self._badges = badges
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self._badges
+
+
+class FakeDB:
+    def __init__(self, badges):
+        self.badges = badges
+        self.queries = 0
+
+    async def execute(self, query):
+        self.queries += 1
+        return FakeResult(self.badges)
+
+
+def test_compile_single_activity_type():
+    activity_types, rule = compile_rule(make_badge({"activity_type": "complete_lesson"}))
+
+    assert activity_types == ("complete_lesson",)
+    assert rule.badge_id == 1
+    assert rule.slug == "first-lesson"
+    assert rule.rarity == "common"
+    assert rule.points == 50
+    assert rule.target == 1
+    assert rule.prerequisites == ()
+    assert rule.conditions == ()
+
+
+def test_compile_activity_type_list_and_prerequisites():
+    activity_types, rule = compile_rule(make_badge(
+        {"activity_types": ["complete_lesson", "complete_quiz"], "target": 5},
+        prerequisites=[3, 4],
+    ))
+
+    assert activity_types == ("complete_lesson", "complete_quiz")
+    assert rule.target == 5
+    assert rule.prerequisites == (3, 4)
+
+
+def test_compile_accepts_count_as_target():
+    _, rule = compile_rule(make_badge({"activity_type": "complete_lesson", "count": "3"}))
+
+    assert rule.target == 3
+
+
+@pytest.mark.parametrize("criteria", [None, {}, {"target": 5}, "complete_lesson"])
+def test_compile_without_activity_type_has_no_rule(criteria):
+    assert compile_rule(make_badge(criteria)) == ((), None)
+
+
+def test_compile_conditions():
+    _, rule = compile_rule(make_badge({
+        "activity_type": "resume_review",
+        "conditions": {
+            "quality_score": {"gte": 80, "lt": 100},
+            "section": "experience",
+        },
+    }))
+
+    assert rule.conditions == (
+        ("quality_score", "gte", 80),
+        ("quality_score", "lt", 100),
+        ("section", "eq", "experience"),
+    )
+
+
+def test_compile_rejects_unknown_operator():
+    with pytest.raises(ValueError):
+        compile_rule(make_badge({
+            "activity_type": "resume_review",
+            "conditions": {"quality_score": {"between": [80, 100]}},
+        }))
+
+
+def test_matches_every_condition():
+    _, rule = compile_rule(make_badge({
+        "activity_type": "resume_review",
+        "conditions": {
+            "quality_score": {"gte": 80},
+            "section": {"in": ["experience", "skills"]},
+        },
+    }))
+
+    assert rule.matches({"quality_score": 85, "section": "skills"})
+    assert not rule.matches({"quality_score": 79, "section": "skills"})
+    assert not rule.matches({"quality_score": 85, "section": "education"})
+
+
+def test_matches_without_conditions():
+    _, rule = compile_rule(make_badge({"activity_type": "complete_lesson"}))
+
+    assert rule.matches({})
+
+
+def test_matches_missing_key_or_incomparable_value():
+    _, rule = compile_rule(make_badge({
+        "activity_type": "resume_review",
+        "conditions": {"quality_score": {"gte": 80}},
+    }))
+
+    assert not rule.matches({})
+    assert not rule.matches({"quality_score": None})
+
+
+@pytest.mark.asyncio
+async def test_index_groups_rules_and_skips_invalid_badges():
+    index = BadgeRuleIndex(refresh_seconds=300)
+    db = FakeDB([
+        make_badge({"activity_type": "complete_lesson"}, badge_id=1, slug="lesson"),
+        make_badge({"activity_type": ["complete_lesson", "complete_quiz"]}, badge_id=2, slug="learner"),
+        make_badge({"activity_type": "complete_quiz", "conditions": {"score": {"near": 1}}},
+                   badge_id=3, slug="broken"),
+        make_badge({}, badge_id=4, slug="manual"),
+    ])
+
+    lesson_rules = await index.rules_for(db, "complete_lesson")
+    quiz_rules = await index.rules_for(db, "complete_quiz")
+
+    assert [rule.slug for rule in lesson_rules] == ["lesson", "learner"]
+    assert [rule.slug for rule in quiz_rules] == ["learner"]
+    assert await index.rules_for(db, "other") == ()
+    assert db.queries == 1
+
+    index.invalidate()
+    await index.rules_for(db, "complete_lesson")
+    assert db.queries == 2
@@ -0,0 +1,95 @@
+"""
+Tests for the indexable skip list behind the in-memory leaderboards.
+"""
+import random
+
+import pytest
+
+from app.services.leaderboard_engine import IndexableSkipList, MemoryScoreSets
+
+
+def test_empty_list():
+    keys = IndexableSkipList()
+
+    assert len(keys) == 0
+    assert keys.rank(1) is None
+    assert keys.slice(0, 10) == []
+
+
+def test_insert_keeps_keys_ordered():
+    keys = IndexableSkipList()
+    for key in [5, 1, 4, 2, 3]:
+        keys.insert(key)
+
+    assert len(keys) == 5
+    assert keys.slice(0, 10) == [1, 2, 3, 4, 5]
+    assert [keys.rank(key) for key in range(1, 6)] == [0, 1, 2, 3, 4]
+
+
+def test_slice_bounds():
+    keys = IndexableSkipList()
+    for key in range(10):
+        keys.insert(key)
+
+    assert keys.slice(3, 4) == [3, 4, 5, 6]
+    assert keys.slice(8, 5) == [8, 9]
+    assert keys.slice(10, 5) == []
+    assert keys.slice(0, 0) == []
+
+
+def test_remove_updates_ranks():
+    keys = IndexableSkipList()
+    for key in range(10):
+        keys.insert(key)
+
+    keys.remove(0)
+    keys.remove(5)
+
+    assert len(keys) == 8
+    assert keys.rank(0) is None
+    assert keys.rank(6) == 4
+    assert keys.slice(0, 10) == [1, 2, 3, 4, 6, 7, 8, 9]
+
+
+def test_remove_missing_key_raises():
+    keys = IndexableSkipList()
+    keys.insert(1)
+
+    with pytest.raises(KeyError):
+        keys.remove(2)
+
+
+def test_matches_sorted_list_under_random_operations():
+    rng = random.Random(42)
+    keys = IndexableSkipList()
+    expected = []
+    for _ in range(2000):
+        key = rng.randrange(500)
+        if key in expected:
+            keys.remove(key)
+            expected.remove(key)
+        else:
+            keys.insert(key)
+            expected.append(key)
+            expected.sort()
+
+    assert len(keys) == len(expected)
+    assert keys.slice(0, len(expected)) == expected
+    for index, key in enumerate(expected):
+        assert keys.rank(key) == index
+    start = len(expected) // 3
+    assert keys.slice(start, 7) == expected[start:start + 7]
+
+
+@pytest.mark.asyncio
+async def test_memory_score_sets_rank_highest_first_ties_by_user_id():
+    boards = MemoryScoreSets()
+    await boards.replace("points:all_time:all", {1: 50.0, 2: 80.0, 3: 50.0})
+    await boards.incr("points:all_time:all", 4, 10.0)
+    await boards.incr("points:all_time:all", 1, 40.0)
+
+    assert await boards.page("points:all_time:all", 0, 10) == [
+        (1, 90.0), (2, 80.0), (3, 50.0), (4, 10.0)
+    ]
+    assert await boards.rank("points:all_time:all", 3) == (2, 50.0)
+    assert await boards.rank("points:all_time:all", 99) is None
@@ -0,0 +1,61 @@
+"""
+Tests for the precomputed level table.
+"""
+from app.services.level_table import LEVEL_TITLES, LevelTable, level_table, xp_curve
+
+
+def walk_level(total_points: int) -> int:
+    """Reference implementation: climb the curve one level at a time."""
+    level = 1
+    while total_points >= xp_curve(level + 1):
+        level += 1
+    return level
+
+
+def test_level_for_points_matches_walking_the_curve():
+    for total_points in list(range(0, 5000, 7)) + [249, 250, 251, 549, 550, 551]:
+        assert level_table.level_for_points(total_points) == walk_level(total_points)
+
+
+def test_level_for_points_never_drops_below_current_level():
+    assert level_table.level_for_points(0, current_level=4) == 4
+
+
+def test_table_extends_beyond_initial_levels():
+    table = LevelTable(xp_curve, LEVEL_TITLES, initial_levels=2)
+    total_points = xp_curve(300) + 1
+
+    assert table.level_for_points(total_points) == 300
+    assert table.xp_for_level(450) == xp_curve(450)
+
+
+def test_xp_for_level_and_points_to_next_level():
+    assert level_table.xp_for_level(1) == xp_curve(1)
+    assert level_table.xp_for_level(10) == xp_curve(10)
+    assert level_table.points_to_next_level(300, 2) == xp_curve(3) - 300
+
+
+def test_progress_percent():
+    assert level_table.progress_percent(0, 1) == 0
+    assert level_table.progress_percent(125, 1) == 50
+    # Level 2 starts at 250 XP and level 3 at 400
+    assert level_table.progress_percent(325, 2) == 50
+    assert level_table.progress_percent(10_000, 2) == 100
+
+
+def test_title_for_level():
+    assert level_table.title_for_level(1) == "Aspiring PM"
+    assert level_table.title_for_level(4) == "Aspiring PM"
+    assert level_table.title_for_level(5) == "PM Trainee"
+    assert level_table.title_for_level(49) == "Senior PM"
+    assert level_table.title_for_level(120) == "PM Master"
+
+
+def test_rows_cover_points_range():
+    rows = level_table.rows(600)
+
+    assert rows[0] == (1, 0, xp_curve(2), "Aspiring PM")
+    assert rows[-1][1] <= 600 < rows[-1][2]
+    for (level, _, next_points, _), (next_level, min_points, _, _) in zip(rows, rows[1:]):
+        assert next_level == level + 1
+        assert min_points == next_points
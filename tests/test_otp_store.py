@@ -0,0 +1,149 @@
+"""
+Tests for the OTP storage backends.
+The shared behaviour runs against the in-memory store and, when fakeredis
+(with Lua support) is installed, against the Redis store and its verify script.
+"""
+import time
+
+import pytest
+import pytest_asyncio
+
+from app.services import otp_store as otp_store_module
+from app.services.otp_store import InMemoryOTPStore, RedisOTPStore, OTP_KEY_PREFIX
+
+MAX_ATTEMPTS = 3
+
+
+@pytest_asyncio.fixture(params=["memory", "redis"])
+async def store(request):
+    """Each OTP store backend."""
+    if request.param == "memory":
+        yield InMemoryOTPStore()
+        return
+
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    yield RedisOTPStore(client)
+    await client.flushall()
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_verify_accepts_issued_code_once(store):
+    await store.save("user@example.com", "123456", "login", ttl_seconds=300)
+
+    assert await store.verify("user@example.com", "123456", "login", MAX_ATTEMPTS)
+    # A verified code is consumed
+    assert not await store.verify("user@example.com", "123456", "login", MAX_ATTEMPTS)
+    assert await store.get("user@example.com") is None
+
+
+@pytest.mark.asyncio
+async def test_verify_rejects_unknown_identifier(store):
+    assert not await store.verify("nobody@example.com", "123456", "login", MAX_ATTEMPTS)
+
+
+@pytest.mark.asyncio
+async def test_verify_rejects_wrong_purpose(store):
+    await store.save("user@example.com", "123456", "login", ttl_seconds=300)
+
+    assert not await store.verify("user@example.com", "123456", "password_reset", MAX_ATTEMPTS)
+    assert await store.verify("user@example.com", "123456", "login", MAX_ATTEMPTS)
+
+
+@pytest.mark.asyncio
+async def test_wrong_codes_count_as_attempts(store):
+    await store.save("user@example.com", "123456", "login", ttl_seconds=300)
+
+    assert not await store.verify("user@example.com", "000000", "login", MAX_ATTEMPTS)
+    assert not await store.verify("user@example.com", "111111", "login", MAX_ATTEMPTS)
+
+    record = await store.get("user@example.com")
+    assert record["attempts"] == 2
+
+
+@pytest.mark.asyncio
+async def test_attempt_limit_locks_out_the_correct_code(store):
+    await store.save("user@example.com", "123456", "login", ttl_seconds=300)
+
+    for _ in range(MAX_ATTEMPTS):
+        assert not await store.verify("user@example.com", "000000", "login", MAX_ATTEMPTS)
+
+    assert not await store.verify("user@example.com", "123456", "login", MAX_ATTEMPTS)
+    # The exhausted record is dropped
+    assert await store.get("user@example.com") is None
+
+
+@pytest.mark.asyncio
+async def test_save_replaces_code_and_resets_attempts(store):
+    await store.save("user@example.com", "123456", "login", ttl_seconds=300)
+    assert not await store.verify("user@example.com", "000000", "login", MAX_ATTEMPTS)
+
+    await store.save("user@example.com", "654321", "login", ttl_seconds=300)
+
+    record = await store.get("user@example.com")
+    assert record["otp"] == "654321"
+    assert record["attempts"] == 0
+    assert not await store.verify("user@example.com", "123456", "login", MAX_ATTEMPTS)
+    assert await store.verify("user@example.com", "654321", "login", MAX_ATTEMPTS)
+
+
+@pytest.mark.asyncio
+async def test_get_reports_expiry(store):
+    await store.save("user@example.com", "123456", "login", ttl_seconds=300)
+
+    record = await store.get("user@example.com")
+    assert record["purpose"] == "login"
+    assert time.time() < record["expires_at"] <= time.time() + 300
+
+
+@pytest.mark.asyncio
+async def test_memory_store_expires_codes(monkeypatch):
+    store = InMemoryOTPStore()
+    now = 1_000_000.0
+    monkeypatch.setattr(otp_store_module.time, "time", lambda: now)
+    await store.save("user@example.com", "123456", "login", ttl_seconds=60)
+
+    now += 61
+    assert await store.get("user@example.com") is None
+    assert not await store.verify("user@example.com", "123456", "login", MAX_ATTEMPTS)
+
+
+@pytest.mark.asyncio
+async def test_memory_store_expired_verify_is_rejected(monkeypatch):
+    store = InMemoryOTPStore()
+    now = 1_000_000.0
+    monkeypatch.setattr(otp_store_module.time, "time", lambda: now)
+    await store.save("user@example.com", "123456", "login", ttl_seconds=60)
+
+    now += 61
+    assert not await store.verify("user@example.com", "123456", "login", MAX_ATTEMPTS)
+
+
+@pytest.mark.asyncio
+async def test_memory_store_sweeps_expired_and_bounds_size(monkeypatch):
+    store = InMemoryOTPStore(max_entries=2)
+    now = 1_000_000.0
+    monkeypatch.setattr(otp_store_module.time, "time", lambda: now)
+
+    await store.save("old@example.com", "111111", "login", ttl_seconds=10)
+    now += 11
+    await store.save("a@example.com", "222222", "login", ttl_seconds=300)
+    await store.save("b@example.com", "333333", "login", ttl_seconds=300)
+    await store.save("c@example.com", "444444", "login", ttl_seconds=300)
+
+    # The expired record is swept, then the oldest live one is evicted
+    assert list(store._records) == ["b@example.com", "c@example.com"]
+
+
+@pytest.mark.asyncio
+async def test_redis_store_sets_key_ttl():
+    fakeredis = pytest.importorskip("fakeredis")
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    store = RedisOTPStore(client)
+
+    await store.save("user@example.com", "123456", "login", ttl_seconds=300)
+
+    assert 0 < await client.ttl(OTP_KEY_PREFIX + "user@example.com") <= 300
+    await client.aclose()